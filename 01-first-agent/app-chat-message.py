@@ -1,18 +1,20 @@
+import functools
 import os
+import sys
+from pathlib import Path
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
 from agent_framework import ChatMessage, TextContent, UriContent, Role
-from azure.identity import AzureCliCredential
-
-agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"],
-    api_key=os.environ.get("AOAI_API_KEY")
-).create_agent(
-    instructions="You are good at telling jokes.",
-    name="Joker"
-)
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
+
+
+@functools.cache
+def get_agent():
+    return get_chat_client(api_key=os.environ.get("AOAI_API_KEY")).create_agent(
+        instructions="You are good at telling jokes.",
+        name="Joker"
+    )
 
 DEFAULT_IMAGE = "https://www.fotosanimales.es/wp-content/uploads/2017/12/pinguino.jpg"
 DEFAULT_PROMPT = "Tell me a joke about this image."
@@ -41,7 +43,7 @@ async def main() -> None:
             print(f"Using default image: {DEFAULT_IMAGE}")
 
         message = build_message(image_url)
-        result = await agent.run(message)
+        result = await get_agent().run(message)
         print(f"\nAgent: {result.text}\n")
 
 
@@ -1,27 +1,30 @@
+import functools
 import os
+import sys
+from pathlib import Path
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
 
-agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"],
-    api_key=os.environ.get("AOAI_API_KEY")
-).as_agent(
-    instructions="You are good at telling tales.",
-    name="Joker"
-)
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
+
+
+# Built on first use, so importing this module does not touch Azure or the network.
+@functools.cache
+def get_agent():
+    return get_chat_client(api_key=os.environ.get("AOAI_API_KEY")).as_agent(
+        instructions="You are good at telling tales.",
+        name="Joker"
+    )
 
 
 async def run_basic(prompt: str) -> None:
-    result = await agent.run(prompt)
+    result = await get_agent().run(prompt)
     print(f"\nAgent: {result.text}\n")
 
 
 async def run_streaming(prompt: str) -> None:
     print("\nAgent (streaming): ", end="", flush=True)
-    async for update in agent.run_stream(prompt):
+    async for update in get_agent().run_stream(prompt):
         if update.text:
             print(update.text, end="", flush=True)
     print("\n")
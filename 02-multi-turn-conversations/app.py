@@ -1,35 +1,51 @@
-import os
+import sys
+import argparse
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+import functools
+from pathlib import Path
 
-agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    instructions="You are a helpful conversation coach who keeps context between turns.",
-    name="Conversationalist"
-)
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 
-threads: dict[str, object] = {}
+from gateway import SessionGateway, serve
+from session_manager import DirectoryStateStore, SessionManager
 
+# Threads kept in memory; older conversations are saved to SESSIONS_DIR and reloaded on demand.
+MAX_RESIDENT_THREADS = 20
+SESSIONS_DIR = Path(__file__).parent / "sessions"
+# Service mode (--serve): model calls allowed at once; further turns wait in a queue.
+MAX_CONCURRENT_TURNS = 8
 
-def get_thread(session_id: str):
-    if session_id not in threads:
-        threads[session_id] = agent.get_new_thread()
-        print(f"Created new conversation '{session_id}'.")
-    return threads[session_id]
 
+# Built on first use, so importing this module needs no endpoint or credentials.
+@functools.cache
+def get_agent():
+    return get_chat_client().create_agent(
+        instructions="You are a helpful conversation coach who keeps context between turns.",
+        name="Conversationalist"
+    )
 
-def list_sessions() -> None:
-    if not threads:
+
+@functools.cache
+def get_sessions() -> SessionManager:
+    return SessionManager(get_agent(), DirectoryStateStore(SESSIONS_DIR), max_threads=MAX_RESIDENT_THREADS)
+
+
+async def list_sessions() -> None:
+    sessions = get_sessions()
+    session_ids = await sessions.session_ids()
+    if not session_ids:
         print("No active conversations yet. Start typing to create one.\n")
         return
     print("Active conversations:")
-    for name in threads:
-        print(f"- {name}")
-    print()
+    for name in session_ids:
+        location = "in memory" if sessions.is_resident(name) else "on disk"
+        print(f"- {name} ({location})")
+    stats = sessions.stats
+    print(
+        f"Sessions: {stats.hits} hits, {stats.misses} reloaded, {stats.created} created, "
+        f"{stats.evictions} evicted, {stats.resident_threads}/{MAX_RESIDENT_THREADS} in memory\n"
+    )
 
 
 async def main() -> None:
@@ -37,30 +53,63 @@ async def main() -> None:
     print("Type a conversation name to route messages to that thread.")
     print("Commands: 'list' to show sessions, 'exit' to quit.\n")
 
-    while True:
-        session_id = input("Conversation id [default=general]: ").strip()
-        if not session_id:
-            session_id = "general"
+    agent, sessions = get_agent(), get_sessions()
+    try:
+        while True:
+            session_id = input("Conversation id [default=general]: ").strip()
+            if not session_id:
+                session_id = "general"
 
-        if session_id.lower() in {"exit", "quit"}:
-            print("Goodbye!")
-            break
-        if session_id.lower() == "list":
-            list_sessions()
-            continue
+            if session_id.lower() in {"exit", "quit"}:
+                print("Goodbye!")
+                break
+            if session_id.lower() == "list":
+                await list_sessions()
+                continue
 
-        prompt = input("User message: ").strip()
-        if prompt.lower() in {"exit", "quit"}:
-            print("Goodbye!")
-            break
-        if not prompt:
-            print("Message cannot be empty.\n")
-            continue
+            prompt = input("User message: ").strip()
+            if prompt.lower() in {"exit", "quit"}:
+                print("Goodbye!")
+                break
+            if not prompt:
+                print("Message cannot be empty.\n")
+                continue
+
+            created = sessions.stats.created
+            async with sessions.session(session_id) as thread:
+                if sessions.stats.created > created:
+                    print(f"Created new conversation '{session_id}'.")
+                result = await agent.run(prompt, thread=thread)
+            print(f"\n[{session_id}] {result.text}\n")
+    finally:
+        # Save the threads still in memory so every conversation resumes next time.
+        await sessions.flush()
 
-        thread = get_thread(session_id)
-        result = await agent.run(prompt, thread=thread)
-        print(f"\n[{session_id}] {result.text}\n")
+
+async def serve_main(host: str, port: int, max_concurrency: int) -> None:
+    sessions = get_sessions()
+    gateway = SessionGateway(get_agent(), sessions, max_concurrency=max_concurrency)
+    server = await serve(gateway, host, port)
+    print(f"=== Lab 02: serving conversations on http://{host}:{port} (max {max_concurrency} concurrent turns) ===")
+    print('POST /sessions/<id>/messages with {"message": "..."}; GET /sessions or /stats. Ctrl+C to stop.')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await sessions.flush()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lab 02: multi-turn conversations")
+    parser.add_argument("--serve", action="store_true", help="Serve conversations over HTTP instead of the CLI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENT_TURNS)
+    args = parser.parse_args()
+    if args.serve:
+        try:
+            asyncio.run(serve_main(args.host, args.port, args.max_concurrency))
+        except KeyboardInterrupt:
+            print("Goodbye!")
+    else:
+        asyncio.run(main())
@@ -0,0 +1,235 @@
+"""Serve many conversations concurrently over a small local HTTP endpoint.
+
+The CLI in ``app.py`` handles one prompt at a time, so one slow model call blocks every
+other conversation. :class:`SessionGateway` runs turns as asyncio tasks instead:
+
+- Turns of the same session run one at a time, in arrival order (a FIFO lock per
+  session), because two concurrent runs on one ``AgentThread`` would interleave history.
+- At most ``max_concurrency`` turns call the model at once; the rest wait in a queue.
+  A turn waiting for its own session does not take one of those slots.
+- Queue depth, in-flight turns and latency percentiles are reported by ``stats()``.
+
+:func:`serve` exposes the gateway with the standard library only:
+
+    POST /sessions/<id>/messages   {"message": "..."}  ->  {"session_id", "text", "queued_ms", "latency_ms"}
+    GET  /sessions                 ->  {"sessions": [...]}
+    GET  /stats                    ->  gateway and session manager counters
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any
+from urllib.parse import unquote
+
+from session_manager import SessionManager
+
+# Upper bound for a request body; prompts are short text.
+MAX_BODY_BYTES = 1 << 20
+
+
+@dataclass
+class TurnResult:
+    """Reply to one prompt and where its time went."""
+
+    session_id: str
+    text: str
+    queued_ms: float  # waiting for the session lock and a concurrency slot
+    latency_ms: float  # arrival to reply
+
+
+class LatencyWindow:
+    """Latencies of the most recent turns, for percentile reporting."""
+
+    def __init__(self, size: int = 1000) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def record(self, milliseconds: float) -> None:
+        self._samples.append(milliseconds)
+
+    def percentiles(self) -> dict[str, float]:
+        if not self._samples:
+            return {}
+        ordered = sorted(self._samples)
+        pick = lambda fraction: round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 1)  # noqa: E731
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 1)}
+
+
+class SessionGateway:
+    """Runs agent turns concurrently with per-session ordering and a global limit."""
+
+    def __init__(self, agent: Any, sessions: SessionManager, max_concurrency: int = 8) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.agent = agent
+        self.sessions = sessions
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # Per-session lock and the number of turns holding or waiting for it.
+        self._session_locks: dict[str, tuple[asyncio.Lock, int]] = {}
+        self._waiting = 0  # turns that arrived but have not started
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._latency = LatencyWindow()
+        self._queue_wait = LatencyWindow()
+
+    async def chat(self, session_id: str, prompt: str) -> TurnResult:
+        """Run one turn for ``session_id`` once its earlier turns and a slot allow it."""
+        arrived = time.perf_counter()
+        lock, users = self._session_locks.get(session_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._session_locks[session_id] = (lock, users + 1)
+        self._waiting += 1
+        started = False
+        try:
+            async with lock:
+                async with self._slots:
+                    self._waiting -= 1
+                    started = True
+                    self._in_flight += 1
+                    queued_ms = (time.perf_counter() - arrived) * 1000
+                    try:
+                        async with self.sessions.session(session_id) as thread:
+                            result = await self.agent.run(prompt, thread=thread)
+                    finally:
+                        self._in_flight -= 1
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            if not started:
+                self._waiting -= 1
+            # Drop the lock once nobody holds or waits for it, so idle sessions cost nothing.
+            lock, users = self._session_locks[session_id]
+            if users == 1:
+                del self._session_locks[session_id]
+            else:
+                self._session_locks[session_id] = (lock, users - 1)
+
+        latency_ms = (time.perf_counter() - arrived) * 1000
+        self._completed += 1
+        self._latency.record(latency_ms)
+        self._queue_wait.record(queued_ms)
+        return TurnResult(session_id, result.text, round(queued_ms, 1), round(latency_ms, 1))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._waiting,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "latency_ms": self._latency.percentiles(),
+            "queue_wait_ms": self._queue_wait.percentiles(),
+            "sessions": asdict(self.sessions.stats),
+        }
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+async def serve(gateway: SessionGateway, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+    """Start the HTTP endpoint; the caller keeps the event loop running (``serve_forever``)."""
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    status, payload = 200, await _dispatch(gateway, method, path, body)
+                except HttpError as error:
+                    status, payload = error.status, {"error": str(error)}
+                except Exception as error:  # report model/service failures to the caller
+                    status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as error:
+            _write_response(writer, error.status, {"error": str(error)}, keep_alive=False)
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle_connection, host, port)
+
+
+async def _dispatch(gateway: SessionGateway, method: str, path: str, body: bytes) -> dict[str, Any]:
+    parts = [unquote(part) for part in path.split("?", 1)[0].strip("/").split("/")]
+    if parts == ["stats"]:
+        _require(method, "GET")
+        return gateway.stats()
+    if parts == ["sessions"]:
+        _require(method, "GET")
+        return {"sessions": await gateway.sessions.session_ids()}
+    if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages" and parts[1]:
+        _require(method, "POST")
+        try:
+            prompt = str(json.loads(body or b"{}").get("message", "")).strip()
+        except (ValueError, AttributeError):
+            raise HttpError(400, "body must be a JSON object") from None
+        if not prompt:
+            raise HttpError(400, "message cannot be empty")
+        return asdict(await gateway.chat(parts[1], prompt))
+    raise HttpError(404, f"no route for {path}")
+
+
+def _require(method: str, expected: str) -> None:
+    if method != expected:
+        raise HttpError(405, f"use {expected}")
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes, bool] | None:
+    """Read one HTTP/1.1 request; ``None`` when the client closed the connection."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, path, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "malformed request line") from None
+    headers: dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0") or 0)
+    except ValueError:
+        raise HttpError(400, "invalid Content-Length") from None
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    return method.upper(), path, body, keep_alive
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int, payload: dict[str, Any], keep_alive: bool) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
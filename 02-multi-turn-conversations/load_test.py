@@ -0,0 +1,106 @@
+"""Load-test the session gateway with a fake chat client.
+
+No Azure resources are needed: the shared ``FakeChatClient`` (``shared/fake_chat_client.py``)
+answers every prompt after a fixed delay, standing in for model latency. For each
+concurrency limit the script starts the HTTP gateway on a free local port, sends
+``--turns`` prompts for each of ``--sessions`` conversations (each session's prompts in
+order, all sessions at once), and reports throughput and latency percentiles. With a latency-bound model, throughput should grow
+almost linearly with the limit until it reaches the number of sessions.
+
+Usage:
+    python load_test.py [--sessions 32] [--turns 5] [--latency 0.2] [--concurrency 1,4,16,32]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from agent_framework import ChatAgent, ChatMessage
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.fake_chat_client import FakeChatClient
+
+from gateway import LatencyWindow, SessionGateway, serve
+from session_manager import InMemoryStateStore, SessionManager
+
+
+def report_history(messages: Sequence[ChatMessage]) -> str:
+    """Fake model reply stating how much history it saw."""
+    return f"Seen {len(messages)} messages; last: {messages[-1].text[:40]}"
+
+
+async def _post(host: str, port: int, session_id: str, message: str) -> dict[str, Any]:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        body = json.dumps({"message": message}).encode("utf-8")
+        writer.write(
+            f"POST /sessions/{session_id}/messages HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        response = await reader.read()
+    finally:
+        writer.close()
+    payload = json.loads(response.split(b"\r\n\r\n", 1)[1])
+    if b" 200 " not in status_line:
+        raise RuntimeError(f"{status_line.decode().strip()}: {payload}")
+    return payload
+
+
+async def _run_level(concurrency: int, args: argparse.Namespace) -> None:
+    agent = ChatAgent(chat_client=FakeChatClient(report_history, latency=args.latency), name="LoadTest")
+    sessions = SessionManager(agent, InMemoryStateStore(), max_threads=args.sessions)
+    gateway = SessionGateway(agent, sessions, max_concurrency=concurrency)
+    server = await serve(gateway, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    latencies = LatencyWindow(size=args.sessions * args.turns)
+    max_queue_depth = 0
+
+    async def conversation(index: int) -> None:
+        nonlocal max_queue_depth
+        for turn in range(args.turns):
+            result = await _post("127.0.0.1", port, f"user-{index}", f"turn {turn} from user {index}")
+            latencies.record(result["latency_ms"])
+            # Each reply counts the history the model saw: 2 messages per earlier turn plus this prompt.
+            expected = f"Seen {2 * turn + 1} messages"
+            if not result["text"].startswith(expected):
+                raise RuntimeError(f"user-{index} lost its history: {result['text']!r}")
+            max_queue_depth = max(max_queue_depth, gateway.stats()["queue_depth"])
+
+    async with server:
+        started = time.perf_counter()
+        await asyncio.gather(*(conversation(index) for index in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+    turns = args.sessions * args.turns
+    percentiles = latencies.percentiles()
+    print(
+        f"  {concurrency:>11}  {turns / elapsed:11.1f}  {percentiles['p50']:8.1f}  {percentiles['p95']:8.1f}  "
+        f"{percentiles['p99']:8.1f}  {max_queue_depth:>9}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model latency in seconds")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Comma-separated concurrency limits")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    print(f"sessions={args.sessions}  turns/session={args.turns}  model latency={args.latency * 1000:.0f} ms\n")
+    print("  concurrency  turns/s      p50 ms    p95 ms    p99 ms  max queue")
+    for level in levels:
+        await _run_level(level, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
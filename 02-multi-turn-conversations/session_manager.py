@@ -0,0 +1,252 @@
+"""Bounded, LRU-evicting home for the AgentThreads of many conversations.
+
+A plain ``dict`` of threads grows forever in a long-running service. ``SessionManager``
+keeps at most ``max_threads`` threads (and optionally ``max_bytes`` of serialized
+history) in memory. When a limit is exceeded, the least recently used threads are
+serialized with ``thread.serialize()`` into a :class:`ThreadStateStore` and dropped;
+the next access rehydrates them with ``agent.deserialize_thread``.
+
+Use a session as a context manager so the thread cannot be evicted mid-turn:
+
+    async with manager.session("project-alpha") as thread:
+        result = await agent.run(prompt, thread=thread)
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadStateStore(Protocol):
+    """Where evicted threads are kept until they are needed again."""
+
+    async def save(self, session_id: str, state: dict[str, Any]) -> None: ...
+
+    async def load(self, session_id: str) -> dict[str, Any] | None: ...
+
+    async def delete(self, session_id: str) -> None: ...
+
+    async def session_ids(self) -> list[str]: ...
+
+
+class InMemoryStateStore:
+    """Keeps evicted threads as compact JSON strings in this process."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, str] = {}
+
+    async def save(self, session_id: str, state: dict[str, Any]) -> None:
+        self._states[session_id] = json.dumps(state, separators=(",", ":"))
+
+    async def load(self, session_id: str) -> dict[str, Any] | None:
+        payload = self._states.get(session_id)
+        return json.loads(payload) if payload is not None else None
+
+    async def delete(self, session_id: str) -> None:
+        self._states.pop(session_id, None)
+
+    async def session_ids(self) -> list[str]:
+        return list(self._states)
+
+
+class DirectoryStateStore:
+    """Keeps evicted threads as one JSON file per session in ``directory``."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, session_id: str) -> Path:
+        # Session ids are user input; keep file names safe and unambiguous.
+        safe = re.sub(r"[^A-Za-z0-9_.-]", lambda match: f"%{ord(match.group()):02x}", session_id)
+        return self.directory / f"{safe}.json"
+
+    async def save(self, session_id: str, state: dict[str, Any]) -> None:
+        payload = json.dumps({"session_id": session_id, "thread": state})
+        await asyncio.to_thread(_atomic_write_text, self._path(session_id), payload)
+
+    async def load(self, session_id: str) -> dict[str, Any] | None:
+        path = self._path(session_id)
+        try:
+            payload = await asyncio.to_thread(path.read_text, encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        return json.loads(payload)["thread"]
+
+    async def delete(self, session_id: str) -> None:
+        self._path(session_id).unlink(missing_ok=True)
+
+    async def session_ids(self) -> list[str]:
+        def read_ids() -> list[str]:
+            session_ids = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    session_ids.append(json.loads(path.read_text(encoding="utf-8"))["session_id"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    # One damaged file must not hide every other session.
+                    logger.warning("Skipping unreadable session file %s", path, exc_info=True)
+            return session_ids
+
+        return await asyncio.to_thread(read_ids)
+
+
+@dataclass
+class SessionStats:
+    """Counters exposed by :class:`SessionManager`."""
+
+    hits: int = 0  # thread was in memory
+    misses: int = 0  # thread was rehydrated from the store
+    created: int = 0  # new conversation
+    evictions: int = 0
+    resident_threads: int = 0
+    resident_bytes: int = 0
+
+
+class SessionManager:
+    """Maps session ids to AgentThreads within a memory budget."""
+
+    def __init__(
+        self,
+        agent: Any,
+        store: ThreadStateStore | None = None,
+        max_threads: int = 100,
+        max_bytes: int | None = None,
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            agent: Agent that creates (``get_new_thread``) and rehydrates
+                   (``deserialize_thread``) the threads.
+            store: Where evicted threads go. Defaults to :class:`InMemoryStateStore`.
+            max_threads: Threads kept in memory at most.
+            max_bytes: Optional cap on the serialized size of the threads in memory.
+                       Sizes are measured after each session, which serializes the thread.
+        """
+        if max_threads <= 0:
+            raise ValueError("max_threads must be positive")
+        self.agent = agent
+        self.store = store or InMemoryStateStore()
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.stats = SessionStats()
+        self._threads: OrderedDict[str, Any] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._in_use: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def session(self, session_id: str) -> AsyncIterator[Any]:
+        """Yield the thread for ``session_id``, pinned in memory until the block exits."""
+        thread = await self.get(session_id)
+        self._in_use[session_id] = self._in_use.get(session_id, 0) + 1
+        try:
+            yield thread
+        finally:
+            self._in_use[session_id] -= 1
+            if not self._in_use[session_id]:
+                del self._in_use[session_id]
+            async with self._lock:
+                if self.max_bytes is not None and self._threads.get(session_id) is thread:
+                    self._sizes[session_id] = await _serialized_size(thread)
+                await self._enforce_limits()
+
+    async def get(self, session_id: str) -> Any:
+        """Return the thread for ``session_id``, rehydrating or creating it if needed."""
+        async with self._lock:
+            thread = self._threads.get(session_id)
+            if thread is not None:
+                self._threads.move_to_end(session_id)
+                self.stats.hits += 1
+                return thread
+
+            state = await self.store.load(session_id)
+            if state is not None:
+                thread = await self.agent.deserialize_thread(state)
+                await self.store.delete(session_id)
+                self.stats.misses += 1
+            else:
+                thread = self.agent.get_new_thread()
+                self.stats.created += 1
+            self._threads[session_id] = thread
+            self._sizes[session_id] = await _serialized_size(thread) if self.max_bytes is not None else 0
+            await self._enforce_limits()
+            return thread
+
+    def is_resident(self, session_id: str) -> bool:
+        return session_id in self._threads
+
+    async def session_ids(self) -> list[str]:
+        """Every known session: in memory (most recent first), then evicted ones."""
+        resident = list(reversed(self._threads))
+        stored = [session_id for session_id in await self.store.session_ids() if session_id not in self._threads]
+        return resident + sorted(stored)
+
+    async def evict(self, session_id: str) -> bool:
+        """Move ``session_id`` to the store now. False if it is not in memory or in use."""
+        async with self._lock:
+            if session_id not in self._threads or session_id in self._in_use:
+                return False
+            await self._evict(session_id)
+            return True
+
+    async def flush(self) -> None:
+        """Persist every thread still in memory (e.g. on shutdown)."""
+        async with self._lock:
+            for session_id in list(self._threads):
+                await self._evict(session_id, count=False)
+
+    async def _enforce_limits(self) -> None:
+        # Oldest first; the most recent thread and threads in the middle of a turn are kept.
+        for session_id in list(self._threads)[:-1]:
+            if not self._over_limit():
+                break
+            if session_id not in self._in_use:
+                await self._evict(session_id)
+        self._update_gauges()
+
+    def _over_limit(self) -> bool:
+        if len(self._threads) > self.max_threads:
+            return True
+        return self.max_bytes is not None and sum(self._sizes.values()) > self.max_bytes
+
+    async def _evict(self, session_id: str, count: bool = True) -> None:
+        # Save before dropping: if the save fails, the thread stays in memory.
+        await self.store.save(session_id, await self._threads[session_id].serialize())
+        del self._threads[session_id]
+        self._sizes.pop(session_id, None)
+        if count:
+            self.stats.evictions += 1
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        self.stats.resident_threads = len(self._threads)
+        self.stats.resident_bytes = sum(self._sizes.values())
+
+
+async def _serialized_size(thread: Any) -> int:
+    return len(json.dumps(await thread.serialize(), separators=(",", ":")))
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    """Write ``text`` to ``path`` so readers see either the old or the new content."""
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
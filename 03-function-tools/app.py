@@ -1,17 +1,19 @@
-import os
+import functools
+import sys
+from pathlib import Path
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from function_tools import get_weather
 
-agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    instructions="You are a helpful assistant who calls tools when needed.",
-    tools=[get_weather]
-)
+
+@functools.cache
+def get_agent():
+    return get_chat_client().create_agent(
+        instructions="You are a helpful assistant who calls tools when needed.",
+        tools=[get_weather]
+    )
 
 
 async def main() -> None:
@@ -27,7 +29,7 @@ async def main() -> None:
             print("Question cannot be empty.\n")
             continue
 
-        result = await agent.run(question)
+        result = await get_agent().run(question)
         print(f"\nAgent: {result.text}\n")
 
 
@@ -1,19 +1,21 @@
-import os
+import functools
+import sys
+from pathlib import Path
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from weather_tools import WeatherTools
 
 tools = WeatherTools()
 
-agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    instructions="You are a concise weather assistant. Call the right tool and respond with the tool output only.",
-    tools=[tools.get_weather, tools.get_max_temperature]
-)
+
+@functools.cache
+def get_agent():
+    return get_chat_client().create_agent(
+        instructions="You are a concise weather assistant. Call the right tool and respond with the tool output only.",
+        tools=[tools.get_weather, tools.get_max_temperature]
+    )
 
 
 async def main() -> None:
@@ -29,7 +31,7 @@ async def main() -> None:
             print("Question cannot be empty.\n")
             continue
 
-        result = await agent.run(question)
+        result = await get_agent().run(question)
         print(f"\nAgent: {result.text}\n")
 
 
@@ -1,27 +1,30 @@
-import os
+import functools
+import sys
+from pathlib import Path
 import asyncio
 from agent_framework import ChatAgent, ChatMessage, Role
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from bank_functions import submit_payment, get_account_balance
 
-# Stateful agent wired to Azure OpenAI plus both banking tools
-agent = ChatAgent(
-    chat_client=AzureOpenAIChatClient(
-        credential=AzureCliCredential(),
-        endpoint=os.environ["AOAI_ENDPOINT"],
-        deployment_name=os.environ["AOAI_DEPLOYMENT"]
-    ),
-    name="FinanceAgent",
-    instructions=(
-        "You are an agent from Contoso Bank. You assist users with financial operations "
-        "and provide clear explanations. For transfers only amount, recipient name, and reference are needed."
-    ),
-    tools=[submit_payment, get_account_balance],
-)
+
+# Stateful agent wired to Azure OpenAI plus both banking tools, built on first use
+@functools.cache
+def get_agent() -> ChatAgent:
+    return ChatAgent(
+        chat_client=get_chat_client(),
+        name="FinanceAgent",
+        instructions=(
+            "You are an agent from Contoso Bank. You assist users with financial operations "
+            "and provide clear explanations. For transfers only amount, recipient name, and reference are needed."
+        ),
+        tools=[submit_payment, get_account_balance],
+    )
 
 async def main():
     # Preserve conversation memory across the entire console session
+    agent = get_agent()
     thread = agent.get_new_thread()
     print("=== FinanceAgent - Interactive Session ===")
     print("Type 'exit' or 'quit' to end the conversation\n")
@@ -1,18 +1,16 @@
-import os
+import sys
+from pathlib import Path
 import asyncio
 from agent_framework import AgentRunResponse
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from model import PersonInfo
 
 
 def build_agent():
     """Instantiate a ChatAgent configured for PersonInfo extraction."""
-    return AzureOpenAIChatClient(
-        credential=AzureCliCredential(),
-        endpoint=os.environ["AOAI_ENDPOINT"],
-        deployment_name=os.environ["AOAI_DEPLOYMENT"]
-    ).create_agent(
+    return get_chat_client().create_agent(
         name="HelpfulAssistant",
         instructions=(
             "You are a helpful assistant that extracts person information from free-form descriptions. "
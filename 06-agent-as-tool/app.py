@@ -1,30 +1,30 @@
-import os
+import functools
+import sys
+from pathlib import Path
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from tools import get_weather
 
 # Weather-focused agent that owns the get_weather tool and speaks in neutral English
-weather_agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    name="WeatherAgent",
-    description="An agent that answers questions about the weather.",
-    instructions="You answer questions about the weather.",
-    tools=get_weather,
-)
+@functools.cache
+def get_weather_agent():
+    return get_chat_client().create_agent(
+        name="WeatherAgent",
+        description="An agent that answers questions about the weather.",
+        instructions="You answer questions about the weather.",
+        tools=get_weather,
+    )
+
 
 # Orchestrator agent that invokes WeatherAgent as a tool and answers in French
-main_agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    instructions="You are a helpful assistant who responds in French.",
-    tools=weather_agent.as_tool(),
-)
+@functools.cache
+def get_main_agent():
+    return get_chat_client().create_agent(
+        instructions="You are a helpful assistant who responds in French.",
+        tools=get_weather_agent().as_tool(),
+    )
 
 
 async def compare_agents(location: str) -> None:
@@ -32,11 +32,11 @@ async def compare_agents(location: str) -> None:
 
     question = f"What is the weather like in {location}?"
 
-    direct_response = await weather_agent.run(question)
+    direct_response = await get_weather_agent().run(question)
     print("\n[WeatherAgent direct]")
     print(direct_response.text)
 
-    tool_response = await main_agent.run(question)
+    tool_response = await get_main_agent().run(question)
     print("\n[MainAgent using WeatherAgent as a tool]")
     print(tool_response.text)
 
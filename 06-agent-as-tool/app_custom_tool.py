@@ -1,37 +1,36 @@
-import os
+import functools
+import sys
+from pathlib import Path
 import asyncio
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from tools import get_weather
 
 # Weather-focused agent identical to the default sample
-weather_agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    name="WeatherAgent",
-    description="An agent that answers questions about the weather.",
-    instructions="You answer questions about the weather.",
-    tools=get_weather,
-)
+@functools.cache
+def get_weather_agent():
+    return get_chat_client().create_agent(
+        name="WeatherAgent",
+        description="An agent that answers questions about the weather.",
+        instructions="You answer questions about the weather.",
+        tools=get_weather,
+    )
 
-# Convert agent to tool with custom metadata so the orchestrator exposes richer docs
-weather_tool = weather_agent.as_tool(
-    name="WeatherLookup",
-    description="Look up weather information for any location",
-    arg_name="query",
-    arg_description="The weather query or location",
-)
 
-main_agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"]
-).create_agent(
-    instructions="You are a helpful assistant who responds in French.",
-    tools=weather_tool,
-)
+@functools.cache
+def get_main_agent():
+    # Convert agent to tool with custom metadata so the orchestrator exposes richer docs
+    weather_tool = get_weather_agent().as_tool(
+        name="WeatherLookup",
+        description="Look up weather information for any location",
+        arg_name="query",
+        arg_description="The weather query or location",
+    )
+    return get_chat_client().create_agent(
+        instructions="You are a helpful assistant who responds in French.",
+        tools=weather_tool,
+    )
 
 
 async def compare_agents(location: str) -> None:
@@ -39,11 +38,11 @@ async def compare_agents(location: str) -> None:
 
     question = f"What is the weather like in {location}?"
 
-    direct_response = await weather_agent.run(question)
+    direct_response = await get_weather_agent().run(question)
     print("\n[WeatherAgent direct]")
     print(direct_response.text)
 
-    tool_response = await main_agent.run(question)
+    tool_response = await get_main_agent().run(question)
     print("\n[MainAgent using WeatherLookup tool]")
     print(tool_response.text)
 
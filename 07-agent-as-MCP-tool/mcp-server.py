@@ -5,10 +5,13 @@ server so that any MCP-compatible host (Claude Desktop, the sample client in
 this lab, etc.) can call its tools over stdio.
 """
 
-import os
+import functools
+import sys
+from pathlib import Path
 from typing import Annotated
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 
 def get_specials() -> Annotated[str, "Returns the specials from the menu."]:
     """Return a static menu for demo purposes."""
@@ -25,24 +28,21 @@ def get_item_price(
     return "$9.99"
 
 # Create an agent with tools using the same Azure OpenAI pattern from Lab 06.
-agent = AzureOpenAIChatClient(
-    credential=AzureCliCredential(),
-    endpoint=os.environ["AOAI_ENDPOINT"],
-    deployment_name=os.environ["AOAI_DEPLOYMENT"],
-).create_agent(
-    name="RestaurantAgent",
-    description="Answer questions about the menu.",
-    tools=[get_specials, get_item_price],
-)
-
-# Expose the agent as an MCP server so stdio clients can call those tools.
-server = agent.as_mcp_server()
-
-import anyio
-from mcp.server.stdio import stdio_server
+# Built on first use, so the MCP SDK and the client are only loaded when serving.
+@functools.cache
+def get_agent():
+    return get_chat_client().create_agent(
+        name="RestaurantAgent",
+        description="Answer questions about the menu.",
+        tools=[get_specials, get_item_price],
+    )
 
 async def run():
     """Start the stdio server loop expected by the MCP transport."""
+    from mcp.server.stdio import stdio_server
+
+    # Expose the agent as an MCP server so stdio clients can call those tools.
+    server = get_agent().as_mcp_server()
 
     async def handle_stdin():
         async with stdio_server() as (read_stream, write_stream):
@@ -51,5 +51,7 @@ async def run():
     await handle_stdin()
 
 if __name__ == "__main__":
+    import anyio
+
     # anyio abstracts away the event loop policy on each OS.
     anyio.run(run)
\ No newline at end of file
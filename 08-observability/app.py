@@ -1,29 +1,36 @@
 import asyncio
-import os
-from agent_framework.observability import setup_observability
-from agent_framework import ChatAgent
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter
-
-# Enable Agent Framework telemetry but force console exporter to avoid OTLP retries.
-setup_observability(enable_sensitive_data=True, exporters=[ConsoleSpanExporter()])
-
-
-# Create the agent - telemetry is automatically enabled
-agent = ChatAgent(
-    chat_client=AzureOpenAIChatClient(
-        credential=AzureCliCredential(),
-        endpoint=os.environ["AOAI_ENDPOINT"],
-        deployment_name=os.environ["AOAI_DEPLOYMENT"],
-    ),
-    name="Joker",
-    description="You are good at telling jokes."
-)
+import functools
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
+
+
+def enable_telemetry() -> None:
+    # Imported here: OpenTelemetry is only loaded when the lab actually runs.
+    from agent_framework.observability import setup_observability
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    # Enable Agent Framework telemetry but force console exporter to avoid OTLP retries.
+    setup_observability(enable_sensitive_data=True, exporters=[ConsoleSpanExporter()])
+
+
+# Create the agent on first use - telemetry is automatically enabled
+@functools.cache
+def get_agent():
+    from agent_framework import ChatAgent
+
+    return ChatAgent(
+        chat_client=get_chat_client(),
+        name="Joker",
+        description="You are good at telling jokes."
+    )
 
 # Run the agent
 async def main() -> None:
-    result = await agent.run("Tell me a joke about a pirate.")
+    enable_telemetry()
+    result = await get_agent().run("Tell me a joke about a pirate.")
     print(result.text)
 
 
@@ -1,8 +1,11 @@
 import asyncio
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from azure.identity import AzureCliCredential
-from agent_framework.azure import AzureOpenAIChatClient
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
 from middleware import logging_agent_middleware
 from functions_middleware import get_time, logging_function_middleware
 
@@ -12,14 +15,7 @@ load_dotenv()
 
 async def main():
    
-    credential = AzureCliCredential()
-
-    agent = AzureOpenAIChatClient(
-        credential=credential,
-        endpoint=os.environ["AOAI_ENDPOINT"],
-        deployment_name=os.environ["AOAI_DEPLOYMENT"],
-        api_key=os.environ.get("AOAI_API_KEY")
-    ).as_agent(
+    agent = get_chat_client(api_key=os.environ.get("AOAI_API_KEY")).as_agent(
         name="GreetingAgent",
         instructions=(
             "You are a friendly greeting assistant. Use the get_time tool to include the current date and time in your greeting."
@@ -1,29 +1,53 @@
 import asyncio
-import json
+import functools
 import os
 import re
-import shutil
+import sys
+import time
 from pathlib import Path
 from typing import Optional, Tuple
 
 from agent_framework import ChatAgent
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
 import msvcrt
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
+from autosave import AutosaveEngine
+from console_renderer import ConsoleRenderer
+from message_log import LazyChatMessageStore
+from thread_journal import SaveResult, ThreadJournal
+from thread_manifest import SORT_ORDERS, ThreadManifest
+
+
+# Newest messages sent to the model on each run; older ones stay on disk until needed.
+CONTEXT_WINDOW = 50
+
+
+# Built on first use, so importing this module needs no endpoint or credentials.
+@functools.cache
+def get_agent() -> ChatAgent:
+    return ChatAgent(
+        chat_client=get_chat_client(),
+        name="Assistant",
+        instructions="You are a helpful assistant.",
+        chat_message_store_factory=lambda: LazyChatMessageStore(context_window=CONTEXT_WINDOW),
+    )
 
-agent = ChatAgent(
-    chat_client=AzureOpenAIChatClient(
-        credential=AzureCliCredential(),
-        endpoint=os.environ["AOAI_ENDPOINT"],
-        deployment_name=os.environ["AOAI_DEPLOYMENT"],
-    ),
-    name="Assistant",
-    instructions="You are a helpful assistant.",
-)
 
 PERSIST_DIR = Path(__file__).parent / "persisted_threads"
 PERSIST_DIR.mkdir(exist_ok=True)
+# Named threads are saved in the background once they have been quiet this long.
+AUTOSAVE_DEBOUNCE_SECONDS = 2.0
+AUTOSAVE_MAX_DELAY_SECONDS = 10.0
+# Threads listed per page in the load picker.
+PICKER_PAGE_SIZE = 20
+# Turns reprinted when the screen is redrawn from scratch; older ones are summarized.
+REDRAW_TURNS = 20
+
+manifest = ThreadManifest(PERSIST_DIR / "manifest.sqlite3")
+
+# One journal per slug, so repeated saves only append what changed since the last one.
+_journals: dict[str, ThreadJournal] = {}
 
 
 def _slugify(name: str) -> str:
@@ -32,8 +56,22 @@ def _slugify(name: str) -> str:
     return slug or "conversation"
 
 
-def _thread_path(name: str) -> Path:
-    return PERSIST_DIR / f"{_slugify(name)}.json"
+def _journal(name: str) -> ThreadJournal:
+    slug = _slugify(name)
+    if slug not in _journals:
+        _journals[slug] = ThreadJournal(PERSIST_DIR, slug, manifest=manifest)
+    return _journals[slug]
+
+
+def _rebuild_manifest() -> int:
+    """Index every snapshot in the folder (only needed for threads saved before the manifest)."""
+    entries = []
+    for path in sorted(PERSIST_DIR.glob("*.json")):
+        try:
+            entries.append(ThreadJournal(PERSIST_DIR, path.stem).manifest_entry())
+        except (ValueError, KeyError) as exc:
+            print(f"Skipping unreadable thread '{path.stem}': {exc}")
+    return manifest.replace_all(entries)
 
 
 def open_persist_directory() -> None:
@@ -45,75 +83,83 @@ def open_persist_directory() -> None:
         print(f"Could not open folder automatically ({exc}). Open it manually if needed.\n")
 
 
-def clear_console() -> None:
-    os.system("cls" if os.name == "nt" else "clear")
+async def save_thread(thread, name: str) -> SaveResult:
+    return await _journal(name).save(thread)
 
 
-def render_layout(active_label: str, dirty: bool, conversation_log: list[Tuple[str, str]]) -> None:
-    clear_console()
-    term_width = shutil.get_terminal_size(fallback=(100, 20)).columns
-    width = max(60, min(term_width, 120))
-    title_border = "=" * width
-    menu_border = "-" * width
-    title = "Lab 10: Interactive Persistence"
-
-    print(title_border)
-    print(title.center(width))
-    print(title_border)
+autosave = AutosaveEngine(
+    save_thread,
+    debounce_seconds=AUTOSAVE_DEBOUNCE_SECONDS,
+    max_delay_seconds=AUTOSAVE_MAX_DELAY_SECONDS,
+)
 
-    menu_lines = [
-        "Hotkeys: F2=New  F4=Load  F10=Save  F12=Open folder",
-    ]
-    for line in menu_lines:
-        print(line.center(width))
 
-    print(menu_border)
-    thread_label = active_label if active_label != "unsaved" else "UNNAMED"
-    if dirty:
-        thread_label += " *"
-    print(f"Thread: {thread_label}".center(width))
-    print(menu_border)
-    print()
-
-    if conversation_log:
-        print("Conversation so far:\n")
-        for user_msg, assistant_msg in conversation_log:
-            print(f"USER: {user_msg}")
-            print(f"ASSISTANT: {assistant_msg}\n")
-    else:
-        print("Type a prompt and press Enter to talk to the assistant. Type 'exit' to quit.\n")
+renderer = ConsoleRenderer(
+    title="Lab 10: Interactive Persistence",
+    hotkeys="Hotkeys: F2=New  F4=Load  F10=Save  F12=Open folder",
+    redraw_turns=REDRAW_TURNS,
+)
 
 
-async def save_thread(thread, name: str) -> Path:
-    state = await thread.serialize()
-    path = _thread_path(name)
-    path.write_text(json.dumps(state, indent=2))
-    return path
+def _autosave_status() -> str:
+    status = autosave.metrics.summary()
+    if autosave.last_error is not None:
+        status += f" (last save failed: {autosave.last_error})"
+    return status
 
 
 async def load_thread(name: str):
-    path = _thread_path(name)
-    data = json.loads(path.read_text())
-    return await agent.deserialize_thread(data)
+    return await _journal(name).load(get_agent())
+
+
+def _print_saved_threads(prefix: str, sort: str) -> int:
+    total = manifest.count(prefix)
+    entries = manifest.list(prefix, sort=sort, limit=PICKER_PAGE_SIZE)
+    heading = f"Saved threads ({total}"
+    if prefix:
+        heading += f" starting with '{prefix}'"
+    print(f"{heading}, sorted by {sort}):")
+    for entry in entries:
+        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.modified))
+        print(
+            f"- {entry.slug:<24} {entry.message_count:>5} msgs {entry.size_bytes / 1024:>8.1f} KB"
+            f"  {modified}  {entry.preview}"
+        )
+    if total > len(entries):
+        print(f"  ... {total - len(entries)} more; type /prefix to narrow the list.")
+    return total
 
 
 async def load_existing_thread() -> tuple[Optional[object], Optional[str]]:
-    files = sorted(PERSIST_DIR.glob("*.json"))
-    if not files:
+    if manifest.count() == 0:
         print("No saved threads found yet. Press F10 to persist one.\n")
         return None, None
 
-    print("Saved threads:")
-    for path in files:
-        print(f"- {path.stem}")
+    prefix, sort = "", "recent"
+    while True:
+        _print_saved_threads(prefix, sort)
+        choice = input(
+            f"Name to load, /prefix to filter, :{'|:'.join(SORT_ORDERS)} to sort (blank to cancel): "
+        ).strip()
+        if choice.startswith("/"):
+            prefix = _slugify(choice[1:]) if choice[1:].strip() else ""
+            continue
+        if choice.startswith(":"):
+            if choice[1:] in SORT_ORDERS:
+                sort = choice[1:]
+            else:
+                print(f"Unknown sort order '{choice[1:]}'.")
+            continue
+        break
 
-    choice = input("Enter the saved name to load (or leave blank to cancel): ").strip()
     if not choice:
         print("Load cancelled.\n")
         return None, None
     try:
         thread = await load_thread(choice)
     except FileNotFoundError:
+        # The files may have been deleted by hand; keep the manifest honest.
+        manifest.remove(_slugify(choice))
         print("Thread not found. Make sure you typed the saved name exactly.\n")
         return None, None
     print(f"Loaded thread '{_slugify(choice)}'.\n")
@@ -152,7 +198,7 @@ def _read_input_with_hotkeys(prompt_label: str = "USER> ") -> Tuple[Optional[str
 
 
 async def send_prompt(thread, prompt: str) -> tuple[object, str]:
-    result = await agent.run(prompt, thread=thread)
+    result = await get_agent().run(prompt, thread=thread)
     return thread, result.text
 
 
@@ -168,8 +214,8 @@ async def save_current_thread(thread, active_label: str) -> Tuple[Optional[str],
             return None, True
     else:
         print(f"Overwriting existing thread '{name}'.")
-    path = await save_thread(thread, name)
-    slug = path.stem
+    result = await autosave.save_now(thread, name)
+    slug = result.path.stem
     print(f"Thread saved as '{slug}'.\n")
     return slug, False
 
@@ -181,20 +227,27 @@ async def handle_new_thread(active_thread, active_label: str, dirty: bool):
             saved_name, dirty = await save_current_thread(active_thread, active_label)
             if saved_name:
                 active_label = saved_name
-    active_thread = agent.get_new_thread()
+    active_thread = get_agent().get_new_thread()
     print("Started a fresh thread.\n")
     return active_thread, "unsaved", False
 
 
 async def menu_loop() -> None:
-    active_thread = agent.get_new_thread()
+    if manifest.created:
+        indexed = await asyncio.to_thread(_rebuild_manifest)
+        if indexed:
+            print(f"Indexed {indexed} previously saved threads into the manifest.")
+    active_thread = get_agent().get_new_thread()
     active_label = "unsaved"
     dirty = False
     conversation_log: list[Tuple[str, str]] = []
 
     while True:
-        render_layout(active_label, dirty, conversation_log)
-        prompt, command = _read_input_with_hotkeys()
+        if dirty and active_label != "unsaved":
+            dirty = autosave.is_dirty(active_label)
+        renderer.render(active_label, dirty, conversation_log, _autosave_status())
+        # Read keys in a worker thread so pending autosaves keep running while the user types.
+        prompt, command = await asyncio.to_thread(_read_input_with_hotkeys)
 
         if command == "save":
             saved_name, dirty = await save_current_thread(active_thread, active_label)
@@ -204,14 +257,18 @@ async def menu_loop() -> None:
         if command == "new":
             active_thread, active_label, dirty = await handle_new_thread(active_thread, active_label, dirty)
             conversation_log.clear()
+            renderer.invalidate()
             continue
         if command == "load":
+            # The journal being loaded may still have a save in flight.
+            await autosave.flush()
             loaded_thread, loaded_name = await load_existing_thread()
             if loaded_thread:
                 active_thread = loaded_thread
                 active_label = loaded_name or "unsaved"
                 dirty = False
                 conversation_log.clear()
+                renderer.invalidate()
             continue
         if command == "open_folder":
             open_persist_directory()
@@ -221,13 +278,20 @@ async def menu_loop() -> None:
             print("(Empty prompt) Use the function keys or type a message.\n")
             continue
         if prompt.lower() in {"exit", "quit"}:
-            print("Goodbye!")
             break
 
         active_thread, response_text = await send_prompt(active_thread, prompt)
         conversation_log.append((prompt, response_text))
         print(f"\nASSISTANT> {response_text}\n")
         dirty = True
+        if active_label != "unsaved":
+            # Unnamed threads have nowhere to go yet; F10 names them and later turns autosave.
+            autosave.mark_dirty(active_thread, active_label)
+
+    await autosave.flush()
+    renderer.close()
+    print(f"Autosave: {_autosave_status()}")
+    print("Goodbye!")
 
 
 if __name__ == "__main__":
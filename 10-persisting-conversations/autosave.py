@@ -0,0 +1,169 @@
+"""Debounced background autosave for persisted threads.
+
+Every ``send_prompt`` marks the active thread dirty. Rather than saving after each
+turn, the engine waits until the thread has been quiet for ``debounce_seconds`` (or
+at most ``max_delay_seconds`` after the first unsaved change, so a long burst of turns
+still reaches disk) and folds all pending changes into one save. Saves run one at a
+time; the journal does its encoding and file I/O in a worker thread, so the event loop
+keeps serving the prompt while a save is in flight. ``flush`` writes everything still
+pending and waits for it, which is what the app calls on exit.
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from thread_journal import SaveResult
+
+SaveFunction = Callable[[Any, str], Awaitable[SaveResult]]
+
+
+@dataclass
+class AutosaveMetrics:
+    """Counters for the saves performed by an :class:`AutosaveEngine`."""
+
+    saves: int = 0
+    failures: int = 0
+    # Dirty marks folded into a save that was already scheduled.
+    coalesced: int = 0
+    bytes_written: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    def record(self, latency: float, bytes_written: int) -> None:
+        self.saves += 1
+        self.bytes_written += bytes_written
+        self.latencies.append(latency)
+
+    @property
+    def last_latency(self) -> float | None:
+        return self.latencies[-1] if self.latencies else None
+
+    def summary(self) -> str:
+        """One-line description, e.g. ``3 saves (2 coalesced), last 4.1 ms, median 3.9 ms, ...``."""
+        if not self.latencies:
+            return "no saves yet"
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+        parts = [
+            f"{self.saves} saves ({self.coalesced} coalesced)",
+            f"last {self.last_latency * 1000:.1f} ms",
+            f"median {statistics.median(ordered) * 1000:.1f} ms",
+            f"p95 {p95 * 1000:.1f} ms",
+            f"{self.bytes_written / 1024:.1f} KB written",
+        ]
+        if self.failures:
+            parts.append(f"{self.failures} failed")
+        return ", ".join(parts)
+
+
+@dataclass
+class _Pending:
+    thread: Any
+    first_marked: float
+    last_marked: float
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class AutosaveEngine:
+    """Coalesce thread saves and run them in the background."""
+
+    def __init__(self, save: SaveFunction, debounce_seconds: float = 2.0, max_delay_seconds: float = 10.0) -> None:
+        """Initialize the engine.
+
+        Args:
+            save: Coroutine function persisting ``(thread, name)``, e.g. the app's ``save_thread``.
+            debounce_seconds: Quiet period after the last change before saving.
+            max_delay_seconds: Upper bound on how long a change may stay unsaved.
+        """
+        if debounce_seconds < 0 or max_delay_seconds < debounce_seconds:
+            raise ValueError("debounce_seconds must be >= 0 and <= max_delay_seconds")
+        self._save = save
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.metrics = AutosaveMetrics()
+        self.last_error: Exception | None = None
+        self._pending: dict[str, _Pending] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._save_lock = asyncio.Lock()
+        # Per name: changes marked so far vs. changes covered by a successful save.
+        self._marked: dict[str, int] = {}
+        self._saved: dict[str, int] = {}
+
+    def mark_dirty(self, thread: Any, name: str) -> None:
+        """Record that ``thread`` (persisted as ``name``) has unsaved changes."""
+        now = time.monotonic()
+        self._marked[name] = self._marked.get(name, 0) + 1
+        pending = self._pending.get(name)
+        if pending is not None:
+            pending.thread = thread
+            pending.last_marked = now
+            self.metrics.coalesced += 1
+            return
+        self._pending[name] = _Pending(thread=thread, first_marked=now, last_marked=now)
+        if name not in self._tasks:
+            self._tasks[name] = asyncio.create_task(self._run(name))
+
+    def is_dirty(self, name: str) -> bool:
+        """Whether ``name`` has changes no successful save has covered yet."""
+        return self._marked.get(name, 0) > self._saved.get(name, 0)
+
+    async def save_now(self, thread: Any, name: str) -> SaveResult:
+        """Save immediately (e.g. an explicit F10), dropping any pending save of ``name``.
+
+        Unlike background saves, errors propagate to the caller.
+        """
+        pending = self._pending.pop(name, None)
+        if pending is not None:
+            pending.wake.set()  # let the waiting task exit without saving
+        return await self._perform(thread, name, raise_errors=True)
+
+    async def flush(self) -> None:
+        """Save everything still pending now and wait for in-flight saves."""
+        while self._tasks:
+            for pending in self._pending.values():
+                pending.wake.set()
+            await asyncio.gather(*self._tasks.values())
+
+    async def _run(self, name: str) -> None:
+        try:
+            while (pending := self._pending.get(name)) is not None:
+                deadline = min(
+                    pending.last_marked + self.debounce_seconds,
+                    pending.first_marked + self.max_delay_seconds,
+                )
+                delay = deadline - time.monotonic()
+                if delay <= 0 or pending.wake.is_set():
+                    break
+                try:
+                    await asyncio.wait_for(pending.wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            # Marks arriving while this save runs start a new pending entry and task.
+            pending = self._pending.pop(name, None)
+            if pending is not None:
+                await self._perform(pending.thread, name, raise_errors=False)
+        finally:
+            self._tasks.pop(name, None)
+            if name in self._pending:
+                self._tasks[name] = asyncio.create_task(self._run(name))
+
+    async def _perform(self, thread: Any, name: str, raise_errors: bool) -> SaveResult | None:
+        marked = self._marked.get(name, 0)
+        async with self._save_lock:
+            started = time.perf_counter()
+            try:
+                result = await self._save(thread, name)
+            except Exception as exc:
+                self.metrics.failures += 1
+                self.last_error = exc
+                if raise_errors:
+                    raise
+                return None
+            self.metrics.record(time.perf_counter() - started, result.bytes_written)
+        self.last_error = None
+        self._saved[name] = max(self._saved.get(name, 0), marked)
+        return result
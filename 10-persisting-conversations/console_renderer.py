@@ -0,0 +1,136 @@
+"""Incremental console rendering for the lab 10 UI.
+
+Clearing the screen with ``os.system("cls")`` spawns a shell on every redraw, and
+reprinting the whole conversation after every turn makes each turn cost O(history) in
+terminal output. :class:`ConsoleRenderer` instead pins the banner to the top rows and
+makes the rest of the screen an ANSI scroll region:
+
+- Turns are printed once, as they happen, and scroll up inside the region.
+- When the thread name, dirty flag or autosave status changes, only the banner lines
+  are rewritten in place (cursor save, move, rewrite, restore).
+- A full redraw (new or loaded thread, or a resized terminal) prints just the last
+  ``redraw_turns`` turns, so redrawing a very long session stays cheap.
+
+Consoles without ANSI support fall back to printing the banner whenever it changes.
+"""
+
+import os
+import shutil
+import sys
+from collections.abc import Sequence
+
+ESC = "\x1b"
+# Windows console mode flag that makes conhost interpret ANSI escape sequences.
+_ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+
+
+def enable_ansi() -> bool:
+    """Turn on ANSI escape handling for stdout; False when the console cannot do it."""
+    if not sys.stdout.isatty():
+        return False
+    if os.name != "nt":
+        return True
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        return False
+    return bool(kernel32.SetConsoleMode(handle, mode.value | _ENABLE_VIRTUAL_TERMINAL_PROCESSING))
+
+
+class ConsoleRenderer:
+    """Keeps track of what is on screen and only writes what changed."""
+
+    def __init__(self, title: str, hotkeys: str, redraw_turns: int = 20, ansi: bool | None = None) -> None:
+        self.title = title
+        self.hotkeys = hotkeys
+        self.redraw_turns = redraw_turns
+        self.ansi = enable_ansi() if ansi is None else ansi
+        self._banner: list[str] | None = None
+        self._size: os.terminal_size | None = None
+        self._turns_on_screen = 0
+        self._stale = True
+
+    def invalidate(self) -> None:
+        """Force a full redraw on the next render (e.g. after switching threads)."""
+        self._stale = True
+
+    def render(self, active_label: str, dirty: bool, conversation_log: Sequence[tuple[str, str]], status: str) -> None:
+        """Bring the screen up to date with the current state.
+
+        Turns added since the last render are assumed to be on screen already, since
+        the prompt and the reply were printed as they happened.
+        """
+        size = shutil.get_terminal_size(fallback=(100, 20))
+        banner = self._banner_lines(size.columns, active_label, dirty, status)
+        if self._stale or size != self._size or len(conversation_log) < self._turns_on_screen:
+            self._redraw(size, banner, conversation_log)
+        elif banner != self._banner:
+            self._write_banner(banner)
+        self._turns_on_screen = len(conversation_log)
+
+    def close(self) -> None:
+        """Release the scroll region so the shell gets the whole screen back."""
+        if self.ansi and self._size is not None:
+            sys.stdout.write(f"{ESC}[r{ESC}[{self._size.lines};1H\n")
+            sys.stdout.flush()
+
+    def _banner_lines(self, columns: int, active_label: str, dirty: bool, status: str) -> list[str]:
+        width = max(60, min(columns, 120))
+        thread_label = active_label if active_label != "unsaved" else "UNNAMED"
+        if dirty:
+            thread_label += " *"
+        return [
+            "=" * width,
+            self.title.center(width),
+            "=" * width,
+            self.hotkeys.center(width),
+            "-" * width,
+            f"Thread: {thread_label}".center(width)[:width],
+            f"Autosave: {status}".center(width)[:width],
+            "-" * width,
+        ]
+
+    def _redraw(self, size: os.terminal_size, banner: list[str], conversation_log: Sequence[tuple[str, str]]) -> None:
+        shown = conversation_log[-self.redraw_turns :] if self.redraw_turns > 0 else []
+        hidden = len(conversation_log) - len(shown)
+        body: list[str] = []
+        if conversation_log:
+            if hidden:
+                body.append(f"({hidden} earlier turn{'s' if hidden != 1 else ''} not shown)\n")
+            for user_msg, assistant_msg in shown:
+                body.append(f"USER: {user_msg}")
+                body.append(f"ASSISTANT: {assistant_msg}\n")
+        else:
+            body.append("Type a prompt and press Enter to talk to the assistant. Type 'exit' to quit.\n")
+
+        if not self.ansi:
+            print("\n".join(banner), end="\n\n")
+            print("\n".join(body))
+        else:
+            top = len(banner) + 2
+            # Reset any old region, clear screen and scrollback, then pin the banner above
+            # a scroll region that holds the conversation.
+            output = [f"{ESC}[r{ESC}[2J{ESC}[3J{ESC}[H", "\n".join(banner), f"{ESC}[{top};{size.lines}r{ESC}[{top};1H"]
+            output.append("\n".join(body) + "\n")
+            sys.stdout.write("".join(output))
+            sys.stdout.flush()
+        self._banner = banner
+        self._size = size
+        self._stale = False
+
+    def _write_banner(self, banner: list[str]) -> None:
+        if not self.ansi:
+            print("\n".join(banner), end="\n\n")
+        else:
+            # Save the cursor, rewrite only the lines that changed, restore the cursor.
+            output = [f"{ESC}7"]
+            for row, line in enumerate(banner, start=1):
+                if self._banner is None or row > len(self._banner) or self._banner[row - 1] != line:
+                    output.append(f"{ESC}[{row};1H{ESC}[2K{line}")
+            output.append(f"{ESC}8")
+            sys.stdout.write("".join(output))
+            sys.stdout.flush()
+        self._banner = banner
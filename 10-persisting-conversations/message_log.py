@@ -0,0 +1,214 @@
+"""Offset-indexed message logs and a chat message store that reads them lazily.
+
+A message log is two files:
+
+- ``.log`` — one JSON record (``ChatMessage.to_dict()``) per message, newline-terminated,
+  appended in conversation order.
+- ``.idx`` — one little-endian uint64 per message: the byte offset where its record ends.
+
+Message ``i`` is therefore ``log[idx[i - 1]:idx[i]]``, found without parsing anything
+before it. :class:`MessageLog` memory-maps the log, so opening a multi-megabyte thread
+costs one read of the (small) index; records are decoded only when asked for.
+:class:`LazyChatMessageStore` builds on it: the agent only ever materializes the
+``context_window`` newest messages, and new messages are kept in memory until saved.
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from agent_framework import ChatMessage
+
+_OFFSET_SIZE = 8
+# Decoded messages kept per store, so the tail window is not re-parsed on every turn.
+_DECODED_CACHE_SIZE = 256
+
+
+def encode_record(message: ChatMessage) -> bytes:
+    """Serialize ``message`` as one log record."""
+    return json.dumps(message.to_dict(), ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def read_index(index_path: Path) -> array:
+    """Return the end offsets stored in ``index_path`` (empty if it does not exist)."""
+    offsets = array("Q")
+    try:
+        data = index_path.read_bytes()
+    except FileNotFoundError:
+        return offsets
+    # A torn last entry (crash mid-append) is ignored; the writer truncates it on open.
+    offsets.frombytes(data[: len(data) - len(data) % _OFFSET_SIZE])
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    return offsets
+
+
+def append_records(log_path: Path, index_path: Path, log_size: int, records: Sequence[bytes]) -> int:
+    """Append ``records`` to a log that currently holds ``log_size`` indexed bytes.
+
+    The log is written and fsync'd before the index, so a crash can leave unindexed log
+    bytes (cut off by :func:`repair_log`) but never an index entry without its record.
+
+    Returns:
+        Bytes written to both files.
+    """
+    ends = array("Q")
+    position = log_size
+    for record in records:
+        position += len(record)
+        ends.append(position)
+    if sys.byteorder != "little":
+        ends.byteswap()
+    payload = b"".join(records)
+    with log_path.open("ab") as log:
+        log.write(payload)
+        log.flush()
+        os.fsync(log.fileno())
+    with index_path.open("ab") as index:
+        index.write(ends.tobytes())
+        index.flush()
+        os.fsync(index.fileno())
+    return len(payload) + len(ends) * _OFFSET_SIZE
+
+
+def repair_log(log_path: Path, index_path: Path) -> int:
+    """Cut off whatever a crash left half-written and return the number of messages.
+
+    Index entries pointing past the end of the log are dropped, then log bytes past the
+    last indexed record are truncated, so the next append starts clean.
+    """
+    offsets = read_index(index_path)
+    log_size = log_path.stat().st_size if log_path.exists() else 0
+    count = len(offsets)
+    while count and offsets[count - 1] > log_size:
+        count -= 1
+    if index_path.exists() and index_path.stat().st_size != count * _OFFSET_SIZE:
+        with index_path.open("r+b") as index:
+            index.truncate(count * _OFFSET_SIZE)
+    indexed_size = offsets[count - 1] if count else 0
+    if log_size > indexed_size:
+        with log_path.open("r+b") as log:
+            log.truncate(indexed_size)
+    return count
+
+
+class MessageLog:
+    """Read-only, memory-mapped view of a message log as it was when opened."""
+
+    def __init__(self, log_path: Path, index_path: Path) -> None:
+        self.log_path = log_path
+        self._ends = read_index(index_path)
+        self._map: mmap.mmap | None = None
+        if self._ends and self._ends[-1]:
+            with log_path.open("rb") as log:
+                # Map only the indexed bytes; later appends do not change this view.
+                self._map = mmap.mmap(log.fileno(), self._ends[-1], access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @property
+    def size(self) -> int:
+        """Indexed bytes of the log."""
+        return self._ends[-1] if self._ends else 0
+
+    def raw(self, index: int) -> bytes:
+        """Return record ``index`` without decoding it."""
+        if not 0 <= index < len(self._ends):
+            raise IndexError(index)
+        start = self._ends[index - 1] if index else 0
+        return self._map[start : self._ends[index]]
+
+    def message_dict(self, index: int) -> dict[str, Any]:
+        return json.loads(self.raw(index))
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class LazyChatMessageStore:
+    """ChatMessageStore whose persisted history stays on disk until it is needed.
+
+    Messages loaded from a :class:`MessageLog` are decoded on access; messages added
+    since are held in memory. ``list_messages`` returns the ``context_window`` newest
+    messages (all of them when ``None``), so a long thread resumes without parsing its
+    older history. Serialization follows ``ChatMessageStore``, so threads using this
+    store serialize like any other local thread.
+    """
+
+    def __init__(self, log: MessageLog | None = None, context_window: int | None = None) -> None:
+        self.log = log
+        self.context_window = context_window
+        self._added: list[ChatMessage] = []
+        self._decoded: OrderedDict[int, ChatMessage] = OrderedDict()
+
+    def __len__(self) -> int:
+        return self._log_length + len(self._added)
+
+    @property
+    def _log_length(self) -> int:
+        return len(self.log) if self.log is not None else 0
+
+    def message_at(self, index: int) -> ChatMessage:
+        """Return message ``index`` (0 = oldest), decoding it from the log if needed."""
+        if index >= self._log_length:
+            return self._added[index - self._log_length]
+        message = self._decoded.get(index)
+        if message is None:
+            message = ChatMessage.from_dict(self.log.message_dict(index))
+            self._decoded[index] = message
+            if len(self._decoded) > _DECODED_CACHE_SIZE:
+                self._decoded.popitem(last=False)
+        else:
+            self._decoded.move_to_end(index)
+        return message
+
+    def messages_since(self, start: int) -> list[ChatMessage]:
+        """Return messages ``start`` onward, oldest first."""
+        return [self.message_at(index) for index in range(max(start, 0), len(self))]
+
+    async def add_messages(self, messages: Sequence[ChatMessage]) -> None:
+        self._added.extend(messages)
+
+    async def list_messages(self) -> list[ChatMessage]:
+        """Return the messages handed to the agent: the newest ``context_window`` of them."""
+        if self.context_window is None:
+            return self.messages_since(0)
+        if self.context_window <= 0:
+            return []
+        return self.messages_since(len(self) - self.context_window)
+
+    async def serialize(self, **kwargs: Any) -> dict[str, Any]:
+        """Return ``ChatMessageStore``-compatible state holding every message."""
+        messages = [self.log.message_dict(index) for index in range(self._log_length)]
+        messages.extend(message.to_dict() for message in self._added)
+        return {"type": "chat_message_store_state", "messages": messages}
+
+    @classmethod
+    async def deserialize(cls, serialized_store_state: Any, **kwargs: Any) -> "LazyChatMessageStore":
+        """Return an in-memory store holding the serialized messages."""
+        store = cls()
+        await store.update_from_state(serialized_store_state, **kwargs)
+        return store
+
+    async def update_from_state(self, serialized_store_state: Any, **kwargs: Any) -> None:
+        """Append the serialized messages (protocol helper)."""
+        if serialized_store_state:
+            messages = serialized_store_state.get("messages") or []
+            self._added.extend(
+                message if isinstance(message, ChatMessage) else ChatMessage.from_dict(message)
+                for message in messages
+            )
+
+    def close(self) -> None:
+        """Unmap the log. The store must not be used afterwards."""
+        if self.log is not None:
+            self.log.close()
@@ -0,0 +1,270 @@
+"""Journaled persistence for AgentThread files.
+
+Each thread is stored in the persistence folder as:
+
+- ``<slug>.json`` — the thread state from ``thread.serialize()`` with an empty message
+  list, plus the generation of its message log. Written atomically (temp file, fsync,
+  rename), so a crash never leaves it half-written.
+- ``<slug>.<generation>.log`` / ``.idx`` — the messages as an offset-indexed log (see
+  ``message_log.py``). Every save appends and fsyncs only the messages added since the
+  previous save.
+
+A save therefore costs O(new messages). Loading reads the snapshot and the index, then
+memory-maps the log: the thread gets a :class:`LazyChatMessageStore`, which decodes only
+the messages the agent asks for, so a multi-megabyte thread resumes without parsing its
+older history. When the history cannot be extended in place (another thread saved under
+the slug, or history shrank), the messages go to a new log generation and the snapshot
+switches to it in one atomic rename.
+
+Threads saved by earlier versions (the full history in ``<slug>.json`` plus an optional
+``<slug>.jsonl`` journal of ``{"seq": n, "message": {...}}`` records) still load, eagerly;
+their next save migrates them to the log format.
+
+When given a :class:`~thread_manifest.ThreadManifest`, every save also refreshes the
+thread's row in it, so listings never need to open the thread files.
+
+Encoding and disk I/O run in a worker thread (``asyncio.to_thread``), so saving a long
+conversation never stalls the event loop.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from agent_framework import ChatMessage
+
+from message_log import LazyChatMessageStore, MessageLog, append_records, encode_record, repair_log
+from thread_manifest import ManifestEntry, ThreadManifest, build_entry
+
+# Snapshot key naming the message log generation (absent in the legacy format).
+MESSAGE_LOG_KEY = "message_log"
+
+
+@dataclass
+class SaveResult:
+    """Outcome of one save."""
+
+    path: Path
+    bytes_written: int
+    # True when the whole history was written to a new log generation.
+    rewritten: bool
+
+
+class ThreadJournal:
+    """Snapshot-plus-message-log storage for one persisted thread."""
+
+    def __init__(self, directory: Path, slug: str, manifest: ThreadManifest | None = None) -> None:
+        self.directory = directory
+        self.slug = slug
+        self.manifest = manifest
+        self.snapshot_path = directory / f"{slug}.json"
+        self.legacy_journal_path = directory / f"{slug}.jsonl"
+        self._generation: int | None = None
+        # Messages of the tracked thread already on disk, and the log bytes they take.
+        self._persisted_count = 0
+        self._log_size = 0
+        self._thread_id: int | None = None
+
+    @property
+    def log_path(self) -> Path:
+        return self._generation_path(self._generation or 0, "log")
+
+    @property
+    def index_path(self) -> Path:
+        return self._generation_path(self._generation or 0, "idx")
+
+    async def save(self, thread: Any) -> SaveResult:
+        """Persist ``thread``, appending only messages added since the last save or load."""
+        store = thread.message_store
+        count = await _message_count(store) if store is not None else None
+        if (
+            count is None
+            or self._generation is None
+            or id(thread) != self._thread_id
+            or count < self._persisted_count
+            or not self.snapshot_path.exists()
+        ):
+            # Different or service-managed thread, or history was rewritten: start over.
+            return await self.rewrite(thread)
+
+        new_messages = await _messages_since(store, self._persisted_count)
+        bytes_written = 0
+        if new_messages:
+            records = [encode_record(message) for message in new_messages]
+            bytes_written = await asyncio.to_thread(
+                append_records, self.log_path, self.index_path, self._log_size, records
+            )
+            self._persisted_count += len(records)
+            self._log_size += sum(len(record) for record in records)
+        await self._update_manifest(count, new_messages[-1] if new_messages else None, store)
+        return SaveResult(self.snapshot_path, bytes_written, rewritten=False)
+
+    async def rewrite(self, thread: Any) -> SaveResult:
+        """Write ``thread``'s whole history to a new log generation and switch the snapshot to it."""
+        state = await thread.serialize()
+        store_state = state.get("chat_message_store_state")
+        messages: list[dict[str, Any]] = []
+        if store_state is not None:
+            messages, store_state["messages"] = store_state.get("messages") or [], []
+        generation = (self._generation or self._disk_generation()) + 1
+        state[MESSAGE_LOG_KEY] = {"generation": generation}
+        bytes_written, log_size = await asyncio.to_thread(self._write_generation, state, messages, generation)
+        self._generation = generation
+        self._persisted_count = len(messages)
+        self._log_size = log_size
+        self._thread_id = id(thread)
+        last = ChatMessage.from_dict(messages[-1]) if messages else None
+        await self._update_manifest(len(messages), last, None)
+        return SaveResult(self.snapshot_path, bytes_written, rewritten=True)
+
+    async def load(self, agent: Any) -> Any:
+        """Rebuild the thread; log-format threads get a lazily decoded message store.
+
+        Raises:
+            FileNotFoundError: If no snapshot exists for the slug.
+        """
+        state, log = await asyncio.to_thread(self._open)
+        thread = await agent.deserialize_thread(state)
+        if log is not None:
+            # Keep the agent's window setting if its store factory provides one.
+            context_window = getattr(thread.message_store, "context_window", None)
+            thread.message_store = LazyChatMessageStore(log, context_window=context_window)
+        self._persisted_count = await _message_count(thread.message_store) if thread.message_store else 0
+        self._thread_id = id(thread)
+        return thread
+
+    def manifest_entry(self) -> ManifestEntry:
+        """Describe the thread on disk by reading its files (used to rebuild a manifest).
+
+        Raises:
+            FileNotFoundError: If no snapshot exists for the slug.
+        """
+        state, log = self._open()
+        if log is None:
+            messages = (state.get("chat_message_store_state") or {}).get("messages") or []
+            last = ChatMessage.from_dict(messages[-1]) if messages else None
+            return build_entry(self.slug, (self.snapshot_path, self.legacy_journal_path), len(messages), last)
+        try:
+            last = ChatMessage.from_dict(log.message_dict(len(log) - 1)) if len(log) else None
+            return build_entry(self.slug, self._files(), len(log), last)
+        finally:
+            log.close()
+
+    def _open(self) -> tuple[dict[str, Any], MessageLog | None]:
+        """Read the snapshot and open its message log (``None`` for the legacy format)."""
+        state = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        log_info = state.pop(MESSAGE_LOG_KEY, None)
+        if log_info is None:
+            store_state = state.get("chat_message_store_state")
+            if store_state is not None:
+                _replay_journal(self.legacy_journal_path, store_state.setdefault("messages", []))
+            self._generation = None  # the next save migrates to the log format
+            return state, None
+
+        self._generation = int(log_info["generation"])
+        repair_log(self.log_path, self.index_path)
+        log = MessageLog(self.log_path, self.index_path)
+        self._log_size = log.size
+        return state, log
+
+    def _write_generation(
+        self, state: dict[str, Any], messages: list[dict[str, Any]], generation: int
+    ) -> tuple[int, int]:
+        log_path = self._generation_path(generation, "log")
+        index_path = self._generation_path(generation, "idx")
+        for path in (log_path, index_path):
+            path.unlink(missing_ok=True)  # leftovers of a rewrite that crashed before its rename
+            path.touch()
+        records = [json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n" for message in messages]
+        written = append_records(log_path, index_path, 0, records) if records else 0
+        # The rename is the commit point: until then the previous generation stays current.
+        written += _atomic_write_text(self.snapshot_path, json.dumps(state, indent=2))
+        for path in self.directory.glob(f"{self.slug}.*.*"):
+            if path.suffix in {".log", ".idx"} and path not in (log_path, index_path):
+                _remove_quietly(path)
+        _remove_quietly(self.legacy_journal_path)
+        return written, sum(len(record) for record in records)
+
+    def _disk_generation(self) -> int:
+        """Generation referenced by the snapshot on disk, so a rewrite never reuses its files."""
+        try:
+            state = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return 0
+        return int((state.get(MESSAGE_LOG_KEY) or {}).get("generation", 0))
+
+    def _generation_path(self, generation: int, suffix: str) -> Path:
+        return self.directory / f"{self.slug}.{generation}.{suffix}"
+
+    def _files(self) -> tuple[Path, ...]:
+        return (self.snapshot_path, self.log_path, self.index_path)
+
+    async def _update_manifest(self, message_count: int, last_message: ChatMessage | None, store: Any) -> None:
+        if self.manifest is None:
+            return
+        if last_message is None and store is not None and message_count:
+            last_message = (await _messages_since(store, message_count - 1))[-1]
+        await asyncio.to_thread(self._record_manifest_entry, message_count, last_message)
+
+    def _record_manifest_entry(self, message_count: int, last_message: ChatMessage | None) -> None:
+        self.manifest.upsert(build_entry(self.slug, self._files(), message_count, last_message))
+
+
+async def _message_count(store: Any) -> int:
+    if isinstance(store, LazyChatMessageStore):
+        return len(store)
+    return len(await store.list_messages())
+
+
+async def _messages_since(store: Any, start: int) -> list[ChatMessage]:
+    if isinstance(store, LazyChatMessageStore):
+        return store.messages_since(start)
+    return list(await store.list_messages())[start:]
+
+
+def _replay_journal(path: Path, messages: list[dict[str, Any]]) -> int:
+    """Append legacy journal records that extend ``messages``; return how many were read."""
+    if not path.exists():
+        return 0
+    records = 0
+    with path.open("rb") as journal:
+        for line in journal:
+            if not line.endswith(b"\n"):
+                break  # torn last line
+            record = json.loads(line)
+            records += 1
+            seq = record["seq"]
+            if seq < len(messages):
+                continue  # already folded into the snapshot
+            if seq > len(messages):
+                raise ValueError(f"{path.name} is missing records before seq {seq}")
+            messages.append(record["message"])
+    return records
+
+
+def _remove_quietly(path: Path) -> None:
+    # Windows refuses to delete a log another store still has mapped; it is unreferenced now.
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _atomic_write_text(path: Path, text: str) -> int:
+    """Write ``text`` to ``path`` so readers see either the old or the new content."""
+    payload = text.encode("utf-8")
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_name, path)
+        return len(payload)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,167 @@
+"""Index of the threads in the persistence folder.
+
+Listing saved threads with anything more than their file names would mean opening and
+parsing every snapshot, which gets slow once the folder holds thousands of
+conversations. The manifest is a small SQLite database next to the thread files with
+one row per slug (message count, size on disk, last save time and a preview of the
+newest message). ThreadJournal updates the row on every save, so the picker reads a
+single indexed query and never touches the thread files.
+"""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from agent_framework import ChatMessage
+
+PREVIEW_CHARS = 80
+
+# Picker sort orders; "name" and "recent" are served by an index.
+SORT_ORDERS = {
+    "recent": "modified DESC",
+    "name": "slug",
+    "size": "size_bytes DESC",
+    "messages": "message_count DESC",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    slug TEXT PRIMARY KEY,
+    message_count INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    modified REAL NOT NULL,
+    preview TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_by_modified ON threads (modified);
+"""
+
+
+@dataclass
+class ManifestEntry:
+    """One saved thread as listed by the picker."""
+
+    slug: str
+    message_count: int
+    size_bytes: int
+    modified: float
+    preview: str
+
+
+def preview_text(message: ChatMessage | None) -> str:
+    """Single-line, truncated text of ``message`` for listings."""
+    if message is None:
+        return ""
+    text = " ".join((message.text or "").split())
+    role = getattr(message.role, "value", message.role)
+    if len(text) > PREVIEW_CHARS:
+        text = text[: PREVIEW_CHARS - 3] + "..."
+    return f"{role}: {text}"
+
+
+class ThreadManifest:
+    """SQLite-backed index of persisted threads.
+
+    Safe to call from the worker threads the journal does its I/O on; calls are
+    serialized on one connection.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # True when the database did not exist yet, i.e. older thread files are not indexed.
+        self.created = not path.exists()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def upsert(self, entry: ManifestEntry) -> None:
+        """Insert or replace the row for ``entry.slug``."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO threads (slug, message_count, size_bytes, modified, preview) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (entry.slug, entry.message_count, entry.size_bytes, entry.modified, entry.preview),
+            )
+
+    def replace_all(self, entries: Iterable[ManifestEntry]) -> int:
+        """Rebuild the manifest from ``entries`` in one transaction; return the row count."""
+        rows = [(e.slug, e.message_count, e.size_bytes, e.modified, e.preview) for e in entries]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute("DELETE FROM threads")
+                self._connection.executemany("INSERT INTO threads VALUES (?, ?, ?, ?, ?)", rows)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def remove(self, slug: str) -> None:
+        """Drop ``slug`` (e.g. after its files were deleted by hand)."""
+        with self._lock:
+            self._connection.execute("DELETE FROM threads WHERE slug = ?", (slug,))
+
+    def get(self, slug: str) -> ManifestEntry | None:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM threads WHERE slug = ?", (slug,)).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def count(self, prefix: str = "") -> int:
+        """Number of threads whose slug starts with ``prefix``."""
+        where, params = _prefix_filter(prefix)
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM threads {where}", params).fetchone()[0]
+
+    def list(self, prefix: str = "", sort: str = "recent", limit: int = 20, offset: int = 0) -> list[ManifestEntry]:
+        """Return a page of threads whose slug starts with ``prefix``.
+
+        Args:
+            prefix: Slug prefix to filter by (answered from the primary-key index).
+            sort: One of :data:`SORT_ORDERS`.
+            limit: Page size.
+            offset: Rows to skip.
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"sort must be one of {sorted(SORT_ORDERS)}")
+        where, params = _prefix_filter(prefix)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM threads {where} ORDER BY {SORT_ORDERS[sort]} LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [ManifestEntry(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def build_entry(slug: str, files: Iterable[Path], message_count: int, last_message: ChatMessage | None) -> ManifestEntry:
+    """Describe a thread whose data lives in ``files`` (missing files count as empty)."""
+    size = 0
+    modified = 0.0
+    for path in files:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        size += stat.st_size
+        modified = max(modified, stat.st_mtime)
+    return ManifestEntry(
+        slug=slug,
+        message_count=message_count,
+        size_bytes=size,
+        modified=modified or time.time(),
+        preview=preview_text(last_message),
+    )
+
+
+def _prefix_filter(prefix: str) -> tuple[str, tuple[str, ...]]:
+    if not prefix:
+        return "", ()
+    # A range on the primary key instead of LIKE, which SQLite cannot serve from the index.
+    return "WHERE slug >= ? AND slug < ?", (prefix, prefix + "\U0010ffff")
@@ -1,14 +1,43 @@
 import asyncio
 import os
+import sys
+from datetime import datetime
+from pathlib import Path
 from textwrap import dedent
 from typing import cast
 
 from agent_framework import ChatAgent, ChatMessage
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import AzureCliCredential
 from redis.exceptions import ConnectionError as RedisConnectionError
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import get_chat_client
+from message_cache import MessageCache
 from redis_chat_message_store import RedisChatMessageStore
+from redis_stream_message_store import RedisStreamChatMessageStore
+from sqlite_chat_message_store import SqliteChatMessageStore
+from thread_archive import SegmentArchive
+from thread_catalog import ThreadSummary
+
+# Newest messages replayed into the model prompt on each run (the list keeps up to 200).
+CONTEXT_WINDOW = 50
+# Approximate prompt budget for replayed history, using token counts recorded at write time.
+CONTEXT_TOKEN_BUDGET = 8_000
+# Newest messages printed by the "peek at history" menu option.
+HISTORY_PREVIEW_LIMIT = 20
+# Threads listed by the "load a saved thread" picker, most recently active first.
+THREAD_PICKER_PAGE_SIZE = 20
+# Characters of each thread's newest message shown under it in the picker.
+THREAD_PREVIEW_CHARS = 60
+# Cold-tier segment files written by archive_idle_threads.py (see README).
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archived_threads")
+# History backends selectable with REDIS_STORE_BACKEND: Redis Lists (default), Redis Streams,
+# or a local SQLite file for single-node setups without Redis.
+STORE_BACKENDS = ("list", "stream", "sqlite")
+# Database used by the sqlite backend unless SQLITE_PATH is set.
+SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lab11_threads.sqlite3")
+
+ThreadStore = RedisChatMessageStore | RedisStreamChatMessageStore | SqliteChatMessageStore
+
 
 def _message_text(msg: ChatMessage) -> str:
     """Render a ChatMessage's textual content for CLI display."""
@@ -35,23 +64,52 @@ def _message_text(msg: ChatMessage) -> str:
     return "<non-text content>"
 
 
-def build_agent(redis_url: str) -> ChatAgent:
-    """Create the agent configured to hydrate threads with Redis-backed history."""
-
-    def store_factory() -> RedisChatMessageStore:
-        # Each new thread receives its own Redis-backed message store instance.
+def build_agent(
+    redis_url: str | None, backend: str = "list", cluster: bool = False, sqlite_path: str = SQLITE_PATH
+) -> ChatAgent:
+    """Create the agent configured to hydrate threads with externally stored history.
+
+    ``backend`` selects the store: ``"list"`` (RedisChatMessageStore), ``"stream"``
+    (RedisStreamChatMessageStore, which adds stable ids and live tailing) or ``"sqlite"``
+    (SqliteChatMessageStore in ``sqlite_path``; ``redis_url`` is not needed). ``cluster``
+    targets a Redis Cluster with hash-tagged keys (list backend only).
+    """
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown store backend '{backend}'. Expected one of {STORE_BACKENDS}.")
+    if cluster and backend != "list":
+        raise ValueError("Cluster mode is only supported by the list backend.")
+
+    # One process-wide cache so every thread's store reuses already-deserialized messages.
+    message_cache = MessageCache(max_threads=1024, max_messages=50_000)
+    # Threads moved to disk by archive_idle_threads.py are rehydrated from here on demand.
+    archive = SegmentArchive(ARCHIVE_DIR)
+
+    def store_factory() -> ThreadStore:
+        # Each new thread receives its own message store instance; all of them share one
+        # pooled Redis client per URL (or one SQLite connection per file).
+        if backend == "sqlite":
+            return SqliteChatMessageStore(sqlite_path, max_messages=200, context_window=CONTEXT_WINDOW)
+        if backend == "stream":
+            # Separate prefix: list and stream keys for the same thread id cannot coexist.
+            return RedisStreamChatMessageStore(
+                redis_url=redis_url,
+                key_prefix="lab11-stream",
+                max_messages=200,
+                context_window=CONTEXT_WINDOW,
+            )
         return RedisChatMessageStore(
             redis_url=redis_url,
             key_prefix="lab11",
             max_messages=200,
+            context_window=CONTEXT_WINDOW,
+            context_token_budget=CONTEXT_TOKEN_BUDGET,
+            message_cache=message_cache,
+            archive=archive,
+            cluster=cluster,
         )
 
     return ChatAgent(
-        chat_client=AzureOpenAIChatClient(
-            credential=AzureCliCredential(),
-            endpoint=os.environ["AOAI_ENDPOINT"],
-            deployment_name=os.environ["AOAI_DEPLOYMENT"],
-        ),
+        chat_client=get_chat_client(),
         name="TravelPlanner",
         instructions=(
             "You are a concise travel assistant. Always remember prior user facts already stored in "
@@ -62,14 +120,21 @@ def build_agent(redis_url: str) -> ChatAgent:
 
 
 def create_thread(agent: ChatAgent) -> tuple:
-    """Build a new thread and return it plus its Redis store."""
+    """Build a new thread and return it plus its message store."""
     thread = agent.get_new_thread()
     store = thread.message_store
-    if not isinstance(store, RedisChatMessageStore):
+    if not isinstance(store, ThreadStore):
         raise RuntimeError(
-            "Thread is not using the RedisChatMessageStore. Ensure build_agent sets chat_message_store_factory."
+            "Thread is not using an external message store. Ensure build_agent sets chat_message_store_factory."
         )
-    return thread, cast(RedisChatMessageStore, store)
+    return thread, cast(ThreadStore, store)
+
+
+def store_label(store: ThreadStore) -> str:
+    """Where ``store`` keeps its thread: the Redis key, or the SQLite file and thread id."""
+    if isinstance(store, SqliteChatMessageStore):
+        return f"{os.path.basename(store.database_path)}#{store.thread_id}"
+    return store.redis_key
 
 
 def print_menu(thread_key: str) -> None:
@@ -91,57 +156,64 @@ def print_menu(thread_key: str) -> None:
     )
 
 
-async def show_history(store: RedisChatMessageStore) -> None:
-    messages = await store.list_messages()
+async def show_history(store: ThreadStore, limit: int | None = HISTORY_PREVIEW_LIMIT) -> None:
+    if limit is None:
+        messages = await store.get_messages()
+    else:
+        messages = await store.list_recent_messages(limit)
     if not messages:
         print("\nRedis list is empty for this thread. Send a message first!\n")
         return
 
-    print("\nRedis has the following messages (oldest → newest):")
+    if limit is None:
+        print("\nRedis has the following messages (oldest → newest):")
+    else:
+        print(f"\nLatest {len(messages)} Redis messages (oldest → newest, limit {limit}):")
     for msg in messages:
         role = msg.role.value if hasattr(msg.role, "value") else msg.role
         print(f"- {role.upper()}: {_message_text(msg)}")
     print()
 
 
-def _thread_id_from_key(full_key: str, prefix: str) -> str:
-    if full_key.startswith(f"{prefix}:"):
-        return full_key[len(prefix) + 1 :]
-    return full_key
-
-
-async def _list_saved_thread_keys(store: RedisChatMessageStore) -> list[str]:
-    pattern = f"{store.key_prefix}:*"
+async def _list_saved_threads(store: ThreadStore) -> list[ThreadSummary]:
     try:
-        keys = await store._redis_client.keys(pattern)  # type: ignore[attr-defined]
+        return await store.thread_catalog().list_recent(limit=THREAD_PICKER_PAGE_SIZE)
     except RedisConnectionError as exc:
         print(
-            "\nUnable to reach Redis to list keys. Verify your REDIS_URL (TLS/port 6380) and network connectivity."
+            "\nUnable to reach Redis to list threads. Verify your REDIS_URL (TLS/port 6380) and network connectivity."
         )
         print(f"Details: {exc}\n")
         return []
 
-    keys.sort()
-    return keys
-
 
 async def load_existing_thread(
     agent: ChatAgent,
     current_thread,
-    current_store: RedisChatMessageStore,
+    current_store: ThreadStore,
 ) -> tuple:
-    keys = await _list_saved_thread_keys(current_store)
-    if not keys:
-        print("\nThere are no persisted threads yet. Start a conversation first.\n")
+    threads = await _list_saved_threads(current_store)
+    if not threads:
+        print("\nThere are no persisted threads yet. Start a conversation first.")
+        print("(Threads saved before the catalog existed appear after running backfill_thread_catalog.py.)\n")
         return current_thread, current_store
 
-    print("\nAvailable Redis threads:")
-    for idx, key in enumerate(keys, start=1):
-        try:
-            count = await current_store._redis_client.llen(key)  # type: ignore[attr-defined]
-        except RedisConnectionError:
-            count = "?"
-        print(f"[{idx}] {key} ({count} messages)")
+    # Newest message of every listed thread, fetched in one pipelined batch (list backend only).
+    last_messages: dict[str, ChatMessage | None] = {}
+    if isinstance(current_store, RedisChatMessageStore):
+        previews = await current_store.bulk_reader().fetch_previews([summary.thread_id for summary in threads])
+        last_messages = {preview.thread_id: preview.last_message for preview in previews}
+
+    print(f"\nMost recent Redis threads (up to {THREAD_PICKER_PAGE_SIZE}):")
+    for idx, summary in enumerate(threads, start=1):
+        count = summary.message_count if summary.message_count is not None else "?"
+        last_active = datetime.fromtimestamp(summary.last_activity).strftime("%Y-%m-%d %H:%M")
+        location = summary.thread_id
+        if not isinstance(current_store, SqliteChatMessageStore):
+            location = f"{current_store.key_prefix}:{summary.thread_id}"
+        print(f"[{idx}] {location} ({count} messages, last active {last_active})")
+        last_message = last_messages.get(summary.thread_id)
+        if last_message is not None:
+            print(f"      └ {_message_text(last_message)[:THREAD_PREVIEW_CHARS]}")
 
     selection = input("\nEnter the number to load (or press Enter to cancel): ").strip()
     if not selection:
@@ -152,37 +224,65 @@ async def load_existing_thread(
         return current_thread, current_store
 
     index = int(selection)
-    if index < 1 or index > len(keys):
+    if index < 1 or index > len(threads):
         print("That index does not exist.\n")
         return current_thread, current_store
 
-    selected_key = keys[index - 1]
-    thread_id = _thread_id_from_key(selected_key, current_store.key_prefix)
-    new_store = RedisChatMessageStore(
-        redis_url=current_store.redis_url,
-        thread_id=thread_id,
-        key_prefix=current_store.key_prefix,
-        max_messages=current_store.max_messages,
-    )
+    new_store = _open_thread_store(current_store, threads[index - 1].thread_id)
 
     new_thread = agent.get_new_thread()
     placeholder_store = new_thread.message_store
-    if isinstance(placeholder_store, RedisChatMessageStore):
+    if isinstance(placeholder_store, ThreadStore):
         await placeholder_store.aclose()
     new_thread.message_store = new_store
 
     await current_store.aclose()
 
-    print(f"\nLoaded thread: {selected_key}")
+    print(f"\nLoaded thread: {store_label(new_store)}")
     await show_history(new_store)
     return new_thread, new_store
 
 
+def _open_thread_store(current_store: ThreadStore, thread_id: str) -> ThreadStore:
+    """Open ``thread_id`` with the same backend and settings as ``current_store``."""
+    if isinstance(current_store, SqliteChatMessageStore):
+        return SqliteChatMessageStore(
+            current_store.database_path,
+            thread_id=thread_id,
+            max_messages=current_store.max_messages,
+            context_window=current_store.context_window,
+            codec=current_store.codec,
+        )
+    if isinstance(current_store, RedisStreamChatMessageStore):
+        return RedisStreamChatMessageStore(
+            redis_url=current_store.redis_url,
+            thread_id=thread_id,
+            key_prefix=current_store.key_prefix,
+            max_messages=current_store.max_messages,
+            context_window=current_store.context_window,
+            codec=current_store.codec,
+        )
+    return RedisChatMessageStore(
+        redis_url=current_store.redis_url,
+        thread_id=thread_id,
+        key_prefix=current_store.key_prefix,
+        max_messages=current_store.max_messages,
+        context_window=current_store.context_window,
+        max_tokens=current_store.max_tokens,
+        context_token_budget=current_store.context_token_budget,
+        token_counter=current_store.token_counter,
+        message_cache=current_store.message_cache,
+        archive=current_store.archive,
+        codec=current_store.codec,
+        cluster=current_store.cluster,
+    )
+
+
 async def interactive_demo(agent: ChatAgent) -> None:
     thread, store = create_thread(agent)
 
     while True:
-        print_menu(store.redis_key)
+        print_menu(store_label(store))
         choice = input("Choose an option: ").strip()
 
         if choice == "1":
@@ -190,8 +290,18 @@ async def interactive_demo(agent: ChatAgent) -> None:
             if not prompt:
                 print("Please enter a non-empty prompt.\n")
                 continue
-            result = await agent.run(prompt, thread=thread)
-            print(f"\nAssistant replied: {result.text}\n")
+            # Hold the thread's lease so another worker on the same thread cannot interleave turns.
+            async with store.thread_lock():
+                prompt_message = ChatMessage(role="user", text=prompt)
+                updates = agent.run_stream(prompt_message, thread=thread)
+                if isinstance(store, RedisChatMessageStore):
+                    # Chunks reach Redis (and watch_replies.py) as they are generated.
+                    updates = store.stream_turn(updates, [prompt_message])
+                print("\nAssistant replied: ", end="", flush=True)
+                async for update in updates:
+                    if update.text:
+                        print(update.text, end="", flush=True)
+            print("\n")
             continue
 
         if choice == "2":
@@ -221,13 +331,19 @@ async def interactive_demo(agent: ChatAgent) -> None:
 
 
 async def main() -> None:
+    backend = os.environ.get("REDIS_STORE_BACKEND", "list")
     redis_url = os.environ.get("REDIS_URL")
-    if not redis_url:
+    if not redis_url and backend != "sqlite":
         raise RuntimeError(
             "Set the REDIS_URL environment variable (e.g., redis://:<primary_key>@<host>:6380/0)."
         )
 
-    agent = build_agent(redis_url)
+    agent = build_agent(
+        redis_url,
+        backend=backend,
+        cluster=os.environ.get("REDIS_CLUSTER", "").lower() in {"1", "true", "yes"},
+        sqlite_path=os.environ.get("SQLITE_PATH", SQLITE_PATH),
+    )
     print("\nWelcome to Lab 11! We'll persist agent memory in Azure Cache for Redis.\n")
     await interactive_demo(agent)
 
@@ -0,0 +1,64 @@
+"""Move idle Redis threads to the cold-tier segment archive.
+
+Threads whose last activity (from the thread catalog) is older than --idle-hours are
+written to compressed segment files under --archive-dir and replaced in Redis by a
+small stub. RedisChatMessageStore instances configured with the same archive
+directory rehydrate them transparently on the next read or append.
+
+Usage:
+    python archive_idle_threads.py [--prefix lab11] [--idle-hours 72] [--rate 5] [--archive-dir archived_threads] [--watch 300] [--cluster]
+"""
+
+import argparse
+import asyncio
+import os
+
+from redis_chat_message_store import RedisChatMessageStore
+from thread_archive import ArchiveSweeper, SegmentArchive
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", default="lab11", help="key prefix used by the store")
+    parser.add_argument("--idle-hours", type=float, default=72.0, help="archive threads idle longer than this")
+    parser.add_argument("--rate", type=float, default=5.0, help="maximum threads archived per second")
+    parser.add_argument("--archive-dir", default="archived_threads", help="folder holding the segment files")
+    parser.add_argument(
+        "--watch", type=float, metavar="SECONDS", help="keep running, sweeping again after this many seconds"
+    )
+    parser.add_argument("--cluster", action="store_true", help="REDIS_URL points at a Redis Cluster")
+    args = parser.parse_args()
+
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        raise RuntimeError(
+            "Set the REDIS_URL environment variable (e.g., redis://:<primary_key>@<host>:6380/0)."
+        )
+
+    archive = SegmentArchive(args.archive_dir)
+    catalog_store = RedisChatMessageStore(redis_url=redis_url, key_prefix=args.prefix, cluster=args.cluster)
+
+    def store_factory(thread_id: str) -> RedisChatMessageStore:
+        return RedisChatMessageStore(
+            redis_url=redis_url, thread_id=thread_id, key_prefix=args.prefix, archive=archive, cluster=args.cluster
+        )
+
+    sweeper = ArchiveSweeper(
+        catalog_store.thread_catalog(),
+        store_factory,
+        idle_seconds=args.idle_hours * 3600,
+        max_archives_per_second=args.rate,
+    )
+    try:
+        if args.watch:
+            print(f"Sweeping every {args.watch:g}s (Ctrl+C to stop)...")
+            await sweeper.run(interval_seconds=args.watch)
+        else:
+            archived = await sweeper.sweep_once()
+            print(f"Archived {archived} threads idle for more than {args.idle_hours:g}h to '{args.archive_dir}'.")
+    finally:
+        await catalog_store.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
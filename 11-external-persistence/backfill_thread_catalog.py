@@ -0,0 +1,41 @@
+"""One-off backfill of the Redis thread catalog.
+
+Threads written before RedisChatMessageStore maintained its catalog are invisible to
+the thread picker. This script walks the keyspace with SCAN (never KEYS) and indexes
+every message list under the prefix with its current length.
+
+Usage:
+    python backfill_thread_catalog.py [--prefix lab11] [--batch-size 500] [--cluster]
+"""
+
+import argparse
+import asyncio
+import os
+
+from redis_chat_message_store import RedisChatMessageStore
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prefix", default="lab11", help="key prefix used by the store")
+    parser.add_argument("--batch-size", type=int, default=500, help="SCAN COUNT hint and pipeline size")
+    parser.add_argument("--cluster", action="store_true", help="REDIS_URL points at a Redis Cluster")
+    args = parser.parse_args()
+
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        raise RuntimeError(
+            "Set the REDIS_URL environment variable (e.g., redis://:<primary_key>@<host>:6380/0)."
+        )
+
+    store = RedisChatMessageStore(redis_url=redis_url, key_prefix=args.prefix, cluster=args.cluster)
+    try:
+        catalog = store.thread_catalog()
+        found = await catalog.backfill(batch_size=args.batch_size)
+        print(f"Indexed {found} message lists under '{args.prefix}:*'. Catalog now holds {await catalog.count()} threads.")
+    finally:
+        await store.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Per-turn write latency benchmark for RedisChatMessageStore.add_messages.
+
+Compares the original three-command write path (RPUSH, LLEN, LTRIM) with the
+single-round-trip implementation (one atomic server-side script per turn). Set REDIS_URL to benchmark a real
+server (local redis-server or Azure Cache for Redis); otherwise an in-process
+fakeredis instance is used, which shows the command savings but not the network cost.
+
+Usage:
+    python benchmark_add_messages.py [--turns 500] [--max-messages 200] [--cluster]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from uuid import uuid4
+
+from agent_framework import ChatMessage
+
+from redis_chat_message_store import RedisChatMessageStore
+
+
+def _build_client(redis_url: str | None, cluster: bool):
+    """Return an async Redis client for REDIS_URL, or fakeredis when no URL is set."""
+    if redis_url:
+        import redis.asyncio as redis
+
+        return redis.RedisCluster.from_url(redis_url) if cluster else redis.from_url(redis_url)
+
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis()
+
+
+async def _legacy_add_messages(store: RedisChatMessageStore, messages: list[ChatMessage]) -> None:
+    """The pre-pipeline write path: up to three sequential round trips."""
+    serialized_messages = [store._serialize_message(msg) for msg in messages]
+    client = store._redis_client
+    await client.rpush(store.redis_key, *serialized_messages)
+    if store.max_messages is not None:
+        current_count = await client.llen(store.redis_key)
+        if current_count > store.max_messages:
+            await client.ltrim(store.redis_key, -store.max_messages, -1)
+
+
+def _turn(index: int) -> list[ChatMessage]:
+    return [
+        ChatMessage(role="user", text=f"Question {index}: what should I pack for Lisbon in May?"),
+        ChatMessage(role="assistant", text=f"Answer {index}: light layers, comfortable shoes, and a rain jacket."),
+    ]
+
+
+async def _measure(label: str, store: RedisChatMessageStore, turns: int, writer) -> None:
+    samples: list[float] = []
+    for index in range(turns):
+        messages = _turn(index)
+        started = time.perf_counter()
+        await writer(store, messages)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<10} mean={statistics.fmean(samples):7.3f} ms  p50={p50:7.3f} ms  p99={p99:7.3f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--max-messages", type=int, default=200)
+    parser.add_argument("--cluster", action="store_true", help="REDIS_URL points at a Redis Cluster")
+    args = parser.parse_args()
+
+    redis_url = os.environ.get("REDIS_URL")
+    client = _build_client(redis_url, args.cluster)
+    print(f"Backend: {redis_url or 'fakeredis (in-process)'}  turns={args.turns}  max_messages={args.max_messages}\n")
+
+    async def single_round_trip(store: RedisChatMessageStore, messages: list[ChatMessage]) -> None:
+        await store.add_messages(messages)
+
+    for label, writer in (("legacy", _legacy_add_messages), ("scripted", single_round_trip)):
+        store = RedisChatMessageStore(
+            redis_url=redis_url or "redis://fakeredis",
+            thread_id=f"bench_{uuid4()}",
+            key_prefix="lab11-bench",
+            max_messages=args.max_messages,
+            cluster=args.cluster,
+            redis_client=client,
+        )
+        try:
+            await _measure(label, store, args.turns, writer)
+        finally:
+            await store.clear()
+
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Size and throughput benchmark for the Redis message codecs.
+
+Encodes a synthetic conversation (short chat turns, long assistant replies and large
+tool results) with every available codec and reports bytes stored plus encode/decode
+throughput. No Redis server is needed: the numbers are what each list entry would cost.
+
+Usage:
+    python benchmark_codecs.py [--turns 200] [--repeat 5] [--threshold 1024]
+"""
+
+import argparse
+import json
+import time
+
+from agent_framework import ChatMessage, FunctionResultContent
+
+from message_codecs import MessageCodec, get_codec
+
+CODEC_SPECS = ["json", "json+zlib", "json+zstd", "msgpack", "msgpack+zlib", "msgpack+zstd"]
+
+
+def _conversation(turns: int) -> list[dict]:
+    """Build message dictionaries resembling a tool-heavy travel-planning thread."""
+    messages: list[ChatMessage] = []
+    for index in range(turns):
+        messages.append(ChatMessage(role="user", text=f"Day {index}: what can I do in Lisbon this afternoon?"))
+        if index % 4 == 0:
+            flights = [
+                {"flight": f"TP{1000 + n}", "from": "LIS", "to": "OPO", "price_eur": 49 + n, "seats": n % 9}
+                for n in range(40)
+            ]
+            messages.append(
+                ChatMessage(role="tool", contents=[FunctionResultContent(call_id=f"call_{index}", result=json.dumps(flights))])
+            )
+        reply = " ".join(
+            f"Option {n}: walk from Alfama to the Miradouro da Senhora do Monte, then grab pastéis de nata."
+            for n in range(12 if index % 3 == 0 else 2)
+        )
+        messages.append(ChatMessage(role="assistant", text=reply))
+    return [message.to_dict() for message in messages]
+
+
+def _benchmark(codec: MessageCodec, payloads: list[dict], repeat: int) -> tuple[int, float, float]:
+    encoded = [codec.encode(payload) for payload in payloads]
+    stored_bytes = sum(len(entry) for entry in encoded)
+    raw_bytes = sum(len(json.dumps(payload, separators=(",", ":")).encode("utf-8")) for payload in payloads)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            codec.encode(payload)
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for entry in encoded:
+            MessageCodec.decode(entry)
+    decode_seconds = time.perf_counter() - started
+
+    megabytes = raw_bytes * repeat / 1_000_000
+    return stored_bytes, megabytes / encode_seconds, megabytes / decode_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=int, default=1024, help="compress_threshold in bytes")
+    args = parser.parse_args()
+
+    payloads = _conversation(args.turns)
+    print(f"{len(payloads)} messages, compress_threshold={args.threshold} bytes")
+    print("Throughput is measured against the size of the plain JSON encoding.\n")
+    print(f"{'codec':<14}{'bytes stored':>14}{'vs json':>10}{'encode MB/s':>14}{'decode MB/s':>14}")
+
+    baseline: int | None = None
+    for spec in CODEC_SPECS:
+        try:
+            codec = get_codec(spec, args.threshold)
+        except ImportError as exc:
+            print(f"{spec:<14}skipped ({exc})")
+            continue
+        stored_bytes, encode_rate, decode_rate = _benchmark(codec, payloads, args.repeat)
+        baseline = baseline or stored_bytes
+        print(
+            f"{spec:<14}{stored_bytes:>14,}{stored_bytes / baseline:>9.0%}"
+            f"{encode_rate:>14.1f}{decode_rate:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
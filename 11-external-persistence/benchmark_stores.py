@@ -0,0 +1,161 @@
+"""Compare the history backends: one JSON file per thread, SQLite and Redis.
+
+Each backend receives the same conversation, one user/assistant turn at a time. The
+script reports per-turn write latency (append plus persist), the latency of reading the
+context window handed to the agent, and a full-history read. SQLite also reports a
+full-text search across every thread.
+
+- ``file`` is lab 10's original approach: the in-memory history is serialized and the
+  whole JSON file rewritten on every save; reads parse the whole file.
+- ``sqlite`` is SqliteChatMessageStore in a temporary database.
+- ``redis`` is RedisChatMessageStore against REDIS_URL, or in-process fakeredis when it
+  is not set (which shows the command costs but not the network).
+
+Usage:
+    python benchmark_stores.py [--threads 20] [--turns 100] [--context-window 50]
+                               [--backends file,sqlite,redis]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from agent_framework import ChatMessage, ChatMessageStore
+
+from redis_chat_message_store import RedisChatMessageStore
+from sqlite_chat_message_store import SqliteChatMessageStore
+
+BACKENDS = ("file", "sqlite", "redis")
+
+
+class JsonFileStore:
+    """Lab 10's original persistence: the whole thread rewritten as one JSON file per save."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._memory = ChatMessageStore()
+
+    async def add_messages(self, messages: list[ChatMessage]) -> None:
+        await self._memory.add_messages(messages)
+        state = await self._memory.serialize()
+        self.path.write_text(json.dumps(state), encoding="utf-8")
+
+    async def get_messages(self) -> list[ChatMessage]:
+        state = json.loads(self.path.read_text(encoding="utf-8"))
+        return [ChatMessage.from_dict(message) for message in state["messages"]]
+
+    async def list_recent_messages(self, count: int) -> list[ChatMessage]:
+        return (await self.get_messages())[-count:]
+
+    async def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    async def aclose(self) -> None:
+        pass
+
+
+def _turn(index: int) -> list[ChatMessage]:
+    return [
+        ChatMessage(role="user", text=f"Question {index}: what should I pack for Lisbon in May?"),
+        ChatMessage(role="assistant", text=f"Answer {index}: light layers, comfortable shoes, and a rain jacket."),
+    ]
+
+
+def _report(label: str, samples: list[float]) -> None:
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {label:<14} mean={statistics.fmean(samples):8.3f} ms  p50={p50:8.3f} ms  p99={p99:8.3f} ms")
+
+
+async def _timed(samples: list[float], operation: Awaitable[object]) -> None:
+    started = time.perf_counter()
+    await operation
+    samples.append((time.perf_counter() - started) * 1000)
+
+
+async def _run_backend(name: str, make_store: Callable[[str], object], args: argparse.Namespace) -> None:
+    stores = [make_store(f"bench_{index}") for index in range(args.threads)]
+    writes: list[float] = []
+    window_reads: list[float] = []
+    full_reads: list[float] = []
+    try:
+        # Interleave threads turn by turn, as concurrent users would.
+        for turn in range(args.turns):
+            for store in stores:
+                await _timed(writes, store.add_messages(_turn(turn)))
+        for store in stores:
+            await _timed(window_reads, store.list_recent_messages(args.context_window))
+            await _timed(full_reads, store.get_messages())
+
+        print(f"{name}:")
+        _report("write turn", writes)
+        _report(f"last {args.context_window}", window_reads)
+        _report("full history", full_reads)
+        if isinstance(stores[0], SqliteChatMessageStore):
+            searches: list[float] = []
+            for _ in range(20):
+                await _timed(searches, stores[0].search('"rain jacket"', limit=20, all_threads=True))
+            _report("fts search", searches)
+    finally:
+        for store in stores:
+            await store.clear()
+            await store.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--context-window", type=int, default=50)
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated subset of file,sqlite,redis")
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+
+    redis_url = os.environ.get("REDIS_URL")
+    print(
+        f"threads={args.threads}  turns={args.turns}  messages/thread={2 * args.turns}  "
+        f"redis={redis_url or 'fakeredis (in-process)'}\n"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        factories: dict[str, Callable[[str], object]] = {
+            "file": lambda thread_id: JsonFileStore(root / f"{thread_id}.json"),
+            "sqlite": lambda thread_id: SqliteChatMessageStore(root / "bench.sqlite3", thread_id=thread_id),
+        }
+        redis_client = None
+        if "redis" in backends:
+            if redis_url:
+                import redis.asyncio as redis
+
+                redis_client = redis.from_url(redis_url)
+            else:
+                import fakeredis
+
+                redis_client = fakeredis.FakeAsyncRedis()
+            factories["redis"] = lambda thread_id: RedisChatMessageStore(
+                redis_url=redis_url or "redis://fakeredis",
+                thread_id=thread_id,
+                key_prefix="lab11-bench",
+                redis_client=redis_client,
+            )
+
+        for backend in backends:
+            await _run_backend(backend, factories[backend], args)
+        if redis_client is not None:
+            await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
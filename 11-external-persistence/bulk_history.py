@@ -0,0 +1,121 @@
+import asyncio
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any
+
+import redis.asyncio as redis
+from agent_framework import ChatMessage
+
+from message_codecs import MessageCodec
+from thread_catalog import thread_key
+
+
+@dataclass
+class ThreadPreview:
+    """Message count and newest message of one thread."""
+
+    thread_id: str
+    message_count: int
+    last_message: ChatMessage | None
+
+
+class BulkHistoryReader:
+    """Fetch the histories of many threads stored by RedisChatMessageStore at once.
+
+    Creating one store per thread and awaiting ``list_messages`` in a loop costs a round
+    trip per thread plus decoding on the event loop. The reader groups thread ids into
+    non-transactional pipelines of ``batch_size`` commands, keeps at most ``concurrency``
+    batches in flight, and decodes each batch in ``executor`` (the loop's default thread
+    pool unless given; pass a ``ProcessPoolExecutor`` for large exports so decoding runs
+    in parallel with the GIL out of the way). On a cluster, each pipeline is split per
+    node by the client and sent to the shards concurrently.
+
+    Bulk reads see exactly what Redis holds: threads archived to the cold tier come
+    back empty, since rehydrating thousands of them is a job for the store, not a dashboard.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis | redis.RedisCluster,
+        key_prefix: str,
+        batch_size: int = 200,
+        concurrency: int = 4,
+        executor: Executor | None = None,
+        cluster: bool = False,
+    ) -> None:
+        if batch_size <= 0 or concurrency <= 0:
+            raise ValueError("batch_size and concurrency must be positive")
+        self._redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.executor = executor
+        self.cluster = cluster
+
+    async def fetch_histories(
+        self, thread_ids: Sequence[str], last: int | None = None, as_dicts: bool = False
+    ) -> dict[str, list[Any]]:
+        """Return every thread's messages (oldest first), keyed by thread id.
+
+        Args:
+            thread_ids: Threads to fetch; missing threads map to an empty list.
+            last: Only fetch each thread's newest ``last`` messages.
+            as_dicts: Return message dictionaries instead of ChatMessage objects
+                      (cheaper when the result is re-serialized, e.g. for an export).
+        """
+        start = -last if last else 0
+
+        def queue(pipe: Any, key: str) -> None:
+            pipe.lrange(key, start, -1)
+
+        batches = await self._run_batches(thread_ids, queue, _decode_lists, as_dicts)
+        return {thread_id: messages for batch in batches for thread_id, messages in batch}
+
+    async def fetch_previews(self, thread_ids: Sequence[str]) -> list[ThreadPreview]:
+        """Return the message count and newest message of each thread, in input order."""
+
+        def queue(pipe: Any, key: str) -> None:
+            pipe.llen(key)
+            pipe.lindex(key, -1)
+
+        batches = await self._run_batches(thread_ids, queue, _decode_previews, False)
+        return [
+            ThreadPreview(thread_id=thread_id, message_count=count, last_message=message)
+            for batch in batches
+            for thread_id, (count, message) in batch
+        ]
+
+    async def _run_batches(self, thread_ids: Sequence[str], queue: Any, decode: Any, as_dicts: bool) -> list:
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(batch: Sequence[str]) -> list:
+            async with semaphore:
+                async with self._redis_client.pipeline(transaction=False) as pipe:
+                    for thread_id in batch:
+                        queue(pipe, thread_key(self.key_prefix, thread_id, self.cluster))
+                    raw = await pipe.execute()
+            # Decode outside the semaphore so the next batch's round trip overlaps with it.
+            decoded = await loop.run_in_executor(self.executor, decode, raw, as_dicts)
+            return list(zip(batch, decoded))
+
+        batches = [thread_ids[i : i + self.batch_size] for i in range(0, len(thread_ids), self.batch_size)]
+        return await asyncio.gather(*(run(batch) for batch in batches))
+
+
+# Module-level so they can be shipped to a ProcessPoolExecutor.
+def _decode(entry: bytes, as_dicts: bool) -> Any:
+    message_dict = MessageCodec.decode(entry)
+    return message_dict if as_dicts else ChatMessage.from_dict(message_dict)
+
+
+def _decode_lists(raw: list[list[bytes]], as_dicts: bool) -> list[list[Any]]:
+    return [[_decode(entry, as_dicts) for entry in entries] for entries in raw]
+
+
+def _decode_previews(raw: list[Any], as_dicts: bool) -> list[tuple[int, Any]]:
+    return [
+        (int(raw[i]), _decode(raw[i + 1], as_dicts) if raw[i + 1] is not None else None)
+        for i in range(0, len(raw), 2)
+    ]
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from agent_framework import ChatMessage
+
+
+@dataclass
+class CachedThread:
+    """Deserialized history for one Redis thread plus the version it reflects."""
+
+    version: int
+    generation: int = 0
+    messages: list[ChatMessage] = field(default_factory=list)
+    # Token counts of the newest messages; shorter than ``messages`` when older entries
+    # were written before token accounting existed.
+    token_counts: list[int] = field(default_factory=list)
+
+    def trim(self, length: int) -> None:
+        """Keep only the newest ``length`` messages (and their token counts)."""
+        if len(self.messages) > length:
+            del self.messages[: len(self.messages) - length]
+        if len(self.token_counts) > length:
+            del self.token_counts[: len(self.token_counts) - length]
+
+
+class MessageCache:
+    """Process-local LRU of deserialized ChatMessage lists shared by many RedisChatMessageStore instances.
+
+    Entries are keyed by Redis key and tagged with the thread's append counter and
+    reset generation (the ``version`` and ``generation`` fields of the store's metadata
+    hash). Stores compare both with Redis before trusting an entry and fetch only the
+    messages other writers appended.
+
+    The cache is bounded both by thread count and by the total number of cached messages,
+    so one worker can serve thousands of conversations with a fixed memory ceiling.
+    """
+
+    def __init__(self, max_threads: int = 1024, max_messages: int = 50_000) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_threads: Maximum number of threads kept in memory.
+            max_messages: Maximum number of messages kept across all cached threads.
+        """
+        if max_threads <= 0 or max_messages <= 0:
+            raise ValueError("max_threads and max_messages must be positive integers")
+
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self._entries: OrderedDict[str, CachedThread] = OrderedDict()
+        self._message_count = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def message_count(self) -> int:
+        """Total number of messages currently cached."""
+        return self._message_count
+
+    def get(self, key: str) -> CachedThread | None:
+        """Return the cached entry for ``key`` and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: str,
+        version: int,
+        messages: list[ChatMessage],
+        generation: int = 0,
+        token_counts: list[int] | None = None,
+    ) -> None:
+        """Replace the entry for ``key`` with ``messages`` at ``version``/``generation``."""
+        self.invalidate(key)
+        self._entries[key] = CachedThread(
+            version=version,
+            generation=generation,
+            messages=list(messages),
+            token_counts=list(token_counts or []),
+        )
+        self._message_count += len(messages)
+        self._evict()
+
+    def append(
+        self,
+        key: str,
+        expected_version: int,
+        version: int,
+        messages: list[ChatMessage],
+        generation: int = 0,
+        token_counts: list[int] | None = None,
+        length: int | None = None,
+    ) -> bool:
+        """Write-through helper: extend a cached entry that is exactly at ``expected_version``.
+
+        Args:
+            key: Redis key of the thread.
+            expected_version: Version the entry must currently hold.
+            version: Version after the append.
+            messages: Messages appended to the thread.
+            generation: Reset generation observed by the append.
+            token_counts: Token counts of ``messages``.
+            length: List length reported by Redis after the append, so any trimming
+                    the server applied (by count or by tokens) is mirrored exactly.
+
+        Returns:
+            True if the entry was updated, False if it was absent or stale (and dropped).
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry.version != expected_version or entry.generation != generation:
+            self.invalidate(key)
+            return False
+
+        previous_count = len(entry.messages)
+        entry.messages.extend(messages)
+        entry.token_counts.extend(token_counts or [])
+        if length is not None:
+            entry.trim(length)
+        entry.version = version
+        self._message_count += len(entry.messages) - previous_count
+        self._entries.move_to_end(key)
+        self._evict()
+        return True
+
+    def invalidate(self, key: str) -> None:
+        """Drop the entry for ``key`` if present."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._message_count -= len(entry.messages)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+        self._message_count = 0
+
+    def _evict(self) -> None:
+        # Always keep the most recently used entry, even if it alone exceeds max_messages.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_threads or self._message_count > self.max_messages
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._message_count -= len(entry.messages)
+            self.evictions += 1
@@ -0,0 +1,131 @@
+"""Pluggable wire formats for messages persisted by RedisChatMessageStore.
+
+Every Redis list entry is self-describing, so entries written by different codecs
+(or by older versions of the store) can sit side by side in the same list:
+
+- Entries starting with ``{`` are plain JSON, the format used before codecs existed.
+  The default ``json`` codec still writes this form so older readers keep working.
+- Any other entry starts with a one-byte header: the low nibble is the body format
+  (JSON or msgpack) and the high nibble is the compression applied to the body.
+
+``msgpack`` and ``zstandard`` are optional dependencies, imported on first use.
+"""
+
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+# Bumped whenever the entry header layout changes; recorded in RedisStoreState.
+CODEC_VERSION = 1
+
+_FORMAT_JSON = 0x01
+_FORMAT_MSGPACK = 0x02
+_COMPRESSION_NONE = 0x00
+_COMPRESSION_ZLIB = 0x10
+_COMPRESSION_ZSTD = 0x20
+
+_FORMATS = {"json": _FORMAT_JSON, "msgpack": _FORMAT_MSGPACK}
+_COMPRESSIONS = {None: _COMPRESSION_NONE, "zlib": _COMPRESSION_ZLIB, "zstd": _COMPRESSION_ZSTD}
+_LEGACY_JSON_PREFIX = ord("{")
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("The msgpack codec requires the 'msgpack' package (pip install msgpack).") from exc
+    return msgpack
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("zstd compression requires the 'zstandard' package (pip install zstandard).") from exc
+    return zstandard
+
+
+@dataclass(frozen=True)
+class MessageCodec:
+    """Encode message dictionaries to Redis entries and back.
+
+    Attributes:
+        format: Body serialization, ``"json"`` or ``"msgpack"``.
+        compression: ``None``, ``"zlib"`` or ``"zstd"``.
+        compress_threshold: Bodies smaller than this many bytes are stored uncompressed,
+                            since short messages rarely shrink enough to pay for the header.
+        level: Compression level passed to zlib/zstd.
+    """
+
+    format: str = "json"
+    compression: str | None = None
+    compress_threshold: int = 1024
+    level: int = 3
+
+    def __post_init__(self) -> None:
+        if self.format not in _FORMATS:
+            raise ValueError(f"Unknown codec format '{self.format}'. Expected one of {sorted(_FORMATS)}.")
+        if self.compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{self.compression}'. Expected zlib, zstd or None.")
+        if self.format == "msgpack":
+            _import_msgpack()
+        if self.compression == "zstd":
+            _import_zstandard()
+
+    @property
+    def name(self) -> str:
+        """Spec string such as ``"msgpack+zstd"``, accepted by :func:`get_codec`."""
+        return self.format if self.compression is None else f"{self.format}+{self.compression}"
+
+    def encode(self, payload: dict[str, Any]) -> bytes:
+        """Encode a message dictionary into a Redis list entry."""
+        if self.format == "json":
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        else:
+            body = _import_msgpack().packb(payload, use_bin_type=True)
+
+        compression = _COMPRESSION_NONE
+        if self.compression is not None and len(body) >= self.compress_threshold:
+            if self.compression == "zlib":
+                body = zlib.compress(body, self.level)
+            else:
+                body = _import_zstandard().ZstdCompressor(level=self.level).compress(body)
+            compression = _COMPRESSIONS[self.compression]
+
+        if self.format == "json" and compression == _COMPRESSION_NONE:
+            # Plain JSON stays header-less so pre-codec readers can still parse it.
+            return body
+        return bytes((_FORMATS[self.format] | compression,)) + body
+
+    @staticmethod
+    def decode(data: bytes | str) -> dict[str, Any]:
+        """Decode any entry written by any codec (or by the pre-codec store)."""
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data or data[0] == _LEGACY_JSON_PREFIX:
+            return json.loads(data)
+
+        header, body = data[0], data[1:]
+        compression = header & 0xF0
+        if compression == _COMPRESSION_ZLIB:
+            body = zlib.decompress(body)
+        elif compression == _COMPRESSION_ZSTD:
+            body = _import_zstandard().ZstdDecompressor().decompress(body)
+        elif compression != _COMPRESSION_NONE:
+            raise ValueError(f"Unknown compression flag 0x{compression:02x} in Redis entry header")
+
+        body_format = header & 0x0F
+        if body_format == _FORMAT_JSON:
+            return json.loads(body)
+        if body_format == _FORMAT_MSGPACK:
+            return _import_msgpack().unpackb(body, raw=False)
+        raise ValueError(f"Unknown body format 0x{body_format:02x} in Redis entry header")
+
+
+def get_codec(spec: "str | MessageCodec", compress_threshold: int = 1024) -> MessageCodec:
+    """Build a codec from a spec string such as ``"json"``, ``"msgpack"`` or ``"json+zlib"``."""
+    if isinstance(spec, MessageCodec):
+        return spec
+    body_format, _, compression = spec.partition("+")
+    return MessageCodec(format=body_format, compression=compression or None, compress_threshold=compress_threshold)
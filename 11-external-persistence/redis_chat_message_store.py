@@ -1,5 +1,8 @@
-from collections.abc import Sequence
+import asyncio
+import contextlib
 import json
+from collections.abc import AsyncIterator, Sequence
+import time
 from typing import Any
 from uuid import uuid4
 
@@ -7,6 +10,180 @@ import redis.asyncio as redis
 from agent_framework import ChatMessage
 from pydantic import BaseModel
 
+from bulk_history import BulkHistoryReader
+from message_cache import MessageCache
+from message_codecs import CODEC_VERSION, MessageCodec, get_codec
+from redis_connection_registry import RedisConnectionRegistry, default_registry
+from thread_archive import ArchivedThread, SegmentArchive, SegmentPointer
+from thread_catalog import RedisThreadCatalog, _as_text, archived_set_key, catalog_keys, thread_key
+from thread_lock import RedisThreadLock, StaleLeaseError, ThreadLease
+from token_budget import TokenCounter, estimate_message_tokens, tail_within_budget
+
+# Suffix of the per-thread metadata hash stored next to each message list.
+META_KEY_SUFFIX = ":meta"
+# Delta fetches retried before falling back to a full reload when writers race the reader.
+_CACHE_SYNC_ATTEMPTS = 3
+
+# Suffix of the per-thread lease key (see thread_lock.py).
+LOCK_KEY_SUFFIX = ":lock"
+
+# Suffixes of the per-thread stream of in-flight response chunks and its pub/sub channel.
+PARTIAL_KEY_SUFFIX = ":partial"
+LIVE_CHANNEL_SUFFIX = ":live"
+
+# Suffix of the per-thread list of token counts, aligned with the tail of the message list.
+TOKENS_KEY_SUFFIX = ":tokens"
+
+# Metadata fields that point at a thread's record in the cold-tier segment files.
+_ARCHIVE_FIELDS = ("archived_segment", "archived_offset", "archived_length", "archived_at")
+
+# Appends messages and their token counts, applies count/token retention, bumps the
+# append counter, keeps the running token total and refreshes the thread catalog atomically.
+# KEYS: message list, metadata hash, token-count list, [catalog recency zset, catalog count hash].
+#       The catalog keys are omitted in cluster mode, where they live in another slot.
+# ARGV: max_messages (0 = unlimited), max_tokens (0 = unlimited), activity timestamp,
+#       thread id, fencing token (0 = no lease), n, n token counts, n entries.
+_APPEND_SCRIPT = """
+local fence = tonumber(ARGV[5])
+if fence > 0 and (tonumber(redis.call('HGET', KEYS[2], 'fence')) or 0) ~= fence then
+    -- A newer lease was granted after this writer's lease expired.
+    return {-2, 0, 0, 0}
+end
+if redis.call('HEXISTS', KEYS[2], 'archived_segment') == 1 then
+    -- The thread lives in the cold tier; the caller rehydrates it and retries.
+    return {-1, 0, 0, 0}
+end
+local max_messages = tonumber(ARGV[1])
+local max_tokens = tonumber(ARGV[2])
+local count = tonumber(ARGV[6])
+local length = redis.call('RPUSH', KEYS[1], unpack(ARGV, 7 + count))
+local tokens_length = redis.call('RPUSH', KEYS[3], unpack(ARGV, 7, 6 + count))
+local added_tokens = 0
+for i = 7, 6 + count do
+    added_tokens = added_tokens + tonumber(ARGV[i])
+end
+local total_tokens = redis.call('HINCRBY', KEYS[2], 'tokens', added_tokens)
+
+if max_messages > 0 then
+    if length > max_messages then
+        redis.call('LTRIM', KEYS[1], -max_messages, -1)
+        length = max_messages
+    end
+    if tokens_length > max_messages then
+        local dropped = redis.call('LRANGE', KEYS[3], 0, tokens_length - max_messages - 1)
+        for _, tokens in ipairs(dropped) do
+            total_tokens = total_tokens - tonumber(tokens)
+        end
+        redis.call('LTRIM', KEYS[3], -max_messages, -1)
+        tokens_length = max_messages
+    end
+end
+
+if max_tokens > 0 and total_tokens > max_tokens then
+    -- Keep the newest entries that fit; the newest message is always kept.
+    local counts = redis.call('LRANGE', KEYS[3], 0, -1)
+    local used, keep = 0, 0
+    for i = #counts, 1, -1 do
+        local tokens = tonumber(counts[i])
+        if keep > 0 and used + tokens > max_tokens then
+            break
+        end
+        used = used + tokens
+        keep = keep + 1
+    end
+    redis.call('LTRIM', KEYS[1], -keep, -1)
+    redis.call('LTRIM', KEYS[3], -keep, -1)
+    length = math.min(length, keep)
+    total_tokens = used
+end
+
+redis.call('HSET', KEYS[2], 'tokens', total_tokens)
+local version = redis.call('HINCRBY', KEYS[2], 'version', count)
+local generation = tonumber(redis.call('HGET', KEYS[2], 'generation')) or 0
+if #KEYS == 5 then
+    redis.call('ZADD', KEYS[4], ARGV[3], ARGV[4])
+    redis.call('HSET', KEYS[5], ARGV[4], length)
+end
+return {length, version, generation, total_tokens}
+"""
+
+# Returns the newest messages whose recorded token counts fit in a budget (newest always kept).
+# Threads written before token counts were recorded have fewer counts than messages (the
+# counts cover the tail); when every recorded count fits, the whole list is returned so the
+# caller can count the older entries itself.
+# KEYS: message list, token-count list. ARGV: budget.
+# Returns: {tokens used by the counted entries, number of counted entries, entries}.
+_TAIL_WITHIN_BUDGET_SCRIPT = """
+local budget = tonumber(ARGV[1])
+local counts = redis.call('LRANGE', KEYS[2], 0, -1)
+local used, keep = 0, 0
+for i = #counts, 1, -1 do
+    local tokens = tonumber(counts[i])
+    if keep > 0 and used + tokens > budget then
+        return {used, keep, redis.call('LRANGE', KEYS[1], -keep, -1)}
+    end
+    used = used + tokens
+    keep = keep + 1
+end
+return {used, keep, redis.call('LRANGE', KEYS[1], 0, -1)}
+"""
+
+
+# Replaces the thread's lists with a cold-tier stub unless it changed since it was read.
+# KEYS: message list, metadata hash, token-count list, [catalog archived set].
+# ARGV: expected version, expected generation, segment, offset, length, archived_at, thread id.
+_ARCHIVE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[2], 'archived_segment') == 1 then
+    return 0
+end
+local version = tonumber(redis.call('HGET', KEYS[2], 'version')) or 0
+local generation = tonumber(redis.call('HGET', KEYS[2], 'generation')) or 0
+if version ~= tonumber(ARGV[1]) or generation ~= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[3])
+redis.call('HSET', KEYS[2], 'archived_segment', ARGV[3], 'archived_offset', ARGV[4],
+    'archived_length', ARGV[5], 'archived_at', ARGV[6])
+-- Cached copies must reload: the list is gone until the thread is rehydrated.
+redis.call('HINCRBY', KEYS[2], 'generation', 1)
+if #KEYS == 4 then
+    redis.call('SADD', KEYS[4], ARGV[7])
+end
+return 1
+"""
+
+# Restores archived entries if the stub still points at the record that was read.
+# KEYS: message list, metadata hash, token-count list, [catalog archived set].
+# ARGV: segment, offset, thread id, n entries, entries..., token counts...
+_RESTORE_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'archived_segment') ~= ARGV[1]
+    or redis.call('HGET', KEYS[2], 'archived_offset') ~= ARGV[2] then
+    return 0
+end
+local count = tonumber(ARGV[4])
+-- Push in slices to stay within Lua's unpack limits on very long threads.
+for i = 5, 4 + count, 1000 do
+    redis.call('RPUSH', KEYS[1], unpack(ARGV, i, math.min(i + 999, 4 + count)))
+end
+for i = 5 + count, #ARGV, 1000 do
+    redis.call('RPUSH', KEYS[3], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+redis.call('HDEL', KEYS[2], 'archived_segment', 'archived_offset', 'archived_length', 'archived_at')
+redis.call('HINCRBY', KEYS[2], 'generation', 1)
+if #KEYS == 4 then
+    redis.call('SREM', KEYS[4], ARGV[3])
+end
+return 1
+"""
+
+# Records one streamed text chunk and fans it out to live watchers in a single round trip.
+# KEYS: partial-response stream. ARGV: pub/sub channel, text.
+_PARTIAL_CHUNK_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], '*', 't', ARGV[2])
+redis.call('PUBLISH', ARGV[1], cjson.encode({id = id, text = ARGV[2]}))
+return id
+"""
+
 
 class RedisStoreState(BaseModel):
     """State model for serializing and deserializing Redis chat message store data."""
@@ -15,6 +192,13 @@ class RedisStoreState(BaseModel):
     redis_url: str | None = None
     key_prefix: str = "chat_messages"
     max_messages: int | None = None
+    context_window: int | None = None
+    max_tokens: int | None = None
+    context_token_budget: int | None = None
+    codec: str = "json"
+    compress_threshold: int = 1024
+    codec_version: int = CODEC_VERSION
+    cluster: bool = False
 
 
 class RedisChatMessageStore:
@@ -26,6 +210,17 @@ class RedisChatMessageStore:
         thread_id: str | None = None,
         key_prefix: str = "chat_messages",
         max_messages: int | None = None,
+        context_window: int | None = None,
+        max_tokens: int | None = None,
+        context_token_budget: int | None = None,
+        token_counter: TokenCounter | None = None,
+        message_cache: MessageCache | None = None,
+        archive: SegmentArchive | None = None,
+        codec: str | MessageCodec = "json",
+        compress_threshold: int = 1024,
+        cluster: bool = False,
+        redis_client: redis.Redis | redis.RedisCluster | None = None,
+        connection_registry: RedisConnectionRegistry | None = None,
     ) -> None:
         """Initialize the Redis chat message store.
 
@@ -36,6 +231,32 @@ class RedisChatMessageStore:
             key_prefix: Prefix for Redis keys to namespace different applications.
             max_messages: Maximum number of messages to retain in Redis.
                          When exceeded, oldest messages are automatically trimmed.
+            context_window: Number of most recent messages handed to the agent by
+                            ``list_messages``. ``None`` returns the whole list.
+            max_tokens: Token-based retention. When the thread's running token total
+                        exceeds it, the oldest messages are trimmed (the newest is always kept).
+            context_token_budget: Token budget for ``list_messages``: only the newest
+                                  messages that fit are returned, using the counts
+                                  recorded at write time (no re-tokenizing on read).
+            token_counter: Callable returning a message's token count when it is written.
+                           Defaults to a fast character-based estimate. Not persisted in state.
+            message_cache: Optional process-local cache of deserialized messages, usually
+                           shared by every store the agent creates. Not persisted in state.
+            archive: Optional cold-tier segment archive. Idle threads archived there are
+                     rehydrated transparently on the next read or append.
+            codec: Wire format for new entries: ``"json"`` (default), ``"msgpack"``, optionally
+                   with ``"+zlib"`` or ``"+zstd"`` compression. Entries written with any
+                   codec can always be read back, so the codec can change over time.
+            compress_threshold: Encoded size in bytes from which compression kicks in.
+            cluster: Target a Redis Cluster: keys are hash-tagged per thread
+                     (``prefix:{thread_id}``) and the client is a ``RedisCluster``. The
+                     key layout differs from single-node mode, so pick one per deployment.
+            redis_client: Optional pre-built async Redis client (for example, a fakeredis
+                          instance in benchmarks). Binary codecs need ``decode_responses=False``.
+                          The caller owns it, so ``aclose`` leaves it open.
+            connection_registry: Registry that hands out the pooled client shared by every
+                                 store using the same URL. Defaults to the process-wide
+                                 ``default_registry``.
         """
         if redis_url is None:
             raise ValueError("redis_url is required for Redis connection")
@@ -44,51 +265,507 @@ class RedisChatMessageStore:
         self.thread_id = thread_id or f"thread_{uuid4()}"
         self.key_prefix = key_prefix
         self.max_messages = max_messages
-
-        # Initialize Redis client
-        self._redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.context_window = context_window
+        self.max_tokens = max_tokens
+        self.context_token_budget = context_token_budget
+        self.token_counter = token_counter or estimate_message_tokens
+        self.message_cache = message_cache
+        self.archive = archive
+        self.codec = get_codec(codec, compress_threshold)
+        self.cluster = cluster
+        # Set while this store holds the thread's lease (see ``thread_lock``); appends carry it.
+        self.fencing_token: int | None = None
+
+        # Borrow the shared pooled client for this URL unless one was injected
+        self._connection_registry = connection_registry or default_registry
+        self._owns_client_reference = redis_client is None
+        self._redis_client = redis_client or self._connection_registry.acquire(redis_url, cluster=cluster)
+        self._register_scripts()
 
     @property
     def redis_key(self) -> str:
         """Get the Redis key for this thread's messages."""
-        return f"{self.key_prefix}:{self.thread_id}"
+        return thread_key(self.key_prefix, self.thread_id, self.cluster)
 
-    async def add_messages(self, messages: Sequence[ChatMessage]) -> None:
+    @property
+    def meta_key(self) -> str:
+        """Get the Redis key of this thread's metadata hash (append counter, etc.)."""
+        return f"{self.redis_key}{META_KEY_SUFFIX}"
+
+    @property
+    def tokens_key(self) -> str:
+        """Get the Redis key of this thread's per-message token counts."""
+        return f"{self.redis_key}{TOKENS_KEY_SUFFIX}"
+
+    @property
+    def lock_key(self) -> str:
+        """Get the Redis key of this thread's lease."""
+        return f"{self.redis_key}{LOCK_KEY_SUFFIX}"
+
+    @contextlib.asynccontextmanager
+    async def thread_lock(self, ttl_seconds: float = 30.0, wait_timeout: float | None = 10.0) -> AsyncIterator[ThreadLease]:
+        """Hold this thread's lease for the duration of an agent turn.
+
+        Other workers entering ``thread_lock`` for the same thread wait (up to
+        ``wait_timeout``, then ``ThreadLockTimeout``); other threads are unaffected. While
+        held, appends carry the lease's fencing token, so if the lease expires and another
+        worker takes over, this store's late writes raise ``StaleLeaseError``.
+
+        Example:
+            async with store.thread_lock():
+                await agent.run(prompt, thread=thread)
+        """
+        lock = RedisThreadLock(self._redis_client, self.lock_key, self.meta_key, ttl_seconds, wait_timeout)
+        lease = await lock.acquire()
+        self.fencing_token = lease.fencing_token
+        try:
+            yield lease
+        finally:
+            self.fencing_token = None
+            await lock.release()
+
+    async def add_messages(self, messages: Sequence[ChatMessage]) -> int:
         """Add messages to the Redis store.
 
+        RPUSH, retention trimming (by count and by tokens), the append-counter bump and
+        the thread-catalog update run in one server-side script, so each agent turn costs
+        exactly one network round trip and the trim can never interleave with another
+        writer's append. Each message's token count is computed once, here.
+
         Args:
             messages: Sequence of ChatMessage objects to add to the store.
+
+        Returns:
+            Length of the Redis list after the append (and trim, if configured). An empty
+            append writes nothing and reads the current length with a single LLEN.
         """
         if not messages:
-            return
+            return await self._redis_client.llen(self.redis_key)
 
         # Serialize messages and add to Redis list
         serialized_messages = [self._serialize_message(msg) for msg in messages]
-        await self._redis_client.rpush(self.redis_key, *serialized_messages)
-
-        # Apply message limit if configured
-        if self.max_messages is not None:
-            current_count = await self._redis_client.llen(self.redis_key)
-            if current_count > self.max_messages:
-                # Keep only the most recent max_messages using LTRIM
-                await self._redis_client.ltrim(self.redis_key, -self.max_messages, -1)
+        token_counts = [self.token_counter(msg) for msg in messages]
+        keys = [self.redis_key, self.meta_key, self.tokens_key]
+        if not self.cluster:
+            keys.extend(catalog_keys(self.key_prefix))
+        timestamp = time.time()
+        while True:
+            new_length, version, generation, _ = await self._append_script(
+                keys=keys,
+                args=[
+                    self.max_messages or 0,
+                    self.max_tokens or 0,
+                    timestamp,
+                    self.thread_id,
+                    self.fencing_token or 0,
+                    len(messages),
+                    *token_counts,
+                    *serialized_messages,
+                ],
+            )
+            if new_length >= 0:
+                break
+            if new_length == -2:
+                raise StaleLeaseError(
+                    f"Lease on thread '{self.thread_id}' expired and was taken over (fencing token {self.fencing_token})."
+                )
+            # Archived thread: bring its history back before appending after it.
+            if not await self.rehydrate():
+                raise RuntimeError(
+                    f"Thread '{self.thread_id}' is archived to the cold tier; configure the store's archive to append to it."
+                )
+
+        if self.cluster:
+            # The catalog lives in its own slot, so it cannot join the append script.
+            await self.thread_catalog().record_activity(self.thread_id, new_length, timestamp)
+
+        if self.message_cache is not None:
+            self.message_cache.append(
+                self.redis_key,
+                expected_version=version - len(serialized_messages),
+                version=version,
+                messages=list(messages),
+                generation=generation,
+                token_counts=token_counts,
+                length=new_length,
+            )
+        return new_length
+
+    async def token_count(self) -> int:
+        """Return the running token total of the retained messages."""
+        return int(await self._redis_client.hget(self.meta_key, "tokens") or 0)
+
+    def thread_catalog(self) -> RedisThreadCatalog:
+        """Return the catalog of every thread stored under this store's key prefix."""
+        return RedisThreadCatalog(self._redis_client, self.key_prefix, cluster=self.cluster)
+
+    def bulk_reader(self, **kwargs: Any) -> BulkHistoryReader:
+        """Return a reader that fetches many threads under this key prefix in pipelined batches."""
+        return BulkHistoryReader(self._redis_client, self.key_prefix, cluster=self.cluster, **kwargs)
 
     async def list_messages(self) -> list[ChatMessage]:
-        """Get all messages from the store in chronological order.
+        """Get the messages used to hydrate the next agent run.
 
         Returns:
-            List of ChatMessage objects in chronological order (oldest first).
+            List of ChatMessage objects in chronological order (oldest first), limited
+            to the newest ``context_window`` messages and/or the newest messages that fit
+            ``context_token_budget`` when those are set.
         """
-        # Retrieve all messages from Redis list (oldest to newest)
-        redis_messages = await self._redis_client.lrange(self.redis_key, 0, -1)
+        messages = await self._list_context_messages()
+        if not messages and await self.rehydrate():
+            messages = await self._list_context_messages()
+        return messages
 
-        messages = []
-        for serialized_message in redis_messages:
-            message = self._deserialize_message(serialized_message)
-            messages.append(message)
+    async def _list_context_messages(self) -> list[ChatMessage]:
+        if self.message_cache is not None:
+            messages, token_counts = await self._cached_messages()
+            if self.context_token_budget is not None:
+                messages = messages[len(messages) - tail_within_budget(token_counts, self.context_token_budget) :]
+        elif self.context_token_budget is not None:
+            used, counted, redis_messages = await self._tail_within_budget_script(
+                keys=[self.redis_key, self.tokens_key], args=[self.context_token_budget]
+            )
+            counted = min(counted, len(redis_messages))
+            messages = [self._deserialize_message(item) for item in redis_messages[len(redis_messages) - counted :]]
+            # Entries older than the recorded counts (written before counts existed) are counted here.
+            used = int(used)
+            for item in reversed(redis_messages[: len(redis_messages) - counted]):
+                message = self._deserialize_message(item)
+                tokens = self.token_counter(message)
+                if messages and used + tokens > self.context_token_budget:
+                    break
+                used += tokens
+                messages.insert(0, message)
+        elif self.context_window is not None:
+            return await self.list_recent_messages(self.context_window)
+        else:
+            return await self.get_messages()
 
+        if self.context_window is not None:
+            return messages[-self.context_window :] if self.context_window > 0 else []
         return messages
 
+    async def get_messages(self, start: int = 0, stop: int = -1) -> list[ChatMessage]:
+        """Get a slice of the stored messages using Redis LRANGE semantics.
+
+        Args:
+            start: Index of the first message; negative values count from the newest message.
+            stop: Index of the last message (inclusive); ``-1`` means the newest message.
+
+        Returns:
+            List of ChatMessage objects in chronological order (oldest first).
+        """
+        redis_messages = await self._redis_client.lrange(self.redis_key, start, stop)
+        if not redis_messages and await self.rehydrate():
+            redis_messages = await self._redis_client.lrange(self.redis_key, start, stop)
+        return [self._deserialize_message(serialized_message) for serialized_message in redis_messages]
+
+    async def list_recent_messages(self, count: int) -> list[ChatMessage]:
+        """Get the ``count`` newest messages in chronological order."""
+        if count <= 0:
+            return []
+        return await self.get_messages(-count, -1)
+
+    async def iter_messages(self, chunk_size: int = 50, start: int = 0) -> AsyncIterator[ChatMessage]:
+        """Yield stored messages oldest first, fetching ``chunk_size`` entries per round trip.
+
+        Messages are deserialized and yielded as each chunk arrives, so callers never hold
+        the whole history in memory. Indexes are resolved against the list as it is read;
+        a concurrent trim can shift entries between chunks.
+
+        Args:
+            chunk_size: Number of entries fetched with each LRANGE call.
+            start: Index of the first message; negative values count from the newest message.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer")
+
+        length = await self._redis_client.llen(self.redis_key)
+        if length == 0 and await self.rehydrate():
+            length = await self._redis_client.llen(self.redis_key)
+        if start < 0:
+            start = max(0, length + start)
+
+        while True:
+            chunk = await self._redis_client.lrange(self.redis_key, start, start + chunk_size - 1)
+            for serialized_message in chunk:
+                yield self._deserialize_message(serialized_message)
+            if len(chunk) < chunk_size:
+                return
+            start += chunk_size
+
+    async def _cached_messages(self) -> tuple[list[ChatMessage], list[int]]:
+        """Return the full history and token counts through ``message_cache``, fetching only the delta."""
+        assert self.message_cache is not None
+        entry = self.message_cache.get(self.redis_key)
+        if entry is not None:
+            raw_version, raw_generation = await self._redis_client.hmget(self.meta_key, ["version", "generation"])
+            version, generation = int(raw_version or 0), int(raw_generation or 0)
+            if generation == entry.generation and version == entry.version:
+                return list(entry.messages), list(entry.token_counts)
+
+            # Within a generation the counter only grows, so the newest (version - cached
+            # version) list entries are exactly what other writers appended.
+            for _ in range(_CACHE_SYNC_ATTEMPTS):
+                delta = version - entry.version
+                if generation != entry.generation or delta <= 0:
+                    break
+                async with self._redis_client.pipeline(transaction=True) as pipe:
+                    pipe.hmget(self.meta_key, ["version", "generation"])
+                    pipe.lrange(self.redis_key, -delta, -1)
+                    pipe.lrange(self.tokens_key, -delta, -1)
+                    pipe.llen(self.redis_key)
+                    (raw_version, raw_generation), tail, tail_counts, length = await pipe.execute()
+                version, generation = int(raw_version or 0), int(raw_generation or 0)
+                if version - entry.version != delta:
+                    continue
+
+                # Retention may have trimmed the head since (possibly everything we had);
+                # the LLEN read in the same transaction is authoritative.
+                messages = _keep_newest(entry.messages + [self._deserialize_message(item) for item in tail], length)
+                token_counts = _keep_newest(entry.token_counts + [int(item) for item in tail_counts], length)
+                self.message_cache.put(self.redis_key, version, messages, generation, token_counts)
+                return messages, token_counts
+
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.hmget(self.meta_key, ["version", "generation"])
+            pipe.lrange(self.redis_key, 0, -1)
+            pipe.lrange(self.tokens_key, 0, -1)
+            (raw_version, raw_generation), redis_messages, redis_counts = await pipe.execute()
+        messages = [self._deserialize_message(item) for item in redis_messages]
+        token_counts = self._align_token_counts(messages, [int(item) for item in redis_counts])
+        self.message_cache.put(self.redis_key, int(raw_version or 0), messages, int(raw_generation or 0), token_counts)
+        return messages, token_counts
+
+    def _align_token_counts(self, messages: list[ChatMessage], token_counts: list[int]) -> list[int]:
+        """Return one token count per message, counting messages that have none recorded.
+
+        Threads written before token counts were recorded only have counts for their
+        newest messages; the older ones are counted with ``token_counter``.
+        """
+        missing = len(messages) - len(token_counts)
+        if missing <= 0:
+            return _keep_newest(token_counts, len(messages))
+        return [self.token_counter(message) for message in messages[:missing]] + token_counts
+
+    @property
+    def partial_key(self) -> str:
+        """Get the Redis key of the stream holding the in-flight response's chunks."""
+        return f"{self.redis_key}{PARTIAL_KEY_SUFFIX}"
+
+    @property
+    def live_channel(self) -> str:
+        """Get the pub/sub channel on which streamed chunks are published."""
+        return f"{self.redis_key}{LIVE_CHANNEL_SUFFIX}"
+
+    async def stream_turn(
+        self, updates: AsyncIterator[Any], input_messages: Sequence[ChatMessage] = ()
+    ) -> AsyncIterator[Any]:
+        """Persist and publish a streamed agent turn chunk by chunk.
+
+        Wrap ``agent.run_stream(...)`` with this generator: each text chunk is appended
+        to ``partial_key`` and published on ``live_channel`` before it is yielded. The
+        agent still appends the final ``ChatMessage`` itself when the stream completes;
+        the partial stream is then dropped. If the turn dies midway (error, crash), the
+        chunks are finalized into one assistant message by ``recover_partial_response``,
+        which also runs before the next streamed turn. Either way ``list_messages`` only
+        ever returns whole messages.
+
+        Example:
+            prompt_message = ChatMessage(role="user", text=prompt)
+            async for update in store.stream_turn(agent.run_stream(prompt_message, thread=thread), [prompt_message]):
+                print(update.text, end="")
+
+        Args:
+            updates: The agent's update stream. Not started until this generator is.
+            input_messages: The turn's input messages, so a crash before the agent appends
+                            them does not lose the user's prompt.
+        """
+        await self.recover_partial_response()
+        raw_version, raw_generation = await self._redis_client.hmget(self.meta_key, ["version", "generation"])
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            # The header lets recovery tell which of the turn's appends already landed.
+            pipe.xadd(
+                self.partial_key,
+                {"v": int(raw_version or 0), "g": int(raw_generation or 0), "n": len(input_messages)},
+            )
+            for message in input_messages:
+                pipe.xadd(self.partial_key, {"i": self._serialize_message(message)})
+            await pipe.execute()
+
+        try:
+            async for update in updates:
+                text = getattr(update, "text", None)
+                if text:
+                    await self._partial_chunk_script(keys=[self.partial_key], args=[self.live_channel, text])
+                yield update
+        except BaseException:
+            # Finalize what was streamed so far so the history stays whole.
+            await asyncio.shield(self.recover_partial_response())
+            raise
+        await self._finish_partial_response()
+
+    async def recover_partial_response(self) -> ChatMessage | None:
+        """Finalize an interrupted streamed turn left in ``partial_key``.
+
+        Appends whatever the agent did not: the turn's input messages and/or one assistant
+        message assembled from the streamed chunks (marked ``interrupted`` in its
+        ``additional_properties``). Safe to call again after a crash midway; hold the
+        thread's lease if several workers may recover the same thread.
+
+        Returns:
+            The assembled assistant message, or None if nothing needed recovering.
+        """
+        entries = await self._redis_client.xrange(self.partial_key)
+        if not entries:
+            return None
+
+        header, *chunks = [_stream_fields(fields) for _, fields in entries]
+        inputs = [self._deserialize_message(fields["i"]) for fields in chunks if "i" in fields]
+        text = "".join(_as_text(fields["t"]) for fields in chunks if "t" in fields)
+        raw_version, raw_generation = await self._redis_client.hmget(self.meta_key, ["version", "generation"])
+
+        recovered = None
+        if int(raw_generation or 0) == int(header["g"]):
+            # Appends since the turn started (the store's appends are serialized by the lease).
+            landed = int(raw_version or 0) - int(header["v"])
+            pending: list[ChatMessage] = []
+            if landed < len(inputs):
+                pending.extend(inputs)
+            if landed <= len(inputs) and text:
+                recovered = ChatMessage(role="assistant", text=text, additional_properties={"interrupted": True})
+                pending.append(recovered)
+            if pending:
+                await self.add_messages(pending)
+        await self._finish_partial_response()
+        return recovered
+
+    async def watch_live(self) -> AsyncIterator[str]:
+        """Yield the text of the in-flight (or next) streamed response as it is generated.
+
+        Chunks already recorded are replayed first, so joining late loses nothing; the
+        generator returns when the turn is finalized. Not available with the cluster client,
+        which has no async pub/sub support in redis-py.
+        """
+        if self.cluster:
+            raise RuntimeError("watch_live is not supported in cluster mode")
+        pubsub = self._redis_client.pubsub()
+        await pubsub.subscribe(self.live_channel)
+        try:
+            # Subscribe before replaying so no chunk falls between the two.
+            last_id = (0, 0)
+            for entry_id, fields in await self._redis_client.xrange(self.partial_key):
+                last_id = _stream_id(entry_id)
+                fields = _stream_fields(fields)
+                if "t" in fields:
+                    yield _as_text(fields["t"])
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                payload = json.loads(message["data"])
+                if payload.get("done"):
+                    return
+                if _stream_id(payload["id"]) > last_id:
+                    yield payload["text"]
+        finally:
+            await pubsub.aclose()
+
+    async def _finish_partial_response(self) -> None:
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(self.partial_key)
+            pipe.publish(self.live_channel, json.dumps({"done": True}))
+            await pipe.execute()
+
+    async def archive_thread(self) -> bool:
+        """Move this thread's history to the cold-tier archive, leaving a stub in Redis.
+
+        The entries are copied to disk (fsync'd) before Redis is touched, and the swap
+        is skipped if the thread changed in between.
+
+        Returns:
+            True if the thread was archived; False if it was empty, already archived, or
+            received new activity while its record was being written.
+        """
+        if self.archive is None:
+            raise RuntimeError("archive_thread requires the store to be configured with a SegmentArchive")
+
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.hmget(self.meta_key, ["version", "generation", "archived_segment"])
+            pipe.lrange(self.redis_key, 0, -1)
+            pipe.lrange(self.tokens_key, 0, -1)
+            (raw_version, raw_generation, archived_segment), entries, token_counts = await pipe.execute()
+        if archived_segment is not None or not entries:
+            return False
+
+        record = ArchivedThread(
+            redis_key=self.redis_key,
+            entries=[entry if isinstance(entry, bytes) else entry.encode("utf-8") for entry in entries],
+            token_counts=[int(count) for count in token_counts],
+        )
+        # Disk I/O runs in a worker thread so the event loop keeps serving other threads.
+        pointer = await asyncio.to_thread(self.archive.append, record)
+        archived = await self._archive_script(
+            keys=self._archive_script_keys(),
+            args=[
+                int(raw_version or 0),
+                int(raw_generation or 0),
+                pointer.segment,
+                pointer.offset,
+                pointer.length,
+                time.time(),
+                self.thread_id,
+            ],
+        )
+        if archived and self.cluster:
+            await self._redis_client.sadd(archived_set_key(self.key_prefix, cluster=True), self.thread_id)
+        if archived and self.message_cache is not None:
+            self.message_cache.invalidate(self.redis_key)
+        return bool(archived)
+
+    async def rehydrate(self) -> bool:
+        """Restore this thread from the cold-tier archive if Redis only holds its stub.
+
+        Returns:
+            True if history was restored (by this call or a concurrent one); False if the
+            thread is not archived or no archive is configured.
+
+        Raises:
+            ArchiveRecordError: If the stub points at a damaged record or at another
+                                thread's record. The stub is left in place, so nothing is
+                                restored into the wrong thread and the pointer can be
+                                inspected and repaired.
+        """
+        if self.archive is None:
+            return False
+        segment, offset, length = await self._redis_client.hmget(
+            self.meta_key, ["archived_segment", "archived_offset", "archived_length"]
+        )
+        if segment is None:
+            return False
+
+        pointer = SegmentPointer(segment=_as_text(segment), offset=int(offset), length=int(length))
+        # Checks the record's key before anything is written, so a misplaced pointer never
+        # restores another thread's history into this one.
+        record = await asyncio.to_thread(self.archive.read, pointer, self.redis_key)
+
+        # A concurrent rehydration may win the race; either way the history is back.
+        restored = await self._restore_script(
+            keys=self._archive_script_keys(),
+            args=[pointer.segment, pointer.offset, self.thread_id, len(record.entries), *record.entries, *record.token_counts],
+        )
+        if restored and self.cluster:
+            await self._redis_client.srem(archived_set_key(self.key_prefix, cluster=True), self.thread_id)
+        if self.message_cache is not None:
+            self.message_cache.invalidate(self.redis_key)
+        return True
+
+    def _archive_script_keys(self) -> list[str]:
+        keys = [self.redis_key, self.meta_key, self.tokens_key]
+        if not self.cluster:
+            keys.append(archived_set_key(self.key_prefix))
+        return keys
+
     async def serialize_state(self, **kwargs: Any) -> Any:
         """Serialize the current store state for persistence.
 
@@ -100,6 +777,12 @@ class RedisChatMessageStore:
             redis_url=self.redis_url,
             key_prefix=self.key_prefix,
             max_messages=self.max_messages,
+            context_window=self.context_window,
+            max_tokens=self.max_tokens,
+            context_token_budget=self.context_token_budget,
+            codec=self.codec.name,
+            compress_threshold=self.codec.compress_threshold,
+            cluster=self.cluster,
         )
         return state.model_dump(**kwargs)
 
@@ -112,14 +795,23 @@ class RedisChatMessageStore:
         """
         if serialized_store_state:
             state = RedisStoreState.model_validate(serialized_store_state, **kwargs)
+            _check_codec_version(state)
             self.thread_id = state.thread_id
             self.key_prefix = state.key_prefix
             self.max_messages = state.max_messages
+            self.context_window = state.context_window
+            self.max_tokens = state.max_tokens
+            self.context_token_budget = state.context_token_budget
+            self.codec = get_codec(state.codec, state.compress_threshold)
+            self.cluster = state.cluster
 
-            # Recreate Redis client if the URL changed
+            # Switch to the shared client for the new URL if it changed
             if state.redis_url and state.redis_url != self.redis_url:
+                await self.aclose()
                 self.redis_url = state.redis_url
-                self._redis_client = redis.from_url(self.redis_url, decode_responses=True)
+                self._redis_client = self._connection_registry.acquire(self.redis_url, cluster=self.cluster)
+                self._owns_client_reference = True
+                self._register_scripts()
 
     async def serialize(self, **kwargs: Any) -> dict[str, Any]:
         """Return a lightweight structure compatible with ChatMessageStoreState."""
@@ -139,6 +831,7 @@ class RedisChatMessageStore:
             raise ValueError("store_metadata missing from serialized_store_state")
 
         state = RedisStoreState.model_validate(redis_state, **kwargs)
+        _check_codec_version(state)
         redis_url = state.redis_url or kwargs.get("redis_url")
         if not isinstance(redis_url, str):
             raise ValueError("redis_url must be provided when deserializing RedisChatMessageStore")
@@ -148,6 +841,12 @@ class RedisChatMessageStore:
             thread_id=state.thread_id,
             key_prefix=state.key_prefix,
             max_messages=state.max_messages,
+            context_window=state.context_window,
+            max_tokens=state.max_tokens,
+            context_token_budget=state.context_token_budget,
+            codec=state.codec,
+            compress_threshold=state.compress_threshold,
+            cluster=state.cluster,
         )
 
     async def update_from_state(self, serialized_store_state: Any, **kwargs: Any) -> None:
@@ -157,8 +856,16 @@ class RedisChatMessageStore:
             return
         await self.deserialize_state(redis_state, **kwargs)
 
-    def _serialize_message(self, message: ChatMessage) -> str:
-        """Serialize a ChatMessage to JSON string."""
+    def _register_scripts(self) -> None:
+        """Bind the store's Lua scripts to the current client (EVALSHA with reload on NOSCRIPT)."""
+        self._append_script = self._redis_client.register_script(_APPEND_SCRIPT)
+        self._tail_within_budget_script = self._redis_client.register_script(_TAIL_WITHIN_BUDGET_SCRIPT)
+        self._archive_script = self._redis_client.register_script(_ARCHIVE_SCRIPT)
+        self._restore_script = self._redis_client.register_script(_RESTORE_SCRIPT)
+        self._partial_chunk_script = self._redis_client.register_script(_PARTIAL_CHUNK_SCRIPT)
+
+    def _serialize_message(self, message: ChatMessage) -> bytes:
+        """Serialize a ChatMessage to a Redis entry using the configured codec."""
         if hasattr(message, "to_dict"):
             message_dict = message.to_dict()
         elif hasattr(message, "model_dump"):
@@ -167,11 +874,11 @@ class RedisChatMessageStore:
             message_dict = message.model_dump()
         else:
             raise TypeError("ChatMessage does not support to_dict/model_dump serialization")
-        return json.dumps(message_dict, separators=(",", ":"))
+        return self.codec.encode(message_dict)
 
-    def _deserialize_message(self, serialized_message: str) -> ChatMessage:
-        """Deserialize a JSON string to ChatMessage."""
-        message_dict = json.loads(serialized_message)
+    def _deserialize_message(self, serialized_message: bytes | str) -> ChatMessage:
+        """Deserialize a Redis entry (written by any codec) to ChatMessage."""
+        message_dict = MessageCodec.decode(serialized_message)
         if hasattr(ChatMessage, "from_dict"):
             return ChatMessage.from_dict(message_dict)
         if hasattr(ChatMessage, "model_validate"):
@@ -179,9 +886,54 @@ class RedisChatMessageStore:
         raise TypeError("ChatMessage does not support from_dict/model_validate deserialization")
 
     async def clear(self) -> None:
-        """Remove all messages from the store."""
-        await self._redis_client.delete(self.redis_key)
+        """Remove all messages from the store.
+
+        The metadata hash survives with a bumped ``generation`` so caches in other
+        processes notice the reset even if new messages arrive right after it. The
+        thread is also dropped from the thread catalog, and any cold-tier stub is
+        discarded so the history is never rehydrated.
+        """
+        recent_key, counts_key = catalog_keys(self.key_prefix, self.cluster)
+        # A cluster pipeline cannot be a MULTI across the thread's and the catalog's slots.
+        async with self._redis_client.pipeline(transaction=not self.cluster) as pipe:
+            pipe.delete(self.redis_key, self.tokens_key, self.partial_key)
+            pipe.hset(self.meta_key, "tokens", 0)
+            pipe.hdel(self.meta_key, *_ARCHIVE_FIELDS)
+            pipe.hincrby(self.meta_key, "generation", 1)
+            pipe.zrem(recent_key, self.thread_id)
+            pipe.hdel(counts_key, self.thread_id)
+            pipe.srem(archived_set_key(self.key_prefix, self.cluster), self.thread_id)
+            await pipe.execute()
+        if self.message_cache is not None:
+            self.message_cache.invalidate(self.redis_key)
 
     async def aclose(self) -> None:
-        """Close the Redis connection."""
-        await self._redis_client.aclose()
\ No newline at end of file
+        """Release this store's reference to the shared Redis client.
+
+        The underlying pool is disconnected once every store using the URL has closed.
+        Calling ``aclose`` more than once is safe.
+        """
+        if self._owns_client_reference:
+            self._owns_client_reference = False
+            await self._connection_registry.release(self.redis_url)
+
+
+def _check_codec_version(state: RedisStoreState) -> None:
+    if state.codec_version > CODEC_VERSION:
+        raise ValueError(
+            f"Thread '{state.thread_id}' was written with codec version {state.codec_version}, "
+            f"but this store only understands up to version {CODEC_VERSION}. Upgrade the store."
+        )
+
+
+def _keep_newest(items: list, length: int) -> list:
+    return items[len(items) - length :] if len(items) > length else items
+
+
+def _stream_fields(fields: dict) -> dict[str, Any]:
+    return {_as_text(name): value for name, value in fields.items()}
+
+
+def _stream_id(entry_id: bytes | str) -> tuple[int, int]:
+    milliseconds, sequence = _as_text(entry_id).split("-")
+    return int(milliseconds), int(sequence)
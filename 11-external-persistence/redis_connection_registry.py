@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+
+
+@dataclass
+class _RegistryEntry:
+    client: redis.Redis | redis.RedisCluster
+    # None for cluster clients, which manage one pool per node themselves.
+    pool: redis.ConnectionPool | None
+    references: int = 0
+
+
+class RedisConnectionRegistry:
+    """Process-wide registry that hands out one pooled Redis client per URL.
+
+    Every RedisChatMessageStore used to call ``redis.from_url`` and therefore opened
+    its own pool (socket + TLS handshake) per conversation. The registry keeps a single
+    ``BlockingConnectionPool`` per URL, counts the stores holding it, and disconnects the
+    pool only when the last store calls ``aclose``. A blocking pool makes callers wait for
+    a free connection instead of failing when ``max_connections`` is reached.
+
+    Cluster URLs get a ``RedisCluster`` client instead, which discovers the shards and
+    keeps up to ``max_connections`` connections per node.
+
+    redis.asyncio pools are bound to the event loop that first uses them, so share one
+    registry per loop (the lab apps run a single ``asyncio.run`` loop).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        health_check_interval: int = 30,
+        pool_timeout: float | None = 20,
+        socket_keepalive: bool = True,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            max_connections: Maximum open connections per Redis URL.
+            health_check_interval: Seconds a connection may sit idle before it is
+                                   pinged on checkout (0 disables health checks).
+            pool_timeout: Seconds to wait for a free connection before raising.
+            socket_keepalive: Enable TCP keep-alive on pooled sockets.
+        """
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
+        self.pool_timeout = pool_timeout
+        self.socket_keepalive = socket_keepalive
+        self._entries: dict[str, _RegistryEntry] = {}
+
+    def acquire(self, redis_url: str, cluster: bool = False) -> redis.Redis | redis.RedisCluster:
+        """Return the shared client for ``redis_url`` and take a reference to it.
+
+        Args:
+            redis_url: Connection URL; for a cluster, any node's address.
+            cluster: Build a cluster-aware client. The first caller for a URL decides.
+        """
+        entry = self._entries.get(redis_url)
+        if entry is None and cluster:
+            client = redis.RedisCluster.from_url(
+                redis_url,
+                decode_responses=False,
+                max_connections=self.max_connections,
+                health_check_interval=self.health_check_interval,
+                socket_keepalive=self.socket_keepalive,
+            )
+            entry = _RegistryEntry(client=client, pool=None)
+            self._entries[redis_url] = entry
+        elif entry is None:
+            pool = redis.BlockingConnectionPool.from_url(
+                redis_url,
+                # Entries may be binary (msgpack/compressed), so responses stay as bytes.
+                decode_responses=False,
+                max_connections=self.max_connections,
+                timeout=self.pool_timeout,
+                health_check_interval=self.health_check_interval,
+                socket_keepalive=self.socket_keepalive,
+            )
+            entry = _RegistryEntry(client=redis.Redis(connection_pool=pool), pool=pool)
+            self._entries[redis_url] = entry
+        entry.references += 1
+        return entry.client
+
+    async def release(self, redis_url: str) -> None:
+        """Drop a reference; the pool is disconnected when the last holder releases it."""
+        entry = self._entries.get(redis_url)
+        if entry is None:
+            return
+        entry.references -= 1
+        if entry.references > 0:
+            return
+        del self._entries[redis_url]
+        await entry.client.aclose()
+        if entry.pool is not None:
+            await entry.pool.disconnect()
+
+    def references(self, redis_url: str) -> int:
+        """Number of live references held on the client for ``redis_url``."""
+        entry = self._entries.get(redis_url)
+        return entry.references if entry is not None else 0
+
+    async def aclose(self) -> None:
+        """Disconnect every pool regardless of outstanding references (process shutdown)."""
+        entries, self._entries = self._entries, {}
+        for entry in entries.values():
+            await entry.client.aclose()
+            if entry.pool is not None:
+                await entry.pool.disconnect()
+
+
+# Shared by every RedisChatMessageStore that is not given an explicit registry or client.
+default_registry = RedisConnectionRegistry()
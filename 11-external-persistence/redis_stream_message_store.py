@@ -0,0 +1,369 @@
+import contextlib
+import time
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+from uuid import uuid4
+
+import redis.asyncio as redis
+from agent_framework import ChatMessage
+from pydantic import BaseModel
+
+from message_codecs import CODEC_VERSION, MessageCodec, get_codec
+from redis_chat_message_store import LOCK_KEY_SUFFIX, META_KEY_SUFFIX
+from redis_connection_registry import RedisConnectionRegistry, default_registry
+from thread_catalog import RedisThreadCatalog, _as_text, catalog_keys
+from thread_lock import RedisThreadLock, StaleLeaseError, ThreadLease
+
+# Stream field holding the codec-encoded message.
+MESSAGE_FIELD = "m"
+# Id that sorts before every stream entry; reading "since" it returns the whole stream.
+STREAM_START_ID = "0-0"
+
+# Appends entries (with exact MAXLEN retention) and refreshes the thread catalog atomically.
+# KEYS: stream, catalog recency zset, catalog count hash, metadata hash.
+# ARGV: max_messages (0 = unlimited), activity timestamp, thread id,
+#       fencing token (0 = no lease), entries...
+_XADD_SCRIPT = """
+local fence = tonumber(ARGV[4])
+if fence > 0 and (tonumber(redis.call('HGET', KEYS[4], 'fence')) or 0) ~= fence then
+    return {-2, {}}
+end
+local max_messages = tonumber(ARGV[1])
+local ids = {}
+for i = 5, #ARGV do
+    if max_messages > 0 then
+        ids[#ids + 1] = redis.call('XADD', KEYS[1], 'MAXLEN', max_messages, '*', 'm', ARGV[i])
+    else
+        ids[#ids + 1] = redis.call('XADD', KEYS[1], '*', 'm', ARGV[i])
+    end
+end
+local length = redis.call('XLEN', KEYS[1])
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+redis.call('HSET', KEYS[3], ARGV[3], length)
+return {length, ids}
+"""
+
+
+class RedisStreamStoreState(BaseModel):
+    """State model for serializing and deserializing Redis stream store data."""
+
+    thread_id: str
+    redis_url: str | None = None
+    key_prefix: str = "chat_streams"
+    max_messages: int | None = None
+    context_window: int | None = None
+    last_seen_id: str = STREAM_START_ID
+    codec: str = "json"
+    compress_threshold: int = 1024
+    codec_version: int = CODEC_VERSION
+
+
+class RedisStreamChatMessageStore:
+    """Redis-backed implementation of ChatMessageStore using Redis Streams.
+
+    Every message gets a stable, monotonically increasing stream id, so a reader can ask
+    for "messages since my last look" (``read_since``) instead of re-reading the whole
+    history, and other processes can follow a conversation live with a blocking ``tail``.
+    Retention uses ``XADD ... MAXLEN``. The serialization protocol matches
+    ``RedisChatMessageStore``, so the agent factory can pick either backend.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        thread_id: str | None = None,
+        key_prefix: str = "chat_streams",
+        max_messages: int | None = None,
+        context_window: int | None = None,
+        last_seen_id: str = STREAM_START_ID,
+        codec: str | MessageCodec = "json",
+        compress_threshold: int = 1024,
+        redis_client: redis.Redis | None = None,
+        connection_registry: RedisConnectionRegistry | None = None,
+    ) -> None:
+        """Initialize the Redis stream chat message store.
+
+        Args:
+            redis_url: Redis connection URL (for example, "redis://localhost:6379").
+            thread_id: Unique identifier for this conversation thread.
+                      If not provided, a UUID will be auto-generated.
+            key_prefix: Prefix for Redis keys. Use a different prefix than the list-based
+                        store: both keep one key per thread under ``prefix:thread_id``.
+            max_messages: Maximum number of stream entries to retain (exact ``MAXLEN``).
+            context_window: Number of most recent messages handed to the agent by
+                            ``list_messages``. ``None`` returns the whole stream.
+            last_seen_id: Stream id this reader has consumed up to; ``read_since`` resumes
+                          after it. Persisted in state.
+            codec: Wire format for new entries (see ``RedisChatMessageStore``).
+            compress_threshold: Encoded size in bytes from which compression kicks in.
+            redis_client: Optional pre-built async Redis client. The caller owns it, so
+                          ``aclose`` leaves it open.
+            connection_registry: Registry that hands out the pooled client shared by every
+                                 store using the same URL. Defaults to ``default_registry``.
+        """
+        if redis_url is None:
+            raise ValueError("redis_url is required for Redis connection")
+
+        self.redis_url = redis_url
+        self.thread_id = thread_id or f"thread_{uuid4()}"
+        self.key_prefix = key_prefix
+        self.max_messages = max_messages
+        self.context_window = context_window
+        self.last_seen_id = last_seen_id
+        self.codec = get_codec(codec, compress_threshold)
+        # Set while this store holds the thread's lease; appends carry it.
+        self.fencing_token: int | None = None
+
+        self._connection_registry = connection_registry or default_registry
+        self._owns_client_reference = redis_client is None
+        self._redis_client = redis_client or self._connection_registry.acquire(redis_url)
+        self._register_scripts()
+
+    @property
+    def redis_key(self) -> str:
+        """Get the Redis key of this thread's stream."""
+        return f"{self.key_prefix}:{self.thread_id}"
+
+    @property
+    def meta_key(self) -> str:
+        """Get the Redis key of this thread's metadata hash (lease fencing counter)."""
+        return f"{self.redis_key}{META_KEY_SUFFIX}"
+
+    @property
+    def lock_key(self) -> str:
+        """Get the Redis key of this thread's lease."""
+        return f"{self.redis_key}{LOCK_KEY_SUFFIX}"
+
+    @contextlib.asynccontextmanager
+    async def thread_lock(self, ttl_seconds: float = 30.0, wait_timeout: float | None = 10.0) -> AsyncIterator[ThreadLease]:
+        """Hold this thread's lease for an agent turn (see ``RedisChatMessageStore.thread_lock``)."""
+        lock = RedisThreadLock(self._redis_client, self.lock_key, self.meta_key, ttl_seconds, wait_timeout)
+        lease = await lock.acquire()
+        self.fencing_token = lease.fencing_token
+        try:
+            yield lease
+        finally:
+            self.fencing_token = None
+            await lock.release()
+
+    async def add_messages(self, messages: Sequence[ChatMessage]) -> int:
+        """Append messages to the stream in one round trip.
+
+        Args:
+            messages: Sequence of ChatMessage objects to add to the store.
+
+        Returns:
+            Length of the stream after the append (and trim, if configured). An empty
+            append writes nothing and reads the current length with a single XLEN.
+        """
+        if not messages:
+            return await self._redis_client.xlen(self.redis_key)
+
+        recent_key, counts_key = catalog_keys(self.key_prefix)
+        length, _ = await self._xadd_script(
+            keys=[self.redis_key, recent_key, counts_key, self.meta_key],
+            args=[
+                self.max_messages or 0,
+                time.time(),
+                self.thread_id,
+                self.fencing_token or 0,
+                *(self._serialize_message(msg) for msg in messages),
+            ],
+        )
+        if length == -2:
+            raise StaleLeaseError(
+                f"Lease on thread '{self.thread_id}' expired and was taken over (fencing token {self.fencing_token})."
+            )
+        return length
+
+    async def list_messages(self) -> list[ChatMessage]:
+        """Get the messages used to hydrate the next agent run.
+
+        Returns:
+            List of ChatMessage objects in chronological order (oldest first), limited
+            to the newest ``context_window`` messages when set.
+        """
+        if self.context_window is None:
+            return await self.get_messages()
+        return await self.list_recent_messages(self.context_window)
+
+    async def get_messages(self) -> list[ChatMessage]:
+        """Return the whole stream, oldest first."""
+        entries = await self._redis_client.xrange(self.redis_key)
+        return [message for _, message in self._decode_entries(entries)]
+
+    async def list_recent_messages(self, count: int) -> list[ChatMessage]:
+        """Return the newest ``count`` messages in chronological order."""
+        if count <= 0:
+            return []
+        entries = await self._redis_client.xrevrange(self.redis_key, count=count)
+        return [message for _, message in self._decode_entries(reversed(entries))]
+
+    async def read_since(self, last_id: str | None = None, count: int | None = None) -> list[tuple[str, ChatMessage]]:
+        """Return messages added after ``last_id`` without re-reading older history.
+
+        Args:
+            last_id: Exclusive lower bound. Defaults to ``last_seen_id``, which then
+                     advances to the newest id returned.
+            count: Maximum number of entries to return.
+
+        Returns:
+            ``(stream id, message)`` pairs, oldest first.
+        """
+        advance_cursor = last_id is None
+        response = await self._redis_client.xread({self.redis_key: last_id or self.last_seen_id}, count=count)
+        entries = self._decode_entries(response[0][1]) if response else []
+        if advance_cursor and entries:
+            self.last_seen_id = entries[-1][0]
+        return entries
+
+    async def tail(
+        self, last_id: str = "$", block_ms: int = 5_000, count: int = 100
+    ) -> AsyncIterator[tuple[str, ChatMessage]]:
+        """Follow the conversation live, yielding ``(stream id, message)`` as they arrive.
+
+        Each ``XREAD BLOCK`` holds a pooled connection until data arrives or ``block_ms``
+        elapses, so give long-running tails their own registry if the pool is small.
+
+        Args:
+            last_id: Start after this id; ``"$"`` (default) yields only new messages.
+            block_ms: Milliseconds each XREAD waits for new entries before polling again.
+            count: Maximum entries fetched per XREAD.
+        """
+        if last_id == "$":
+            # Resolve "$" once; re-sending it would skip entries added between reads.
+            newest = await self._redis_client.xrevrange(self.redis_key, count=1)
+            last_id = _as_text(newest[0][0]) if newest else STREAM_START_ID
+        while True:
+            response = await self._redis_client.xread({self.redis_key: last_id}, count=count, block=block_ms)
+            if not response:
+                continue
+            for entry_id, message in self._decode_entries(response[0][1]):
+                last_id = entry_id
+                yield entry_id, message
+
+    def thread_catalog(self) -> RedisThreadCatalog:
+        """Return the catalog of threads stored under this store's key prefix."""
+        return RedisThreadCatalog(self._redis_client, self.key_prefix)
+
+    async def serialize_state(self, **kwargs: Any) -> Any:
+        """Serialize the current store state for persistence.
+
+        Returns:
+            Dictionary containing serialized store configuration.
+        """
+        state = RedisStreamStoreState(
+            thread_id=self.thread_id,
+            redis_url=self.redis_url,
+            key_prefix=self.key_prefix,
+            max_messages=self.max_messages,
+            context_window=self.context_window,
+            last_seen_id=self.last_seen_id,
+            codec=self.codec.name,
+            compress_threshold=self.codec.compress_threshold,
+        )
+        return state.model_dump(**kwargs)
+
+    async def deserialize_state(self, serialized_store_state: Any, **kwargs: Any) -> None:
+        """Deserialize state data into this store instance.
+
+        Args:
+            serialized_store_state: Previously serialized state data.
+            **kwargs: Additional arguments for deserialization.
+        """
+        if serialized_store_state:
+            state = RedisStreamStoreState.model_validate(serialized_store_state, **kwargs)
+            _check_codec_version(state)
+            self.thread_id = state.thread_id
+            self.key_prefix = state.key_prefix
+            self.max_messages = state.max_messages
+            self.context_window = state.context_window
+            self.last_seen_id = state.last_seen_id
+            self.codec = get_codec(state.codec, state.compress_threshold)
+
+            # Switch to the shared client for the new URL if it changed
+            if state.redis_url and state.redis_url != self.redis_url:
+                await self.aclose()
+                self.redis_url = state.redis_url
+                self._redis_client = self._connection_registry.acquire(self.redis_url)
+                self._owns_client_reference = True
+                self._register_scripts()
+
+    async def serialize(self, **kwargs: Any) -> dict[str, Any]:
+        """Return a lightweight structure compatible with ChatMessageStoreState."""
+        state = await self.serialize_state(**kwargs)
+        return {"messages": [], "store_metadata": state}
+
+    @classmethod
+    async def deserialize(cls, serialized_store_state: Any, **kwargs: Any) -> "RedisStreamChatMessageStore":
+        """Return a new store instance from serialized state."""
+        if not serialized_store_state:
+            raise ValueError("serialized_store_state is required to deserialize RedisStreamChatMessageStore")
+
+        stream_state = serialized_store_state.get("store_metadata")
+        if stream_state is None:
+            raise ValueError("store_metadata missing from serialized_store_state")
+
+        state = RedisStreamStoreState.model_validate(stream_state, **kwargs)
+        _check_codec_version(state)
+        redis_url = state.redis_url or kwargs.get("redis_url")
+        if not isinstance(redis_url, str):
+            raise ValueError("redis_url must be provided when deserializing RedisStreamChatMessageStore")
+
+        return cls(
+            redis_url=redis_url,
+            thread_id=state.thread_id,
+            key_prefix=state.key_prefix,
+            max_messages=state.max_messages,
+            context_window=state.context_window,
+            last_seen_id=state.last_seen_id,
+            codec=state.codec,
+            compress_threshold=state.compress_threshold,
+        )
+
+    async def update_from_state(self, serialized_store_state: Any, **kwargs: Any) -> None:
+        """Update this instance with serialized state (protocol helper)."""
+        stream_state = serialized_store_state.get("store_metadata") if serialized_store_state else None
+        if not stream_state:
+            return
+        await self.deserialize_state(stream_state, **kwargs)
+
+    def _register_scripts(self) -> None:
+        """Bind the store's Lua scripts to the current client (EVALSHA with reload on NOSCRIPT)."""
+        self._xadd_script = self._redis_client.register_script(_XADD_SCRIPT)
+
+    def _serialize_message(self, message: ChatMessage) -> bytes:
+        """Serialize a ChatMessage to a stream field value using the configured codec."""
+        return self.codec.encode(message.to_dict())
+
+    def _decode_entries(self, entries: Any) -> list[tuple[str, ChatMessage]]:
+        """Turn raw ``(id, {field: value})`` stream entries into ``(id, ChatMessage)`` pairs."""
+        decoded = []
+        for entry_id, fields in entries:
+            payload = fields.get(MESSAGE_FIELD.encode()) or fields.get(MESSAGE_FIELD)
+            decoded.append((_as_text(entry_id), ChatMessage.from_dict(MessageCodec.decode(payload))))
+        return decoded
+
+    async def clear(self) -> None:
+        """Delete the stream and drop the thread from the thread catalog."""
+        recent_key, counts_key = catalog_keys(self.key_prefix)
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(self.redis_key)
+            pipe.zrem(recent_key, self.thread_id)
+            pipe.hdel(counts_key, self.thread_id)
+            await pipe.execute()
+        self.last_seen_id = STREAM_START_ID
+
+    async def aclose(self) -> None:
+        """Release this store's reference to the shared Redis client (safe to call twice)."""
+        if self._owns_client_reference:
+            self._owns_client_reference = False
+            await self._connection_registry.release(self.redis_url)
+
+
+def _check_codec_version(state: RedisStreamStoreState) -> None:
+    if state.codec_version > CODEC_VERSION:
+        raise ValueError(
+            f"Thread '{state.thread_id}' was written with codec version {state.codec_version}, "
+            f"but this store only understands up to version {CODEC_VERSION}. Upgrade the store."
+        )
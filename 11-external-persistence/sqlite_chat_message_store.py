@@ -0,0 +1,446 @@
+"""SQLite-backed ChatMessageStore for single-node deployments.
+
+Redis is more than a single machine needs, and one JSON file per thread (lab 10) has
+to be rewritten or replayed in full. This store keeps every thread in one SQLite file:
+
+- ``messages`` holds one row per message, indexed by ``(thread_id, seq)``, so the tail
+  window handed to the agent is an index range scan regardless of history length.
+- ``threads`` keeps each thread's next sequence number, message count and last activity,
+  which doubles as the thread catalog for pickers.
+- ``messages_fts`` is an FTS5 index over message text, maintained by triggers.
+
+The database runs in WAL mode, so readers never block the writer, and ``add_messages``
+inserts a whole turn in one transaction. SQLite calls are blocking, so they run in a
+worker thread; every store opened on the same file shares one connection.
+"""
+
+import asyncio
+import contextlib
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+from uuid import uuid4
+
+from agent_framework import ChatMessage
+from pydantic import BaseModel
+
+from message_codecs import CODEC_VERSION, MessageCodec, get_codec
+from thread_catalog import ThreadSummary
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS messages_by_thread ON messages (thread_id, seq);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    next_seq INTEGER NOT NULL,
+    message_count INTEGER NOT NULL,
+    last_activity REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_by_activity ON threads (last_activity);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(text, content='messages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+class SqliteDatabase:
+    """One connection to a store database, shared by every store opened on the file.
+
+    Calls are serialized with a lock and meant to run in worker threads
+    (see :meth:`run`), so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: str | Path, busy_timeout: float = 5.0) -> None:
+        self.path = str(path)
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE.
+        self.connection = sqlite3.connect(
+            self.path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; a power cut can lose the last commits but never corrupts WAL.
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self.connection.executescript(_SCHEMA)
+        except sqlite3.OperationalError as exc:
+            self.connection.close()
+            raise RuntimeError(f"SQLite at {self.path} could not create the schema (is FTS5 available?): {exc}") from exc
+
+    async def run(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``function(connection)`` in a worker thread while holding the connection lock."""
+
+        def call() -> T:
+            with self._lock:
+                return function(self.connection)
+
+        return await asyncio.to_thread(call)
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+
+_databases: dict[str, tuple[SqliteDatabase, int]] = {}
+_databases_lock = threading.Lock()
+
+
+def _acquire_database(path: str) -> SqliteDatabase:
+    key = str(Path(path).resolve())
+    with _databases_lock:
+        database, references = _databases.get(key, (None, 0))
+        if database is None:
+            database = SqliteDatabase(path)
+        _databases[key] = (database, references + 1)
+        return database
+
+
+def _release_database(path: str) -> None:
+    key = str(Path(path).resolve())
+    with _databases_lock:
+        database, references = _databases.get(key, (None, 0))
+        if database is None:
+            return
+        if references > 1:
+            _databases[key] = (database, references - 1)
+            return
+        del _databases[key]
+    database.close()
+
+
+@dataclass
+class SearchHit:
+    """A message matched by :meth:`SqliteChatMessageStore.search`."""
+
+    thread_id: str
+    seq: int
+    message: ChatMessage
+
+
+class SqliteStoreState(BaseModel):
+    """State model for serializing and deserializing SQLite chat message store data."""
+
+    thread_id: str
+    database_path: str
+    max_messages: int | None = None
+    context_window: int | None = None
+    codec: str = "json"
+    compress_threshold: int = 1024
+    codec_version: int = CODEC_VERSION
+
+
+class SqliteChatMessageStore:
+    """SQLite-backed implementation of ChatMessageStore.
+
+    Follows the same protocol as ``RedisChatMessageStore`` (``serialize`` keeps only the
+    store settings; the history stays in the database), so the agent factory can pick
+    either backend.
+    """
+
+    def __init__(
+        self,
+        database_path: str | Path,
+        thread_id: str | None = None,
+        max_messages: int | None = None,
+        context_window: int | None = None,
+        codec: str | MessageCodec = "json",
+        compress_threshold: int = 1024,
+    ) -> None:
+        """Initialize the SQLite chat message store.
+
+        Args:
+            database_path: SQLite file holding every thread; created on first use.
+            thread_id: Unique identifier for this conversation thread.
+                      If not provided, a UUID will be auto-generated.
+            max_messages: Maximum number of messages to retain per thread.
+                         When exceeded, the oldest rows are deleted in the same transaction.
+            context_window: Number of most recent messages handed to the agent by
+                            ``list_messages``. ``None`` returns the whole thread.
+            codec: Encoding of the stored message payloads (see ``message_codecs``).
+            compress_threshold: Encoded size in bytes from which compression kicks in.
+        """
+        self.database_path = str(database_path)
+        self.thread_id = thread_id or f"thread_{uuid4()}"
+        self.max_messages = max_messages
+        self.context_window = context_window
+        self.codec = get_codec(codec, compress_threshold)
+        self._database: SqliteDatabase | None = _acquire_database(self.database_path)
+
+    @property
+    def database(self) -> SqliteDatabase:
+        """Shared connection to ``database_path``."""
+        if self._database is None:
+            raise RuntimeError("SqliteChatMessageStore is closed")
+        return self._database
+
+    @contextlib.asynccontextmanager
+    async def thread_lock(self, **_: Any) -> AsyncIterator[None]:
+        """Serialize agent turns on this thread within the process.
+
+        SQLite transactions already serialize writers across processes; this only keeps
+        two turns in one process from interleaving, mirroring ``RedisChatMessageStore``.
+        """
+        async with _thread_locks.setdefault((self.database_path, self.thread_id), asyncio.Lock()):
+            yield None
+
+    async def add_messages(self, messages: Sequence[ChatMessage]) -> int:
+        """Append messages in one transaction and apply ``max_messages`` retention.
+
+        Returns:
+            Number of messages stored for the thread after the append.
+        """
+        rows = [
+            (
+                getattr(message.role, "value", message.role),
+                message.text or "",
+                self.codec.encode(message.to_dict()),
+            )
+            for message in messages
+        ]
+        thread_id, max_messages, now = self.thread_id, self.max_messages, time.time()
+
+        def append(connection: sqlite3.Connection) -> int:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT next_seq, message_count FROM threads WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                next_seq, count = row if row else (0, 0)
+                connection.executemany(
+                    "INSERT INTO messages (thread_id, seq, role, text, payload) VALUES (?, ?, ?, ?, ?)",
+                    [(thread_id, next_seq + offset, *values) for offset, values in enumerate(rows)],
+                )
+                next_seq += len(rows)
+                count += len(rows)
+                if max_messages is not None and count > max_messages:
+                    trimmed = connection.execute(
+                        "DELETE FROM messages WHERE thread_id = ? AND seq < ?", (thread_id, next_seq - max_messages)
+                    )
+                    count -= trimmed.rowcount
+                connection.execute(
+                    "INSERT OR REPLACE INTO threads (thread_id, next_seq, message_count, last_activity) "
+                    "VALUES (?, ?, ?, ?)",
+                    (thread_id, next_seq, count, now),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return count
+
+        if not rows:
+            return await self.message_count()
+        return await self.database.run(append)
+
+    async def message_count(self) -> int:
+        """Number of messages stored for this thread."""
+        row = await self.database.run(
+            lambda connection: connection.execute(
+                "SELECT message_count FROM threads WHERE thread_id = ?", (self.thread_id,)
+            ).fetchone()
+        )
+        return row[0] if row else 0
+
+    async def list_messages(self) -> list[ChatMessage]:
+        """Get the messages used to hydrate the next agent run.
+
+        Returns:
+            List of ChatMessage objects in chronological order (oldest first), limited
+            to the newest ``context_window`` messages when set.
+        """
+        if self.context_window is None:
+            return await self.get_messages()
+        return await self.list_recent_messages(self.context_window)
+
+    async def get_messages(self) -> list[ChatMessage]:
+        """Return the whole thread, oldest first."""
+        payloads = await self.database.run(
+            lambda connection: connection.execute(
+                "SELECT payload FROM messages WHERE thread_id = ? ORDER BY seq", (self.thread_id,)
+            ).fetchall()
+        )
+        return [self._deserialize_message(payload) for (payload,) in payloads]
+
+    async def list_recent_messages(self, count: int) -> list[ChatMessage]:
+        """Return the newest ``count`` messages in chronological order (an index range scan)."""
+        if count <= 0:
+            return []
+        payloads = await self.database.run(
+            lambda connection: connection.execute(
+                "SELECT payload FROM messages WHERE thread_id = ? ORDER BY seq DESC LIMIT ?", (self.thread_id, count)
+            ).fetchall()
+        )
+        return [self._deserialize_message(payload) for (payload,) in reversed(payloads)]
+
+    async def search(self, query: str, limit: int = 20, all_threads: bool = False) -> list[SearchHit]:
+        """Full-text search over message text, best matches first.
+
+        Args:
+            query: FTS5 query, e.g. ``lisbon`` or ``"rain jacket" OR umbrella``.
+            limit: Maximum number of hits.
+            all_threads: Search every thread in the database instead of only this one.
+        """
+        sql = (
+            "SELECT m.thread_id, m.seq, m.payload FROM messages_fts "
+            "JOIN messages AS m ON m.id = messages_fts.rowid WHERE messages_fts MATCH ?"
+        )
+        params: tuple[Any, ...] = (query,)
+        if not all_threads:
+            sql += " AND m.thread_id = ?"
+            params += (self.thread_id,)
+        sql += " ORDER BY rank LIMIT ?"
+        rows = await self.database.run(lambda connection: connection.execute(sql, (*params, limit)).fetchall())
+        return [
+            SearchHit(thread_id=thread_id, seq=seq, message=self._deserialize_message(payload))
+            for thread_id, seq, payload in rows
+        ]
+
+    def thread_catalog(self) -> "SqliteThreadCatalog":
+        """Return the catalog of every thread in this store's database."""
+        return SqliteThreadCatalog(self.database)
+
+    async def serialize_state(self, **kwargs: Any) -> Any:
+        """Serialize the current store state for persistence.
+
+        Returns:
+            Dictionary containing serialized store configuration.
+        """
+        state = SqliteStoreState(
+            thread_id=self.thread_id,
+            database_path=self.database_path,
+            max_messages=self.max_messages,
+            context_window=self.context_window,
+            codec=self.codec.name,
+            compress_threshold=self.codec.compress_threshold,
+        )
+        return state.model_dump(**kwargs)
+
+    async def deserialize_state(self, serialized_store_state: Any, **kwargs: Any) -> None:
+        """Deserialize state data into this store instance.
+
+        Args:
+            serialized_store_state: Previously serialized state data.
+            **kwargs: Additional arguments for deserialization.
+        """
+        if serialized_store_state:
+            state = SqliteStoreState.model_validate(serialized_store_state, **kwargs)
+            _check_codec_version(state)
+            self.thread_id = state.thread_id
+            self.max_messages = state.max_messages
+            self.context_window = state.context_window
+            self.codec = get_codec(state.codec, state.compress_threshold)
+
+            if state.database_path != self.database_path:
+                await self.aclose()
+                self.database_path = state.database_path
+                self._database = _acquire_database(self.database_path)
+
+    async def serialize(self, **kwargs: Any) -> dict[str, Any]:
+        """Return a lightweight structure compatible with ChatMessageStoreState."""
+        state = await self.serialize_state(**kwargs)
+        return {"messages": [], "store_metadata": state}
+
+    @classmethod
+    async def deserialize(cls, serialized_store_state: Any, **kwargs: Any) -> "SqliteChatMessageStore":
+        """Return a new store instance from serialized state."""
+        if not serialized_store_state:
+            raise ValueError("serialized_store_state is required to deserialize SqliteChatMessageStore")
+
+        sqlite_state = serialized_store_state.get("store_metadata")
+        if sqlite_state is None:
+            raise ValueError("store_metadata missing from serialized_store_state")
+
+        state = SqliteStoreState.model_validate(sqlite_state, **kwargs)
+        _check_codec_version(state)
+        return cls(
+            database_path=state.database_path,
+            thread_id=state.thread_id,
+            max_messages=state.max_messages,
+            context_window=state.context_window,
+            codec=state.codec,
+            compress_threshold=state.compress_threshold,
+        )
+
+    async def update_from_state(self, serialized_store_state: Any, **kwargs: Any) -> None:
+        """Update this instance with serialized state (protocol helper)."""
+        sqlite_state = serialized_store_state.get("store_metadata") if serialized_store_state else None
+        if not sqlite_state:
+            return
+        await self.deserialize_state(sqlite_state, **kwargs)
+
+    def _deserialize_message(self, payload: bytes) -> ChatMessage:
+        return ChatMessage.from_dict(MessageCodec.decode(payload))
+
+    async def clear(self) -> None:
+        """Delete the thread's messages and drop it from the catalog."""
+        thread_id = self.thread_id
+
+        def clear(connection: sqlite3.Connection) -> None:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+                connection.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        await self.database.run(clear)
+
+    async def aclose(self) -> None:
+        """Release this store's reference to the shared connection (safe to call twice)."""
+        if self._database is not None:
+            self._database = None
+            _release_database(self.database_path)
+
+
+class SqliteThreadCatalog:
+    """Threads in a store database, most recently active first (mirrors ``RedisThreadCatalog``)."""
+
+    def __init__(self, database: SqliteDatabase) -> None:
+        self._database = database
+
+    async def count(self) -> int:
+        """Number of threads with stored messages."""
+        row = await self._database.run(lambda connection: connection.execute("SELECT COUNT(*) FROM threads").fetchone())
+        return row[0]
+
+    async def list_recent(self, offset: int = 0, limit: int = 20) -> list[ThreadSummary]:
+        """Return up to ``limit`` threads ordered by most recent activity."""
+        if limit <= 0:
+            return []
+        rows = await self._database.run(
+            lambda connection: connection.execute(
+                "SELECT thread_id, message_count, last_activity FROM threads "
+                "ORDER BY last_activity DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        )
+        return [ThreadSummary(thread_id=row[0], message_count=row[1], last_activity=row[2]) for row in rows]
+
+
+_thread_locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+
+def _check_codec_version(state: SqliteStoreState) -> None:
+    if state.codec_version > CODEC_VERSION:
+        raise ValueError(
+            f"Thread '{state.thread_id}' was written with codec version {state.codec_version}, "
+            f"but this store only understands up to version {CODEC_VERSION}. Upgrade the store."
+        )
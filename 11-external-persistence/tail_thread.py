@@ -0,0 +1,41 @@
+"""Follow a stream-backed conversation live from another shell.
+
+Run app.py with REDIS_STORE_BACKEND=stream, then point this script at the thread id
+printed in the menu: every message the agent stores is printed as it arrives.
+
+Usage:
+    python tail_thread.py <thread_id> [--prefix lab11-stream] [--from-start]
+"""
+
+import argparse
+import asyncio
+import os
+
+from redis_stream_message_store import STREAM_START_ID, RedisStreamChatMessageStore
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("thread_id", help="thread id (the part of the Redis key after the prefix)")
+    parser.add_argument("--prefix", default="lab11-stream", help="key prefix used by the stream store")
+    parser.add_argument("--from-start", action="store_true", help="replay existing history before tailing")
+    args = parser.parse_args()
+
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        raise RuntimeError(
+            "Set the REDIS_URL environment variable (e.g., redis://:<primary_key>@<host>:6380/0)."
+        )
+
+    store = RedisStreamChatMessageStore(redis_url=redis_url, thread_id=args.thread_id, key_prefix=args.prefix)
+    print(f"Tailing {store.redis_key} (Ctrl+C to stop)...\n")
+    try:
+        async for entry_id, message in store.tail(last_id=STREAM_START_ID if args.from_start else "$"):
+            role = message.role.value if hasattr(message.role, "value") else message.role
+            print(f"[{entry_id}] {role.upper()}: {message.text}")
+    finally:
+        await store.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Token-budget hydration of threads written before token counts were recorded.
+
+Run from this folder with ``python -m pytest test_redis_chat_message_store.py``; uses
+in-process fakeredis, so no Redis server is needed.
+"""
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from agent_framework import ChatMessage
+
+from message_cache import MessageCache
+from redis_chat_message_store import RedisChatMessageStore
+from token_budget import estimate_message_tokens
+
+# Every "mN" message costs the same with the default estimate.
+MESSAGE_TOKENS = estimate_message_tokens(ChatMessage(role="user", text="m0"))
+
+
+def _store(client, budget: int, cache: MessageCache | None) -> RedisChatMessageStore:
+    return RedisChatMessageStore(
+        redis_url="redis://fakeredis",
+        thread_id="legacy",
+        context_token_budget=budget,
+        message_cache=cache,
+        redis_client=client,
+    )
+
+
+async def _write_legacy_thread(client, store: RedisChatMessageStore, count: int) -> None:
+    """RPUSH messages the way the store did before it recorded a ``:tokens`` list."""
+    for index in range(count):
+        await client.rpush(store.redis_key, store._serialize_message(ChatMessage(role="user", text=f"m{index}")))
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_thread_without_token_counts_is_hydrated(use_cache: bool) -> None:
+    async def scenario() -> list[str]:
+        client = fakeredis.FakeAsyncRedis()
+        store = _store(client, 8_000, MessageCache() if use_cache else None)
+        await _write_legacy_thread(client, store, 6)
+        return [message.text for message in await store.list_messages()]
+
+    assert asyncio.run(scenario()) == [f"m{index}" for index in range(6)]
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_partial_token_counts_keep_older_messages_within_budget(use_cache: bool) -> None:
+    async def scenario() -> tuple[list[str], list[str]]:
+        client = fakeredis.FakeAsyncRedis()
+        cache = MessageCache() if use_cache else None
+        store = _store(client, 8_000, cache)
+        await _write_legacy_thread(client, store, 6)
+        # One new turn records counts for its messages only.
+        await store.add_messages([ChatMessage(role="user", text="m6")])
+        everything = [message.text for message in await store.list_messages()]
+        # Room for three messages: the counted newest one plus two counted on the fly.
+        tight = _store(client, 3 * MESSAGE_TOKENS, cache)
+        return everything, [message.text for message in await tight.list_messages()]
+
+    everything, tight = asyncio.run(scenario())
+    assert everything == [f"m{index}" for index in range(7)]
+    assert tight == ["m4", "m5", "m6"]
+
+
+def test_empty_append_reports_the_current_length() -> None:
+    async def scenario() -> int:
+        client = fakeredis.FakeAsyncRedis()
+        await _write_legacy_thread(client, _store(client, 8_000, None), 5)
+        # A fresh store attached to the existing thread has not appended anything yet.
+        return await _store(client, 8_000, None).add_messages([])
+
+    assert asyncio.run(scenario()) == 5
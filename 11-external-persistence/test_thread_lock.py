@@ -0,0 +1,43 @@
+"""Lease release when Redis errors out mid-turn.
+
+Run from this folder with ``python -m pytest test_thread_lock.py``; uses in-process
+fakeredis, so no Redis server is needed.
+"""
+
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from thread_lock import RedisThreadLock
+
+
+def _failing_script(*args: object, **kwargs: object) -> object:
+    raise RedisConnectionError("connection lost")
+
+
+def test_renew_failure_still_releases_the_lease() -> None:
+    async def scenario() -> tuple[bytes | None, object]:
+        client = fakeredis.FakeAsyncRedis()
+        lock = RedisThreadLock(client, "thread:lock", "thread:meta", ttl_seconds=0.03)
+        await lock.acquire()
+        lock._extend_script = _failing_script
+        await asyncio.sleep(0.05)  # at least one renewal attempt fails
+        await lock.release()
+        return await client.get("thread:lock"), lock.lease
+
+    assert asyncio.run(scenario()) == (None, None)
+
+
+def test_release_failure_does_not_replace_the_turn_error() -> None:
+    async def scenario() -> None:
+        lock = RedisThreadLock(fakeredis.FakeAsyncRedis(), "thread:lock", "thread:meta")
+        async with lock:
+            lock._release_script = _failing_script
+            raise KeyError("turn failed")
+
+    with pytest.raises(KeyError, match="turn failed"):
+        asyncio.run(scenario())
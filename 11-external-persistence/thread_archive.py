@@ -0,0 +1,281 @@
+"""Cold-tier storage for idle Redis threads.
+
+Threads that have been idle longer than a TTL are moved out of Redis memory into
+compressed, append-only segment files on local disk. Redis keeps only a stub: the
+thread's metadata hash records where its history lives (segment, offset, length),
+and the thread stays in the catalog. ``RedisChatMessageStore`` rehydrates the thread
+transparently the next time it is read or appended to.
+
+Segments are never rewritten. Rehydrating a thread leaves its old record behind as
+dead space; delete segments wholesale once every thread they hold is back in Redis
+or no longer needed.
+"""
+
+import asyncio
+import contextlib
+import os
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from redis_chat_message_store import RedisChatMessageStore
+    from thread_catalog import RedisThreadCatalog
+
+_RECORD_MAGIC = b"LB11"
+# Held while a record is appended, so separate processes (overlapping sweeps) never interleave.
+_APPEND_LOCK_NAME = ".append.lock"
+_RECORD_HEADER = struct.Struct(">4sI")
+_UINT32 = struct.Struct(">I")
+
+
+class ArchiveRecordError(ValueError):
+    """A segment pointer does not lead to a valid record of the expected thread."""
+
+
+@dataclass
+class ArchivedThread:
+    """Raw Redis entries (as stored, already codec-encoded) plus their token counts."""
+
+    redis_key: str
+    entries: list[bytes]
+    token_counts: list[int]
+
+
+@dataclass(frozen=True)
+class SegmentPointer:
+    """Location of one archived thread inside a segment file."""
+
+    segment: str
+    offset: int
+    length: int
+
+
+class SegmentArchive:
+    """Append-only, zlib-compressed segment files holding archived threads.
+
+    Each record is ``magic | payload length | zlib(payload)``; the payload holds the
+    thread key, the raw entries and their token counts. Appends are fsync'd before the
+    pointer is returned, so Redis never references data that is not on disk. Appends hold
+    an OS file lock in the archive folder, so several processes can archive into it at
+    once. Methods are blocking and thread-safe; async callers run them with
+    ``asyncio.to_thread``.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], segment_max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Initialize the archive.
+
+        Args:
+            directory: Folder holding the segment files (created if missing).
+            segment_max_bytes: Size after which a new segment file is started.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+
+    def append(self, thread: ArchivedThread) -> SegmentPointer:
+        """Write ``thread`` to the current segment and return where it landed."""
+        record = _encode_record(thread)
+        with self._lock, _exclusive_file_lock(self.directory / _APPEND_LOCK_NAME):
+            path = self._current_segment(len(record))
+            with path.open("ab") as handle:
+                # The file's size under the lock is where this record starts; no other
+                # writer can append in between.
+                offset = os.fstat(handle.fileno()).st_size
+                handle.write(record)
+                handle.flush()
+                os.fsync(handle.fileno())
+        return SegmentPointer(segment=path.name, offset=offset, length=len(record))
+
+    def read(self, pointer: SegmentPointer, expected_key: str | None = None) -> ArchivedThread:
+        """Read the record at ``pointer``.
+
+        Args:
+            pointer: Where the record was written.
+            expected_key: Redis key of the thread the pointer was found on. A record of
+                          any other thread is rejected.
+
+        Raises:
+            ArchiveRecordError: If the bytes at ``pointer`` are not a complete record, or
+                                belong to another thread than ``expected_key``.
+        """
+        path = self.directory / Path(pointer.segment).name
+        with path.open("rb") as handle:
+            handle.seek(pointer.offset)
+            record = handle.read(pointer.length)
+        if len(record) != pointer.length:
+            raise ArchiveRecordError(f"Segment pointer {pointer} runs past the end of the segment")
+        try:
+            thread = _decode_record(record)
+        except (ValueError, struct.error, zlib.error) as exc:
+            raise ArchiveRecordError(f"Segment pointer {pointer} does not reference a valid record: {exc}") from exc
+        if expected_key is not None and thread.redis_key != expected_key:
+            raise ArchiveRecordError(
+                f"Archive record at {pointer} belongs to '{thread.redis_key}', not '{expected_key}'"
+            )
+        return thread
+
+    def _current_segment(self, incoming_bytes: int) -> Path:
+        segments = sorted(self.directory.glob("segment-*.seg"))
+        if segments:
+            latest = segments[-1]
+            if latest.stat().st_size + incoming_bytes <= self.segment_max_bytes:
+                return latest
+            index = int(latest.stem.split("-")[1]) + 1
+        else:
+            index = 1
+        return self.directory / f"segment-{index:06d}.seg"
+
+
+@contextlib.contextmanager
+def _exclusive_file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive OS lock on ``path`` (created if missing), blocking until it is free."""
+    with path.open("a+b") as handle:
+        if os.name == "nt":
+            import msvcrt
+
+            handle.seek(0)
+            while True:
+                try:
+                    # LK_LOCK retries for about 10 seconds before giving up; keep waiting.
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _encode_record(thread: ArchivedThread) -> bytes:
+    key = thread.redis_key.encode("utf-8")
+    parts = [_UINT32.pack(len(key)), key, _UINT32.pack(len(thread.entries))]
+    for entry in thread.entries:
+        parts.append(_UINT32.pack(len(entry)))
+        parts.append(entry)
+    parts.append(_UINT32.pack(len(thread.token_counts)))
+    parts.append(struct.pack(f">{len(thread.token_counts)}I", *thread.token_counts))
+    payload = zlib.compress(b"".join(parts), 6)
+    return _RECORD_HEADER.pack(_RECORD_MAGIC, len(payload)) + payload
+
+
+def _decode_record(record: bytes) -> ArchivedThread:
+    magic, payload_length = _RECORD_HEADER.unpack_from(record)
+    if magic != _RECORD_MAGIC:
+        raise ValueError("Segment pointer does not reference an archived thread record")
+    body = zlib.decompress(record[_RECORD_HEADER.size : _RECORD_HEADER.size + payload_length])
+
+    position = 0
+
+    def read_uint32() -> int:
+        nonlocal position
+        (value,) = _UINT32.unpack_from(body, position)
+        position += _UINT32.size
+        return value
+
+    key_length = read_uint32()
+    redis_key = body[position : position + key_length].decode("utf-8")
+    position += key_length
+    entries = []
+    for _ in range(read_uint32()):
+        entry_length = read_uint32()
+        entries.append(body[position : position + entry_length])
+        position += entry_length
+    token_count = read_uint32()
+    token_counts = list(struct.unpack_from(f">{token_count}I", body, position))
+    return ArchivedThread(redis_key=redis_key, entries=entries, token_counts=token_counts)
+
+
+class ArchiveSweeper:
+    """Background task that archives threads idle longer than ``idle_seconds``.
+
+    Candidates come from the thread catalog's recency index, so a sweep only touches
+    idle threads. Archiving is throttled to ``max_archives_per_second`` and segment I/O
+    runs in a worker thread, so sweeping never competes with foreground traffic.
+    """
+
+    def __init__(
+        self,
+        catalog: "RedisThreadCatalog",
+        store_factory: Callable[[str], "RedisChatMessageStore"],
+        idle_seconds: float,
+        max_archives_per_second: float = 5.0,
+        batch_size: int = 100,
+    ) -> None:
+        """Initialize the sweeper.
+
+        Args:
+            catalog: Catalog of the key prefix to sweep.
+            store_factory: Returns a store (configured with a ``SegmentArchive``) for a thread id.
+            idle_seconds: Threads whose last activity is older than this are archived.
+            max_archives_per_second: Upper bound on archive operations per second.
+            batch_size: Idle thread ids fetched from the catalog per round trip.
+        """
+        if max_archives_per_second <= 0:
+            raise ValueError("max_archives_per_second must be positive")
+        self.catalog = catalog
+        self.store_factory = store_factory
+        self.idle_seconds = idle_seconds
+        self.max_archives_per_second = max_archives_per_second
+        self.batch_size = batch_size
+        self.archived_total = 0
+        self._task: asyncio.Task[None] | None = None
+
+    async def sweep_once(self) -> int:
+        """Archive every currently idle thread once. Returns how many were archived."""
+        cutoff = time.time() - self.idle_seconds
+        interval = 1.0 / self.max_archives_per_second
+        archived = 0
+        offset = 0
+        while True:
+            thread_ids, offset = await self.catalog.idle_threads(cutoff, offset=offset, limit=self.batch_size)
+            if offset == 0:
+                return archived
+            for thread_id in thread_ids:
+                store = self.store_factory(thread_id)
+                try:
+                    started = time.perf_counter()
+                    if await store.archive_thread():
+                        archived += 1
+                        self.archived_total += 1
+                        # Pace archive operations to at most max_archives_per_second.
+                        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+                finally:
+                    await store.aclose()
+
+    async def run(self, interval_seconds: float = 300.0) -> None:
+        """Sweep forever, pausing ``interval_seconds`` between passes."""
+        while True:
+            await self.sweep_once()
+            await asyncio.sleep(interval_seconds)
+
+    def start(self, interval_seconds: float = 300.0) -> None:
+        """Run the sweeper as a background task on the current event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval_seconds))
+
+    async def stop(self) -> None:
+        """Cancel the background task, if running."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import copy
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from uuid import uuid4
+
+import redis.asyncio as redis
+
+# Per-thread token-count lists share the message lists' prefix but are not threads.
+_TOKENS_SUFFIX = ":tokens"
+
+# Returns the requested page of the recency index plus each thread's message count.
+_LIST_RECENT_SCRIPT = """
+local page = redis.call('ZREVRANGE', KEYS[1], ARGV[1], ARGV[2], 'WITHSCORES')
+if #page == 0 then
+    return {{}, {}}
+end
+local thread_ids = {}
+for i = 1, #page, 2 do
+    thread_ids[#thread_ids + 1] = page[i]
+end
+return {page, redis.call('HMGET', KEYS[2], unpack(thread_ids))}
+"""
+
+
+# Returns a page of ids idle since before a cutoff, skipping archived threads, plus the
+# offset to resume from (0 once the idle range is exhausted).
+_IDLE_THREADS_SCRIPT = """
+local page = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1], 'LIMIT', ARGV[2], ARGV[3])
+local idle = {}
+for _, thread_id in ipairs(page) do
+    if redis.call('SISMEMBER', KEYS[2], thread_id) == 0 then
+        idle[#idle + 1] = thread_id
+    end
+end
+local next_offset = 0
+if #page > 0 then
+    next_offset = tonumber(ARGV[2]) + #page
+end
+return {idle, next_offset}
+"""
+
+
+def thread_key(key_prefix: str, thread_id: str, cluster: bool = False) -> str:
+    """Return the message-list key of ``thread_id``.
+
+    In cluster mode the thread id is wrapped in a hash tag (``prefix:{thread_id}``), so
+    the list and its ``:meta``/``:tokens``/``:lock`` siblings always share a slot and the
+    store's scripts and MULTI blocks stay single-slot.
+    """
+    return f"{key_prefix}:{{{thread_id}}}" if cluster else f"{key_prefix}:{thread_id}"
+
+
+def catalog_keys(key_prefix: str, cluster: bool = False) -> tuple[str, str]:
+    """Return the (recency sorted set, message-count hash) keys for ``key_prefix``."""
+    tag = _catalog_tag(key_prefix, cluster)
+    return f"{tag}:catalog:recent", f"{tag}:catalog:counts"
+
+
+def archived_set_key(key_prefix: str, cluster: bool = False) -> str:
+    """Return the key of the set of thread ids currently archived to the cold tier."""
+    return f"{_catalog_tag(key_prefix, cluster)}:catalog:archived"
+
+
+def _catalog_tag(key_prefix: str, cluster: bool) -> str:
+    # In cluster mode the catalog structures share one slot of their own ({prefix}).
+    return f"{{{key_prefix}}}" if cluster else key_prefix
+
+
+@dataclass
+class ThreadSummary:
+    """One row of the thread catalog."""
+
+    thread_id: str
+    message_count: int | None
+    last_activity: float
+
+
+class RedisThreadCatalog:
+    """Secondary index of the threads stored under one key prefix.
+
+    RedisChatMessageStore keeps two structures current on every ``add_messages`` call:
+    a sorted set of thread ids scored by last activity (epoch seconds) and a hash of
+    message counts. Listing a page of recent threads is then O(page) and costs a single
+    round trip, instead of ``KEYS prefix:*`` (which blocks the server) plus one LLEN per key.
+    """
+
+    def __init__(self, redis_client: redis.Redis | redis.RedisCluster, key_prefix: str, cluster: bool = False) -> None:
+        self._redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.cluster = cluster
+        self.recent_key, self.counts_key = catalog_keys(key_prefix, cluster)
+        self.archived_key = archived_set_key(key_prefix, cluster)
+        self._list_recent_script = redis_client.register_script(_LIST_RECENT_SCRIPT)
+        self._idle_threads_script = redis_client.register_script(_IDLE_THREADS_SCRIPT)
+
+    async def count(self) -> int:
+        """Number of indexed threads."""
+        return await self._redis_client.zcard(self.recent_key)
+
+    async def list_recent(self, offset: int = 0, limit: int = 20) -> list[ThreadSummary]:
+        """Return up to ``limit`` threads ordered by most recent activity.
+
+        Args:
+            offset: Number of most recent threads to skip (for pagination).
+            limit: Page size.
+        """
+        if limit <= 0:
+            return []
+        page, counts = await self._list_recent_script(
+            keys=[self.recent_key, self.counts_key], args=[offset, offset + limit - 1]
+        )
+        summaries = []
+        for index in range(0, len(page), 2):
+            count = counts[index // 2]
+            summaries.append(
+                ThreadSummary(
+                    thread_id=_as_text(page[index]),
+                    message_count=int(count) if count is not None else None,
+                    last_activity=float(page[index + 1]),
+                )
+            )
+        return summaries
+
+    @contextlib.asynccontextmanager
+    async def snapshot(self, ttl_seconds: int = 3600) -> AsyncIterator["RedisThreadCatalog"]:
+        """Freeze the recency index for a listing that pages through all of it.
+
+        ``list_recent`` pages by rank, so threads that become active while a long listing
+        runs move to the top and shift every later page: some threads would be listed
+        twice and others skipped. The snapshot is an atomic copy of the index (one
+        ``ZUNIONSTORE``, in the catalog's slot), deleted on exit and expiring after
+        ``ttl_seconds`` in case the process dies. Message counts are still read live.
+
+        Example:
+            async with catalog.snapshot() as frozen:
+                page = await frozen.list_recent(offset=0, limit=1000)
+
+        Yields:
+            A read-only view of this catalog whose ``list_recent`` and ``count`` use the copy.
+        """
+        snapshot_key = f"{self.recent_key}:snapshot:{uuid4().hex}"
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(snapshot_key, [self.recent_key])
+            pipe.expire(snapshot_key, ttl_seconds)
+            await pipe.execute()
+        view = copy.copy(self)
+        view.recent_key = snapshot_key
+        try:
+            yield view
+        finally:
+            await self._redis_client.delete(snapshot_key)
+
+    async def record_activity(self, thread_id: str, message_count: int, timestamp: float) -> None:
+        """Index ``thread_id`` with its current length and activity time.
+
+        Single-node stores do this inside their append script; in cluster mode the
+        catalog lives in a different slot than the thread, so it is a separate call.
+        """
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.recent_key, {thread_id: timestamp})
+            pipe.hset(self.counts_key, thread_id, message_count)
+            await pipe.execute()
+
+    async def idle_threads(self, before: float, offset: int = 0, limit: int = 100) -> tuple[list[str], int]:
+        """Return ids of threads last active before ``before`` that are still in Redis.
+
+        Args:
+            before: Epoch-seconds cutoff.
+            offset: Position in the idle range to resume from.
+            limit: Number of idle entries examined per call.
+
+        Returns:
+            The page of thread ids (archived threads filtered out) and the offset for the
+            next call, which is 0 once the idle range is exhausted.
+        """
+        thread_ids, next_offset = await self._idle_threads_script(
+            keys=[self.recent_key, self.archived_key], args=[before, offset, limit]
+        )
+        return [_as_text(thread_id) for thread_id in thread_ids], int(next_offset)
+
+    async def is_archived(self, thread_id: str) -> bool:
+        """Whether ``thread_id`` currently lives in the cold tier."""
+        return bool(await self._redis_client.sismember(self.archived_key, thread_id))
+
+    async def remove(self, thread_id: str) -> None:
+        """Drop ``thread_id`` from the index."""
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.recent_key, thread_id)
+            pipe.hdel(self.counts_key, thread_id)
+            pipe.srem(self.archived_key, thread_id)
+            await pipe.execute()
+
+    async def backfill(self, batch_size: int = 500) -> int:
+        """Index message lists written before the catalog existed.
+
+        Walks the keyspace incrementally with ``SCAN ... TYPE list`` (never ``KEYS``), so
+        the server keeps serving traffic; on a cluster every primary is scanned
+        concurrently. Each batch costs one pipelined round trip for LLEN and OBJECT
+        IDLETIME plus one for the index writes. Threads already in the index keep their
+        recorded activity time.
+
+        Returns:
+            Number of message lists found.
+        """
+        prefix_length = len(self.key_prefix) + 1
+        found = 0
+        batch: list[str] = []
+
+        async def flush() -> None:
+            async with self._redis_client.pipeline(transaction=False) as pipe:
+                for key in batch:
+                    pipe.llen(key)
+                    pipe.object("idletime", key)
+                results = await pipe.execute(raise_on_error=False)
+
+            now = time.time()
+            async with self._redis_client.pipeline(transaction=False) as pipe:
+                for position, key in enumerate(batch):
+                    length, idle_seconds = results[2 * position], results[2 * position + 1]
+                    if isinstance(length, Exception):
+                        continue
+                    # OBJECT IDLETIME is unavailable on some servers (and emulators).
+                    idle = 0 if isinstance(idle_seconds, Exception) or idle_seconds is None else int(idle_seconds)
+                    thread_id = key[prefix_length:]
+                    if self.cluster:
+                        thread_id = thread_id.strip("{}")
+                    pipe.zadd(self.recent_key, {thread_id: now - idle}, nx=True)
+                    pipe.hset(self.counts_key, thread_id, int(length))
+                await pipe.execute()
+            batch.clear()
+
+        async for key in self.scan_thread_keys(batch_size):
+            batch.append(key)
+            found += 1
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+        return found
+
+    async def scan_thread_keys(self, count: int = 500) -> AsyncIterator[str]:
+        """Yield every message-list key under the prefix using SCAN.
+
+        Token-count lists stored next to each thread (``:tokens``) are skipped.
+
+        On a cluster, each primary is scanned by its own task (the keyspace is sharded,
+        so a single SCAN cursor only sees one node) and keys are yielded as they arrive.
+        """
+        # In cluster mode thread keys end with their hash tag, which excludes the siblings.
+        match = f"{self.key_prefix}:{{*}}" if self.cluster else f"{self.key_prefix}:*"
+        if not isinstance(self._redis_client, redis.RedisCluster):
+            async for key in self._redis_client.scan_iter(match=match, count=count, _type="list"):
+                key = _as_text(key)
+                if not key.endswith(_TOKENS_SUFFIX):
+                    yield key
+            return
+
+        # Bounded, so a fast node waits for the consumer instead of buffering its keyspace.
+        queue: asyncio.Queue[list[bytes] | None] = asyncio.Queue(maxsize=16)
+
+        async def scan_node(node: object) -> None:
+            try:
+                cursor = 0
+                while True:
+                    cursors, keys = await self._redis_client.scan(
+                        cursor=cursor, match=match, count=count, _type="list", target_nodes=node
+                    )
+                    await queue.put(keys)
+                    cursor = next(iter(cursors.values()))
+                    if cursor == 0:
+                        return
+            finally:
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(scan_node(node)) for node in self._redis_client.get_primaries()]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                keys = await queue.get()
+                if keys is None:
+                    remaining -= 1
+                    continue
+                for key in map(_as_text, keys):
+                    if not key.endswith(_TOKENS_SUFFIX):
+                        yield key
+            # Surface a node's scan error instead of silently returning a partial keyspace.
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def _as_text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
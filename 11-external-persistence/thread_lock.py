@@ -0,0 +1,168 @@
+"""Per-thread leases with fencing tokens for multi-worker Redis conversations.
+
+A worker that wants to run an agent turn takes the thread's lease (``SET NX PX``), so
+its ``list_messages`` and ``add_messages`` cannot interleave with another worker's
+turn on the same thread. Unrelated threads use unrelated lock keys and never wait on
+each other.
+
+A lease can still expire under a worker that stalls (GC pause, slow tool call, network
+partition) while another worker takes over. Every acquisition therefore also bumps a
+``fence`` counter in the thread's metadata hash and hands the new value to the holder;
+the store's append script rejects writes whose token is no longer current, so a
+stale worker gets :class:`StaleLeaseError` instead of corrupting the turn order.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from uuid import uuid4
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# Takes the lock if free and returns the next fencing token (0 if the lock is held).
+# KEYS: lock key, metadata hash. ARGV: owner id, ttl in milliseconds.
+_ACQUIRE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return redis.call('HINCRBY', KEYS[2], 'fence', 1)
+end
+return 0
+"""
+
+# KEYS: lock key. ARGV: owner id, ttl in milliseconds.
+_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS: lock key. ARGV: owner id.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ThreadLockTimeout(TimeoutError):
+    """Raised when a thread's lease could not be acquired within ``wait_timeout``."""
+
+
+class StaleLeaseError(RuntimeError):
+    """Raised when a write carries a fencing token that a newer lease has superseded."""
+
+
+@dataclass(frozen=True)
+class ThreadLease:
+    """A held lease: who owns it and the fencing token writes must carry."""
+
+    owner: str
+    fencing_token: int
+
+
+class RedisThreadLock:
+    """Lease on one thread, renewed in the background while held."""
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        lock_key: str,
+        meta_key: str,
+        ttl_seconds: float = 30.0,
+        wait_timeout: float | None = 10.0,
+        retry_interval: float = 0.05,
+    ) -> None:
+        """Initialize the lock.
+
+        Args:
+            redis_client: Client used for the lock commands.
+            lock_key: Key holding the current owner id while the lease is held.
+            meta_key: Metadata hash whose ``fence`` field counts acquisitions.
+            ttl_seconds: Lease duration; renewed every third of it while held.
+            wait_timeout: Seconds to wait for a busy lease (``None`` waits forever).
+            retry_interval: Initial pause between attempts; doubles up to one second.
+        """
+        self._redis_client = redis_client
+        self.lock_key = lock_key
+        self.meta_key = meta_key
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self.retry_interval = retry_interval
+        self.lease: ThreadLease | None = None
+        self._renew_task: asyncio.Task[None] | None = None
+        self._acquire_script = redis_client.register_script(_ACQUIRE_SCRIPT)
+        self._extend_script = redis_client.register_script(_EXTEND_SCRIPT)
+        self._release_script = redis_client.register_script(_RELEASE_SCRIPT)
+
+    async def acquire(self) -> ThreadLease:
+        """Wait for the lease and return it with a fresh fencing token."""
+        owner = uuid4().hex
+        ttl_ms = int(self.ttl_seconds * 1000)
+        deadline = None if self.wait_timeout is None else time.monotonic() + self.wait_timeout
+        delay = self.retry_interval
+        while True:
+            token = await self._acquire_script(keys=[self.lock_key, self.meta_key], args=[owner, ttl_ms])
+            if token:
+                break
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise ThreadLockTimeout(f"Timed out after {self.wait_timeout}s waiting for lease on '{self.lock_key}'")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+        self.lease = ThreadLease(owner=owner, fencing_token=int(token))
+        self._renew_task = asyncio.create_task(self._renew(owner, ttl_ms))
+        return self.lease
+
+    async def extend(self) -> bool:
+        """Push the lease expiry out by ``ttl_seconds``. False if the lease was lost."""
+        if self.lease is None:
+            return False
+        return bool(
+            await self._extend_script(keys=[self.lock_key], args=[self.lease.owner, int(self.ttl_seconds * 1000)])
+        )
+
+    async def release(self) -> None:
+        """Stop renewing and delete the lock key if this worker still owns it.
+
+        Never raises: it runs in ``finally`` blocks, where an error would replace the
+        exception of the turn itself. If the key cannot be deleted (Redis unreachable),
+        the lease simply expires after ``ttl_seconds``.
+        """
+        try:
+            if self._renew_task is not None:
+                self._renew_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await self._renew_task
+                self._renew_task = None
+        finally:
+            lease, self.lease = self.lease, None
+            if lease is not None:
+                try:
+                    await self._release_script(keys=[self.lock_key], args=[lease.owner])
+                except Exception:
+                    logger.warning("Could not release lease on '%s'; it expires on its own", self.lock_key, exc_info=True)
+
+    async def _renew(self, owner: str, ttl_ms: int) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            try:
+                extended = await self._extend_script(keys=[self.lock_key], args=[owner, ttl_ms])
+            except Exception:
+                # Keep trying while the lease lasts; if it expires meanwhile, the next
+                # extend returns 0 and the fencing token stops this worker's writes.
+                logger.warning("Could not renew lease on '%s'", self.lock_key, exc_info=True)
+                continue
+            if not extended:
+                # Lost the lease; the fencing token now stops this worker's writes.
+                return
+
+    async def __aenter__(self) -> ThreadLease:
+        return await self.acquire()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.release()
@@ -0,0 +1,71 @@
+"""Approximate token accounting for Redis-persisted chat history.
+
+RedisChatMessageStore records a token count for every message when it is written, so
+retention and context windows can be sized in tokens without re-tokenizing history on
+each read. Any ``Callable[[ChatMessage], int]`` can act as the counter; the default is a
+fast character-based heuristic, and :func:`tiktoken_counter` wraps ``tiktoken`` (optional
+dependency) when exact counts matter.
+"""
+
+import json
+from collections.abc import Callable, Sequence
+
+from agent_framework import ChatMessage
+
+TokenCounter = Callable[[ChatMessage], int]
+
+# Chat formats add a few tokens per message for the role and separators.
+MESSAGE_OVERHEAD_TOKENS = 4
+# English text averages roughly four characters per token for GPT-style tokenizers.
+_CHARS_PER_TOKEN = 4
+
+
+def _message_segments(message: ChatMessage) -> list[str]:
+    """Return the text of every content item, serializing non-text items as JSON."""
+    segments: list[str] = []
+    for content in getattr(message, "contents", None) or []:
+        text = getattr(content, "text", None)
+        if isinstance(text, str):
+            segments.append(text)
+        elif hasattr(content, "to_dict"):
+            segments.append(json.dumps(content.to_dict(), separators=(",", ":")))
+        else:
+            segments.append(str(content))
+    return segments
+
+
+def estimate_message_tokens(message: ChatMessage) -> int:
+    """Cheap local estimate: about one token per four characters plus per-message overhead."""
+    characters = sum(len(segment) for segment in _message_segments(message))
+    return MESSAGE_OVERHEAD_TOKENS + (characters + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def tiktoken_counter(encoding_name: str = "o200k_base") -> TokenCounter:
+    """Return a counter backed by ``tiktoken`` (``pip install tiktoken``)."""
+    try:
+        import tiktoken
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("tiktoken_counter requires the 'tiktoken' package (pip install tiktoken).") from exc
+
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(message: ChatMessage) -> int:
+        return MESSAGE_OVERHEAD_TOKENS + sum(len(encoding.encode(segment)) for segment in _message_segments(message))
+
+    return count
+
+
+def tail_within_budget(token_counts: Sequence[int], budget: int) -> int:
+    """Return how many of the newest entries fit in ``budget`` tokens.
+
+    The newest entry is always kept, even if it alone exceeds the budget, so the
+    latest user turn is never dropped from the prompt.
+    """
+    used = 0
+    keep = 0
+    for count in reversed(token_counts):
+        if keep > 0 and used + count > budget:
+            break
+        used += count
+        keep += 1
+    return keep
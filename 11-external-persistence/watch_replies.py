@@ -0,0 +1,42 @@
+"""Watch a thread's assistant replies arrive chunk by chunk from another shell.
+
+Run app.py (list backend) and point this script at the thread id shown in its menu.
+Each reply is printed as it streams, including the part generated before you joined.
+
+Usage:
+    python watch_replies.py <thread_id> [--prefix lab11]
+"""
+
+import argparse
+import asyncio
+import os
+
+from redis_chat_message_store import RedisChatMessageStore
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("thread_id", help="thread id (the part of the Redis key after the prefix)")
+    parser.add_argument("--prefix", default="lab11", help="key prefix used by the store")
+    args = parser.parse_args()
+
+    redis_url = os.environ.get("REDIS_URL")
+    if not redis_url:
+        raise RuntimeError(
+            "Set the REDIS_URL environment variable (e.g., redis://:<primary_key>@<host>:6380/0)."
+        )
+
+    store = RedisChatMessageStore(redis_url=redis_url, thread_id=args.thread_id, key_prefix=args.prefix)
+    print(f"Watching replies on {store.redis_key} (Ctrl+C to stop)...\n")
+    try:
+        while True:
+            print("ASSISTANT: ", end="", flush=True)
+            async for text in store.watch_live():
+                print(text, end="", flush=True)
+            print("\n")
+    finally:
+        await store.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
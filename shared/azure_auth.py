@@ -0,0 +1,274 @@
+"""Token caching for the Azure CLI credential used by every lab.
+
+``AzureCliCredential`` runs the ``az`` CLI in a subprocess for every token, which takes
+from hundreds of milliseconds to seconds, and each process (and each chat client) pays
+it again. :class:`CachedTokenCredential` wraps any ``TokenCredential`` and:
+
+- keeps tokens in memory and in an encrypted file shared by every process of the user
+  (DPAPI on Windows, Keychain on macOS, libsecret on Linux, via ``msal-extensions``);
+- hands out a cached token until ``refresh_margin`` seconds before it expires;
+- refreshes in a background thread once a token is within ``refresh_ahead`` seconds of
+  expiring, so requests do not wait for ``az``;
+- runs at most one refresh per scope at a time; concurrent callers wait for it and share
+  the result.
+
+Labs use it through :func:`openai_token_provider`, which returns the async callable the
+Azure OpenAI client calls before every request, so long-running services also pick up
+refreshed tokens::
+
+    AzureOpenAIChatClient(ad_token_provider=openai_token_provider(), endpoint=..., deployment_name=...)
+
+Environment variables:
+
+- ``AOAI_TOKEN_CACHE``: cache file location (default ``~/.agent-workshop/token_cache.bin``);
+  set it to an empty string to keep tokens in memory only.
+- ``AOAI_TOKEN_CACHE_ALLOW_UNENCRYPTED``: set to ``1`` to fall back to a plain file
+  (readable by the owner only) where no encrypted storage exists, e.g. in containers.
+
+Tokens belong to the account that was logged in when they were fetched. After
+``az login`` with another account, call :meth:`CachedTokenCredential.clear` (or delete
+the cache file) to stop using the previous account's tokens.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from azure.core.credentials import AccessToken, TokenCredential
+
+logger = logging.getLogger(__name__)
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+DEFAULT_CACHE_PATH = Path.home() / ".agent-workshop" / "token_cache.bin"
+
+
+class CachedTokenCredential:
+    """``TokenCredential`` that caches another credential's tokens in memory and on disk."""
+
+    def __init__(
+        self,
+        credential: TokenCredential,
+        cache_path: Path | None = None,
+        allow_unencrypted: bool = False,
+        refresh_margin: float = 300.0,
+        refresh_ahead: float = 900.0,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            credential: Credential that actually fetches tokens (e.g. ``AzureCliCredential``).
+            cache_path: Encrypted cache file shared across processes; ``None`` for memory only.
+            allow_unencrypted: Use a plain owner-only file where encryption is unavailable.
+            refresh_margin: Seconds before expiry after which a cached token is not handed out.
+            refresh_ahead: Seconds before expiry at which a background refresh starts.
+        """
+        if refresh_ahead < refresh_margin:
+            raise ValueError("refresh_ahead must be at least refresh_margin")
+        self.credential = credential
+        self.refresh_margin = refresh_margin
+        self.refresh_ahead = refresh_ahead
+        self._tokens: dict[str, AccessToken] = {}
+        self._lock = threading.Lock()
+        self._refresh_locks: dict[str, threading.Lock] = {}
+        self._refreshing: set[str] = set()
+        self._persistence = _build_persistence(cache_path, allow_unencrypted) if cache_path else None
+        self._file_lock = str(cache_path) + ".lockfile" if cache_path else None
+
+    def get_token(
+        self,
+        *scopes: str,
+        claims: str | None = None,
+        tenant_id: str | None = None,
+        **kwargs: Any,
+    ) -> AccessToken:
+        """Return a token for ``scopes``, from the cache when it is still fresh."""
+        if claims:
+            # A claims challenge means the cached token was rejected; always ask for a new one.
+            return self.credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+        key = _cache_key(scopes, tenant_id)
+        token = self._lookup(key)
+        if token is not None:
+            return token
+        return self._refresh(key, scopes, tenant_id, kwargs, self.refresh_margin)
+
+    def token_provider(self, scope: str = COGNITIVE_SERVICES_SCOPE) -> Callable[[], Awaitable[str]]:
+        """Return an async bearer-token callable for ``scope`` (an ``ad_token_provider``)."""
+
+        async def provide() -> str:
+            token = self._lookup(_cache_key((scope,), None))
+            if token is None:
+                # Only a cache miss waits on the credential, and never on the event loop.
+                token = await asyncio.to_thread(self.get_token, scope)
+            return token.token
+
+        return provide
+
+    def clear(self) -> None:
+        """Forget every cached token, in memory and on disk."""
+        with self._lock:
+            self._tokens.clear()
+        if self._persistence is not None:
+            self._write_disk({})
+
+    def _lookup(self, key: str) -> AccessToken | None:
+        """Return a fresh cached token, starting a background refresh if it expires soon."""
+        with self._lock:
+            token = self._tokens.get(key)
+        if token is None or self._remaining(token) <= self.refresh_margin:
+            # Another process may already have refreshed it.
+            token = self._read_disk().get(key)
+            if token is None or self._remaining(token) <= self.refresh_margin:
+                return None
+            with self._lock:
+                self._tokens[key] = token
+        if self._remaining(token) <= self.refresh_ahead:
+            self._refresh_in_background(key)
+        return token
+
+    def _refresh(
+        self, key: str, scopes: tuple[str, ...], tenant_id: str | None, kwargs: dict[str, Any], keep_above: float
+    ) -> AccessToken:
+        """Fetch a token unless one with more than ``keep_above`` seconds left appeared meanwhile."""
+        with self._lock:
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+        with refresh_lock:
+            # Whoever held the lock before us may have fetched a token already.
+            with self._lock:
+                token = self._tokens.get(key)
+            if token is not None and self._remaining(token) > keep_above:
+                return token
+            token = self.credential.get_token(*scopes, tenant_id=tenant_id, **kwargs)
+            with self._lock:
+                self._tokens[key] = token
+            self._update_disk(key, token)
+            return token
+
+    def _refresh_in_background(self, key: str) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        scopes, tenant_id = _split_key(key)
+
+        def refresh() -> None:
+            try:
+                self._refresh(key, scopes, tenant_id, {}, self.refresh_ahead)
+            except Exception:  # the cached token is still valid; the next lookup retries
+                logger.warning("Background token refresh failed", exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="token-refresh", daemon=True).start()
+
+    @staticmethod
+    def _remaining(token: AccessToken) -> float:
+        return token.expires_on - time.time()
+
+    def _read_disk(self) -> dict[str, AccessToken]:
+        if self._persistence is None:
+            return {}
+        from msal_extensions import CrossPlatLock
+
+        try:
+            with CrossPlatLock(self._file_lock):
+                return self._load_tokens()
+        except Exception:
+            logger.warning("Could not read the token cache; ignoring it", exc_info=True)
+            return {}
+
+    def _update_disk(self, key: str, token: AccessToken) -> None:
+        if self._persistence is None:
+            return
+        from msal_extensions import CrossPlatLock
+
+        now = time.time()
+        try:
+            # One lock across load, merge and save, so concurrent writers keep each other's entries.
+            with CrossPlatLock(self._file_lock):
+                tokens = {
+                    cached_key: cached for cached_key, cached in self._load_tokens().items() if cached.expires_on > now
+                }
+                tokens[key] = token
+                self._persistence.save(_dump_tokens(tokens))
+        except Exception:  # the memory cache still works
+            logger.warning("Could not write the token cache", exc_info=True)
+
+    def _write_disk(self, tokens: dict[str, AccessToken]) -> None:
+        from msal_extensions import CrossPlatLock
+
+        try:
+            with CrossPlatLock(self._file_lock):
+                self._persistence.save(_dump_tokens(tokens))
+        except Exception:  # the memory cache still works
+            logger.warning("Could not write the token cache", exc_info=True)
+
+    def _load_tokens(self) -> dict[str, AccessToken]:
+        """Read the cache file; the caller holds the file lock."""
+        from msal_extensions.persistence import PersistenceNotFound
+
+        try:
+            payload = self._persistence.load()
+        except PersistenceNotFound:
+            return {}
+        try:
+            entries = json.loads(payload).items()
+            return {key: AccessToken(entry["token"], int(entry["expires_on"])) for key, entry in entries}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+
+@functools.cache
+def cached_cli_credential() -> CachedTokenCredential:
+    """Process-wide ``AzureCliCredential`` behind the shared token cache."""
+    from azure.identity import AzureCliCredential
+
+    location = os.environ.get("AOAI_TOKEN_CACHE")
+    cache_path = DEFAULT_CACHE_PATH if location is None else (Path(location).expanduser() if location else None)
+    allow_unencrypted = os.environ.get("AOAI_TOKEN_CACHE_ALLOW_UNENCRYPTED", "").lower() in {"1", "true", "yes"}
+    return CachedTokenCredential(AzureCliCredential(), cache_path=cache_path, allow_unencrypted=allow_unencrypted)
+
+
+@functools.cache
+def openai_token_provider() -> Callable[[], Awaitable[str]]:
+    """Bearer-token provider for Azure OpenAI clients, backed by :func:`cached_cli_credential`.
+
+    Always the same callable, so clients keyed by credential (see ``shared.chat_clients``) match.
+    """
+    return cached_cli_credential().token_provider(COGNITIVE_SERVICES_SCOPE)
+
+
+def _dump_tokens(tokens: dict[str, AccessToken]) -> str:
+    return json.dumps({key: {"token": token.token, "expires_on": token.expires_on} for key, token in tokens.items()})
+
+
+def _cache_key(scopes: tuple[str, ...], tenant_id: str | None) -> str:
+    return json.dumps([sorted(scopes), tenant_id])
+
+
+def _split_key(key: str) -> tuple[tuple[str, ...], str | None]:
+    scopes, tenant_id = json.loads(key)
+    return tuple(scopes), tenant_id
+
+
+def _build_persistence(cache_path: Path, allow_unencrypted: bool) -> Any:
+    """Encrypted file persistence, a plain owner-only file if allowed, or ``None``."""
+    from msal_extensions import FilePersistence, build_encrypted_persistence
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        return build_encrypted_persistence(str(cache_path))
+    except Exception as error:  # e.g. no libsecret/D-Bus session in a container
+        reason = str(error).splitlines()[0] if str(error) else type(error).__name__
+        if allow_unencrypted:
+            logger.info("Encrypted token storage unavailable (%s); using an owner-only file", reason)
+            return FilePersistence(str(cache_path))
+        logger.info("Encrypted token storage unavailable (%s); caching tokens in memory only", reason)
+        return None
@@ -0,0 +1,232 @@
+"""Show connection reuse of the shared chat client registry against a local mock server.
+
+The script starts a TLS mock of the Azure OpenAI chat completions endpoint on
+127.0.0.1 (self-signed certificate, fixed small response delay) and runs the same
+workload three ways:
+
+- ``per-call``: a new AzureOpenAIChatClient for every request (worst case).
+- ``per-agent``: one client per agent, as the labs used to build them, so every agent
+  has its own connection pool.
+- ``shared``: every agent uses ``get_chat_client()``, i.e. one client and one pool.
+
+The workload is ``--agents`` agents (think lab 06's orchestrator and sub-agent) each
+answering ``--requests`` prompts, with ``--concurrency`` prompts in flight. For every
+mode it reports TCP connections (and therefore TLS handshakes) the server accepted,
+throughput and latency percentiles.
+
+Usage (from the repository root):
+    python shared/benchmark_chat_clients.py [--agents 4] [--requests 50] [--concurrency 2]
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import json
+import ssl
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for the shared/ helpers
+from shared.chat_clients import HttpPoolSettings, close_chat_clients, get_chat_client
+
+DEPLOYMENT = "mock-deployment"
+COMPLETION = json.dumps(
+    {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "mock",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "pong"}}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+    }
+).encode("utf-8")
+
+
+class MockChatServer:
+    """Minimal HTTPS server answering every request with a canned chat completion."""
+
+    def __init__(self, ssl_context: ssl.SSLContext, latency: float) -> None:
+        self.ssl_context = ssl_context
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self.ssl_context)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def reset(self) -> None:
+        self.connections = 0
+        self.requests = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                await reader.readexactly(length)
+                await asyncio.sleep(self.latency)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(COMPLETION)}\r\nConnection: keep-alive\r\n\r\n".encode("latin-1")
+                    + COMPLETION
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+def _self_signed_contexts(directory: Path) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    """Server context with a fresh self-signed certificate, and a client context trusting it."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = directory / "mock.crt"
+    key_path = directory / "mock.key"
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    )
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert_path, key_path)
+    client_context = ssl.create_default_context(cafile=str(cert_path))
+    return server_context, client_context
+
+
+def _unshared_client(endpoint: str, pool: HttpPoolSettings):
+    """An AzureOpenAIChatClient with its own connection pool, like the labs built before."""
+    import httpx
+    from agent_framework.azure import AzureOpenAIChatClient
+    from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=pool.max_connections, keepalive_expiry=pool.keepalive_expiry),
+        verify=pool.verify,
+    )
+    async_client = AsyncAzureOpenAI(
+        azure_endpoint=endpoint,
+        azure_deployment=DEPLOYMENT,
+        api_version="2024-10-21",
+        api_key="mock",
+        http_client=http_client,
+    )
+    return AzureOpenAIChatClient(endpoint=endpoint, deployment_name=DEPLOYMENT, async_client=async_client)
+
+
+async def _run_mode(
+    mode: str, server: MockChatServer, endpoint: str, pool: HttpPoolSettings, args: argparse.Namespace
+) -> None:
+    server.reset()
+    agents = []
+    if mode == "per-agent":
+        agents = [_unshared_client(endpoint, pool).create_agent(name=f"Agent{i}") for i in range(args.agents)]
+    elif mode == "shared":
+        agents = [
+            get_chat_client(endpoint, DEPLOYMENT, api_key="mock", pool=pool).create_agent(name=f"Agent{i}")
+            for i in range(args.agents)
+        ]
+
+    jobs = [(index % args.agents, index) for index in range(args.agents * args.requests)]
+    latencies: list[float] = []
+    slots = asyncio.Semaphore(args.concurrency)
+    per_call_clients = []
+
+    async def call(agent_index: int, index: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            if mode == "per-call":
+                client = _unshared_client(endpoint, pool)
+                per_call_clients.append(client)
+                agent = client.create_agent(name=f"Agent{agent_index}")
+            else:
+                agent = agents[agent_index]
+            response = await agent.run(f"ping {index}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.text == "pong", response.text
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(agent_index, index) for agent_index, index in jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"  {mode:<10} {server.connections:>11} {len(jobs) / elapsed:9.1f} "
+        f"{statistics.median(latencies):8.2f} {p99:8.2f}"
+    )
+    for agent in agents if mode == "per-agent" else []:
+        await agent.chat_client.client.close()
+    for client in per_call_clients:
+        await client.client.close()
+    if mode == "shared":
+        await close_chat_clients()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per agent")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--server-latency", type=float, default=0.005, help="Mock response delay in seconds")
+    parser.add_argument("--modes", default="per-call,per-agent,shared")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server_context, client_context = _self_signed_contexts(Path(directory))
+        server = MockChatServer(server_context, args.server_latency)
+        port = await server.start()
+        endpoint = f"https://127.0.0.1:{port}"
+        pool = HttpPoolSettings(max_connections=args.concurrency, verify=client_context)
+        print(
+            f"agents={args.agents}  requests={args.agents * args.requests}  concurrency={args.concurrency}  "
+            f"server latency={args.server_latency * 1000:.0f} ms\n"
+        )
+        print("  mode       connections  req/s     p50 ms   p99 ms")
+        try:
+            for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+                await _run_mode(mode, server, endpoint, pool, args)
+        finally:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
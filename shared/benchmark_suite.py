@@ -0,0 +1,426 @@
+"""Benchmark the labs' own overhead with a local fake model, and catch regressions.
+
+Every scenario runs against :class:`~shared.fake_chat_client.FakeChatClient`, so no
+Azure resources are needed and the numbers show what the framework and the lab code
+cost per turn, not the model:
+
+- ``run``: ``agent.run`` on a new thread.
+- ``run_stream``: ``agent.run_stream`` of a 40-token reply, every update consumed.
+- ``tools``: one tool round trip with lab 03's ``weather_tool``.
+- ``agent_as_tool``: lab 06's orchestrator calling the weather agent, which calls its tool.
+- ``middleware``: lab 09's agent and function middleware around a tool call. Lab 09
+  needs a newer ``agent_framework`` than some environments have; there no-op middleware
+  of the same shape measures the pipeline instead, and the report says so.
+- ``file_store``: lab 10's lazy message store, one turn on a growing thread plus the
+  incremental ``ThreadJournal.save``.
+- ``redis_store``: lab 11's ``RedisChatMessageStore``, one turn on a growing thread,
+  against ``REDIS_URL`` or in-process fakeredis when it is not set.
+
+For each scenario the suite reports throughput, p50/p99 latency (sequential turns,
+after a warm-up; the round with the lowest median of ``--repeat`` rounds counts) and,
+from a separate pass under ``tracemalloc``, the median peak memory allocated during a
+turn and the memory still held afterwards per turn.
+
+``--baseline FILE`` compares the results with a saved run and exits with status 1 when
+a scenario's p50 latency or peak allocation grew by more than ``--tolerance`` and by
+more than an absolute floor (``--min-delta-ms``, ``--min-delta-kib``), so that jitter on
+sub-millisecond turns is not reported as a regression; ``--save-baseline`` writes the
+current results to that file instead. Baselines are only comparable on the same machine
+and Python version.
+
+Usage (from the repository root):
+    python shared/benchmark_suite.py [--scenarios run,tools] [--iterations 300]
+                                     [--baseline shared/benchmark_baseline.json [--save-baseline]]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))  # repo root, for the shared/ helpers
+from shared.fake_chat_client import FakeChatClient, call_tool_then_reply
+
+from agent_framework import ChatAgent
+
+STREAMED_REPLY = " ".join(f"token{index}" for index in range(40))
+CONTEXT_WINDOW = 50
+
+Operation = Callable[[], Awaitable[None]]
+Cleanup = Callable[[], Awaitable[None]]
+
+
+class ScenarioUnavailable(Exception):
+    """The scenario cannot run in this environment (missing lab dependency or service)."""
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    iterations: int
+    ops_per_second: float
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    peak_kib_per_op: float
+    retained_bytes_per_op: float
+    note: str = ""
+
+
+def _import_lab(lab: str, *modules: str) -> list[Any]:
+    """Import lab modules by name, with the lab folder on ``sys.path`` as when it runs."""
+    lab_dir = str(REPO_ROOT / lab)
+    if lab_dir not in sys.path:
+        sys.path.insert(0, lab_dir)
+    try:
+        return [importlib.import_module(module) for module in modules]
+    except ImportError as error:
+        raise ScenarioUnavailable(f"{lab}: {error}") from None
+
+
+async def _consume(agent: Any, prompt: str, thread: Any = None, expect: str | None = None) -> None:
+    response = await agent.run(prompt, thread=thread)
+    if expect is not None and expect not in response.text:
+        raise RuntimeError(f"unexpected reply: {response.text!r}")
+
+
+async def scenario_run(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    agent = ChatAgent(chat_client=FakeChatClient(["Hello! How can I help?"], latency=args.latency), name="Bench")
+    return lambda: _consume(agent, "Hi there", expect="Hello"), None, ""
+
+
+async def scenario_run_stream(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    client = FakeChatClient([STREAMED_REPLY], latency=args.latency, token_delay=args.token_delay)
+    agent = ChatAgent(chat_client=client, name="Bench")
+
+    async def operation() -> None:
+        text = "".join([update.text async for update in agent.run_stream("Stream something")])
+        if text != STREAMED_REPLY:
+            raise RuntimeError(f"unexpected stream: {text[:60]!r}")
+
+    return operation, None, ""
+
+
+async def scenario_tools(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    (function_tools,) = _import_lab("03-function-tools", "function_tools")
+    responder = call_tool_then_reply("weather_tool", {"location": "Paris"}, "Forecast: {result}")
+    agent = FakeChatClient(responder, latency=args.latency).create_agent(tools=function_tools.get_weather)
+    return lambda: _consume(agent, "Weather in Paris?", expect="cloudy"), None, ""
+
+
+async def scenario_agent_as_tool(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    (tools,) = _import_lab("06-agent-as-tool", "tools")
+    weather_agent = FakeChatClient(
+        call_tool_then_reply("get_weather", {"location": "Paris"}, "{result}"), latency=args.latency
+    ).create_agent(
+        name="WeatherAgent",
+        description="An agent that answers questions about the weather.",
+        tools=tools.get_weather,
+    )
+    main_agent = FakeChatClient(
+        call_tool_then_reply("WeatherAgent", {"task": "Weather in Paris?"}, "Météo : {result}"), latency=args.latency
+    ).create_agent(tools=weather_agent.as_tool())
+    return lambda: _consume(main_agent, "Quel temps fait-il à Paris ?", expect="cloudy"), None, ""
+
+
+async def scenario_middleware(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    note = ""
+    try:
+        middleware, functions_middleware = _import_lab("09-agents-middleware", "middleware", "functions_middleware")
+        tool = functions_middleware.get_time
+        stack = [middleware.logging_agent_middleware, functions_middleware.logging_function_middleware]
+    except ScenarioUnavailable as error:
+        from agent_framework import agent_middleware, ai_function, function_middleware
+
+        note = f"no-op middleware; {str(error).split(' (')[0]}"
+
+        @ai_function(name="get_time", description="Return the current time in HH:MM:SS format.")
+        def get_time() -> str:
+            return "12:00:00"
+
+        @agent_middleware
+        async def pass_through_agent(context: Any, next: Callable[[Any], Awaitable[None]]) -> None:
+            await next(context)
+
+        @function_middleware
+        async def pass_through_function(context: Any, call_next: Callable[[Any], Awaitable[None]]) -> None:
+            await call_next(context)
+
+        tool, stack = get_time, [pass_through_agent, pass_through_function]
+
+    agent = ChatAgent(
+        chat_client=FakeChatClient(call_tool_then_reply("get_time", {}, "It is {result}."), latency=args.latency),
+        name="GreetingAgent",
+        tools=[tool],
+        middleware=stack,
+    )
+
+    async def operation() -> None:
+        # Lab 09's middleware prints on every call; keep the terminal and the timings clean of it.
+        with contextlib.redirect_stdout(io.StringIO()):
+            await _consume(agent, "What time is it?", expect="It is")
+
+    return operation, None, note
+
+
+async def scenario_file_store(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    message_log, thread_journal = _import_lab("10-persisting-conversations", "message_log", "thread_journal")
+    agent = ChatAgent(
+        chat_client=FakeChatClient(["Noted, here is the next step."], latency=args.latency),
+        name="Assistant",
+        chat_message_store_factory=lambda: message_log.LazyChatMessageStore(context_window=CONTEXT_WINDOW),
+    )
+    thread = agent.get_new_thread()
+    journal = thread_journal.ThreadJournal(workdir / "lab10", "bench")
+    journal.directory.mkdir()
+    turns = 0
+
+    async def operation() -> None:
+        nonlocal turns
+        turns += 1
+        await _consume(agent, f"Turn {turns}: what next?", thread=thread, expect="Noted")
+        await journal.save(thread)
+
+    async def cleanup() -> None:
+        store = thread.message_store
+        if store is not None and hasattr(store, "close"):
+            store.close()
+
+    return operation, cleanup, ""
+
+
+async def scenario_redis_store(args: argparse.Namespace, workdir: Path) -> tuple[Operation, Cleanup | None, str]:
+    message_cache, redis_chat_message_store = _import_lab(
+        "11-external-persistence", "message_cache", "redis_chat_message_store"
+    )
+    redis_url = os.environ.get("REDIS_URL")
+    if redis_url:
+        import redis.asyncio as redis
+
+        redis_client = redis.from_url(redis_url)
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            raise ScenarioUnavailable("set REDIS_URL or install fakeredis") from None
+        redis_client = fakeredis.FakeAsyncRedis()
+
+    cache = message_cache.MessageCache()
+    stores = []
+
+    def store_factory() -> Any:
+        store = redis_chat_message_store.RedisChatMessageStore(
+            redis_url=redis_url or "redis://fakeredis",
+            key_prefix="benchmark-suite",
+            context_window=CONTEXT_WINDOW,
+            message_cache=cache,
+            redis_client=redis_client,
+        )
+        stores.append(store)
+        return store
+
+    agent = ChatAgent(
+        chat_client=FakeChatClient(["Noted, here is the next step."], latency=args.latency),
+        name="Assistant",
+        chat_message_store_factory=store_factory,
+    )
+    thread = agent.get_new_thread()
+    turns = 0
+
+    async def operation() -> None:
+        nonlocal turns
+        turns += 1
+        await _consume(agent, f"Turn {turns}: what next?", thread=thread, expect="Noted")
+
+    async def cleanup() -> None:
+        for store in stores:
+            await store.clear()
+            await store.aclose()
+        await redis_client.aclose()
+
+    return operation, cleanup, "" if redis_url else "fakeredis (in-process)"
+
+
+SCENARIOS: dict[str, Callable[[argparse.Namespace, Path], Awaitable[tuple[Operation, Cleanup | None, str]]]] = {
+    "run": scenario_run,
+    "run_stream": scenario_run_stream,
+    "tools": scenario_tools,
+    "agent_as_tool": scenario_agent_as_tool,
+    "middleware": scenario_middleware,
+    "file_store": scenario_file_store,
+    "redis_store": scenario_redis_store,
+}
+
+
+async def measure(name: str, args: argparse.Namespace, workdir: Path) -> ScenarioResult:
+    operation, cleanup, note = await SCENARIOS[name](args, workdir)
+    try:
+        for _ in range(args.warmup):
+            await operation()
+
+        # Best of several rounds: a scheduler hiccup or GC pause slows one round, not the result.
+        rounds: list[tuple[list[float], float]] = []
+        for _ in range(max(1, args.repeat)):
+            latencies: list[float] = []
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                op_started = time.perf_counter()
+                await operation()
+                latencies.append((time.perf_counter() - op_started) * 1000)
+            rounds.append((latencies, time.perf_counter() - started))
+        latencies, elapsed = min(rounds, key=lambda round_: statistics.median(round_[0]))
+
+        # Separate pass: tracemalloc slows allocation-heavy code down several times.
+        peaks: list[int] = []
+        tracemalloc.start()
+        try:
+            baseline_bytes = tracemalloc.get_traced_memory()[0]
+            for _ in range(args.alloc_iterations):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                await operation()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            retained = tracemalloc.get_traced_memory()[0] - baseline_bytes
+        finally:
+            tracemalloc.stop()
+    finally:
+        if cleanup is not None:
+            await cleanup()
+
+    latencies.sort()
+    return ScenarioResult(
+        name=name,
+        iterations=args.iterations,
+        ops_per_second=round(args.iterations / elapsed, 1),
+        p50_ms=round(statistics.median(latencies), 3),
+        p99_ms=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+        mean_ms=round(statistics.fmean(latencies), 3),
+        peak_kib_per_op=round(statistics.median(peaks) / 1024, 1) if peaks else 0.0,
+        retained_bytes_per_op=round(retained / max(1, args.alloc_iterations)),
+        note=note,
+    )
+
+
+def compare(
+    results: list[ScenarioResult],
+    baseline: dict[str, Any],
+    tolerance: float,
+    min_delta_ms: float = 0.1,
+    min_delta_kib: float = 1.0,
+) -> list[str]:
+    """Return one line per scenario whose p50 latency or peak allocation regressed.
+
+    A metric regresses when it grew by more than ``tolerance`` (relative) and by more
+    than its absolute floor; on sub-millisecond turns a few tens of microseconds of
+    jitter already exceed any sensible relative tolerance.
+    """
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        for metric, unit, floor in (("p50_ms", "ms", min_delta_ms), ("peak_kib_per_op", "KiB", min_delta_kib)):
+            old, new = before[metric], getattr(result, metric)
+            if old and new - old > max(old * tolerance, floor):
+                regressions.append(f"{result.name}: {metric} {old} -> {new} {unit} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _environment() -> dict[str, str]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        framework = version("agent-framework-core")
+    except PackageNotFoundError:
+        framework = "unknown"
+    return {"python": platform.python_version(), "platform": platform.platform(), "agent_framework": framework}
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of the scenarios")
+    parser.add_argument("--iterations", type=int, default=300, help="Timed turns per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed rounds per scenario; the fastest counts")
+    parser.add_argument("--alloc-iterations", type=int, default=50, help="Turns measured under tracemalloc")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake model latency in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Delay between streamed tokens in seconds")
+    parser.add_argument("--baseline", type=Path, help="Baseline JSON file to compare with (or write)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed growth before a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore p50 changes up to this many ms")
+    parser.add_argument(
+        "--min-delta-kib", type=float, default=1.0, help="Ignore allocation changes up to this many KiB"
+    )
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.save_baseline and args.baseline is None:
+        parser.error("--save-baseline needs --baseline FILE")
+
+    print(
+        f"iterations={args.iterations} x {args.repeat}  warmup={args.warmup}  "
+        f"model latency={args.latency * 1000:.0f} ms  "
+        f"python {platform.python_version()}\n"
+    )
+    print(f"  {'scenario':<14} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB/op':>12} {'kept B/op':>10}")
+    results: list[ScenarioResult] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            workdir = Path(directory) / name
+            workdir.mkdir()
+            try:
+                result = await measure(name, args, workdir)
+            except ScenarioUnavailable as error:
+                print(f"  {name:<14} skipped: {error}")
+                continue
+            results.append(result)
+            print(
+                f"  {name:<14} {result.ops_per_second:9.1f} {result.p50_ms:9.3f} {result.p99_ms:9.3f} "
+                f"{result.peak_kib_per_op:12.1f} {result.retained_bytes_per_op:10.0f}"
+                + (f"  [{result.note}]" if result.note else "")
+            )
+
+    if args.baseline is None:
+        return 0
+    if args.save_baseline:
+        payload = {"environment": _environment(), "results": [asdict(result) for result in results]}
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run again with --save-baseline to create it.")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("environment", {}).get("python") != platform.python_version():
+        print("\nWarning: the baseline was recorded with another Python version.")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms, args.min_delta_kib)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%} of {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
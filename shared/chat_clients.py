@@ -0,0 +1,158 @@
+"""One shared ``AzureOpenAIChatClient`` per endpoint, deployment and credential.
+
+Each ``AzureOpenAIChatClient`` built the usual way gets its own OpenAI SDK client and
+therefore its own HTTP connection pool, so two agents talking to the same deployment
+(lab 06's orchestrator and sub-agent, for example) each pay for their own TCP and TLS
+handshakes. :func:`get_chat_client` hands out one client per
+``(endpoint, deployment, credential)`` and builds them all on one ``httpx`` pool per
+endpoint, so every agent in the process reuses the same warm connections.
+
+The pool is tuned by :class:`HttpPoolSettings`; the defaults come from the environment:
+
+- ``AOAI_HTTP_MAX_CONNECTIONS`` (default 20): open connections per endpoint.
+- ``AOAI_HTTP_KEEPALIVE_SECONDS`` (default 120): how long an idle connection is kept.
+- ``AOAI_HTTP2`` (default off): multiplex requests over one HTTP/2 connection.
+
+Clients and pools are bound to the event loop that first uses them; call
+:func:`close_chat_clients` before that loop ends (or just let the process exit).
+"""
+
+import logging
+import os
+import ssl
+import threading
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TokenProvider = Callable[[], str | Awaitable[str]]
+
+
+@dataclass(frozen=True)
+class HttpPoolSettings:
+    """Connection pool and transport settings for one endpoint."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 120.0
+    http2: bool = False
+    timeout: float = 120.0
+    # CA bundle or SSL context to trust (e.g. a local test server); True for the system store.
+    verify: ssl.SSLContext | str | bool = True
+
+    @classmethod
+    def from_env(cls) -> "HttpPoolSettings":
+        max_connections = int(os.environ.get("AOAI_HTTP_MAX_CONNECTIONS", cls.max_connections))
+        return cls(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.environ.get("AOAI_HTTP_KEEPALIVE_SECONDS", cls.keepalive_expiry)),
+            http2=os.environ.get("AOAI_HTTP2", "").lower() in {"1", "true", "yes"},
+        )
+
+
+_lock = threading.Lock()
+_chat_clients: dict[tuple[str, str, Any], Any] = {}
+_http_clients: dict[tuple[str, HttpPoolSettings], Any] = {}
+
+
+def get_chat_client(
+    endpoint: str | None = None,
+    deployment_name: str | None = None,
+    *,
+    ad_token_provider: TokenProvider | None = None,
+    api_key: str | None = None,
+    pool: HttpPoolSettings | None = None,
+) -> Any:
+    """Return the shared ``AzureOpenAIChatClient`` for this endpoint, deployment and credential.
+
+    Args:
+        endpoint: Azure OpenAI endpoint. Defaults to ``AOAI_ENDPOINT``.
+        deployment_name: Chat deployment. Defaults to ``AOAI_DEPLOYMENT``.
+        ad_token_provider: Bearer-token provider. Defaults to the cached Azure CLI
+            credential (``shared.azure_auth.openai_token_provider``) unless ``api_key`` is set.
+        api_key: API key to use instead of Microsoft Entra ID tokens.
+        pool: Connection pool settings. Defaults to :meth:`HttpPoolSettings.from_env`.
+            Clients that share an endpoint share a pool only if their settings match.
+    """
+    endpoint = (endpoint or os.environ["AOAI_ENDPOINT"]).rstrip("/")
+    deployment_name = deployment_name or os.environ["AOAI_DEPLOYMENT"]
+    if api_key is None and ad_token_provider is None:
+        from shared.azure_auth import openai_token_provider
+
+        ad_token_provider = openai_token_provider()
+    pool = pool or HttpPoolSettings.from_env()
+    # Keying on the credential keeps two identities from ever sharing a client.
+    key = (endpoint, deployment_name, api_key or ad_token_provider, pool)
+    with _lock:
+        client = _chat_clients.get(key)
+        if client is None:
+            client = _build_chat_client(endpoint, deployment_name, ad_token_provider, api_key, pool)
+            _chat_clients[key] = client
+        return client
+
+
+async def close_chat_clients() -> None:
+    """Close every pooled connection and forget the shared clients."""
+    with _lock:
+        http_clients = list(_http_clients.values())
+        _http_clients.clear()
+        _chat_clients.clear()
+    for http_client in http_clients:
+        await http_client.aclose()
+
+
+def _build_chat_client(
+    endpoint: str,
+    deployment_name: str,
+    ad_token_provider: TokenProvider | None,
+    api_key: str | None,
+    pool: HttpPoolSettings,
+) -> Any:
+    from agent_framework.azure import AzureOpenAIChatClient, AzureOpenAISettings
+    from openai import AsyncAzureOpenAI
+
+    # Same API version resolution as AzureOpenAIChatClient (AZURE_OPENAI_API_VERSION or the default).
+    api_version = AzureOpenAISettings(endpoint=endpoint, chat_deployment_name=deployment_name).api_version
+    async_client = AsyncAzureOpenAI(
+        azure_endpoint=endpoint,
+        azure_deployment=deployment_name,
+        api_version=api_version,
+        api_key=api_key,
+        azure_ad_token_provider=ad_token_provider if api_key is None else None,
+        http_client=_http_client(endpoint, pool),
+        max_retries=2,
+    )
+    return AzureOpenAIChatClient(endpoint=endpoint, deployment_name=deployment_name, async_client=async_client)
+
+
+def _http_client(endpoint: str, pool: HttpPoolSettings) -> Any:
+    """Return the pooled ``httpx.AsyncClient`` for ``endpoint`` (caller holds ``_lock``)."""
+    client = _http_clients.get((endpoint, pool))
+    if client is not None:
+        return client
+
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+
+    http2 = pool.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+    client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=pool.max_connections,
+            max_keepalive_connections=pool.max_keepalive_connections,
+            keepalive_expiry=pool.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(pool.timeout, connect=10.0),
+        http2=http2,
+        verify=pool.verify,
+    )
+    _http_clients[(endpoint, pool)] = client
+    return client
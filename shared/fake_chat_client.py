@@ -0,0 +1,174 @@
+"""A deterministic, local stand-in for ``AzureOpenAIChatClient``.
+
+:class:`FakeChatClient` implements the same chat client interface as the Azure client,
+so it can be handed to ``ChatAgent`` (or used with ``create_agent``) wherever a lab
+builds its agent. It never touches the network, which makes the framework's and the
+labs' own overhead measurable: stores, middleware, tool dispatch and serialization.
+
+Replies are scripted. ``responses`` is either a sequence, replayed in order and from the
+start again once exhausted, or a callable that receives the messages sent to the model
+and returns the reply. A reply is text, a :class:`ToolCall` or a list of tool calls;
+tool calls go through the framework's normal function invocation loop, which runs the
+tool and calls the client again with the result::
+
+    client = FakeChatClient([ToolCall("weather_tool", {"location": "Paris"}), "It is cloudy."])
+    agent = client.create_agent(tools=get_weather)
+
+    # Stateless, so it also works with concurrent runs:
+    client = FakeChatClient(call_tool_then_reply("weather_tool", {"location": "Paris"}, "Forecast: {result}"))
+
+``latency`` is added before every reply (time to first token when streaming), and
+``token_delay`` between streamed tokens. Token counts in the usage details are rough
+estimates (four characters per token), enough for code that reads them.
+"""
+
+import asyncio
+import re
+from collections.abc import AsyncIterable, Callable, MutableSequence, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from agent_framework import (
+    BaseChatClient,
+    ChatMessage,
+    ChatOptions,
+    ChatResponse,
+    ChatResponseUpdate,
+    FunctionCallContent,
+    FunctionResultContent,
+    UsageContent,
+    UsageDetails,
+    use_function_invocation,
+)
+
+
+@dataclass(frozen=True)
+class ToolCall:
+    """A function call the fake model asks the framework to run."""
+
+    name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+Reply = str | ToolCall | Sequence[ToolCall]
+Responder = Callable[[Sequence[ChatMessage]], Reply]
+
+# Words with their trailing whitespace, so joined tokens reproduce the text exactly.
+_TOKEN = re.compile(r"\s*\S+\s*|\s+")
+
+
+@use_function_invocation
+class FakeChatClient(BaseChatClient):
+    """Chat client that answers from a script, with optional latency and token streaming."""
+
+    OTEL_PROVIDER_NAME = "fake"
+
+    def __init__(
+        self,
+        responses: Sequence[Reply] | Responder = ("OK",),
+        *,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            responses: Replies replayed in order (cycling), or a callable choosing the reply
+                from the messages sent to the model.
+            latency: Seconds to wait before each reply, standing in for model latency.
+            token_delay: Seconds between streamed tokens.
+        """
+        super().__init__(**kwargs)
+        if not callable(responses) and not responses:
+            raise ValueError("responses cannot be empty")
+        self.responses = responses
+        self.latency = latency
+        self.token_delay = token_delay
+        self.calls = 0  # model calls answered so far, including tool-call rounds
+
+    async def _inner_get_response(
+        self, *, messages: MutableSequence[ChatMessage], chat_options: ChatOptions, **kwargs: Any
+    ) -> ChatResponse:
+        reply, call_index = self._next_reply(messages)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = self._reply_message(reply, call_index)
+        return ChatResponse(
+            messages=[message],
+            response_id=f"fake-{call_index}",
+            model_id="fake",
+            finish_reason="tool_calls" if _is_tool_reply(reply) else "stop",
+            usage_details=_usage(messages, message),
+        )
+
+    async def _inner_get_streaming_response(
+        self, *, messages: MutableSequence[ChatMessage], chat_options: ChatOptions, **kwargs: Any
+    ) -> AsyncIterable[ChatResponseUpdate]:
+        reply, call_index = self._next_reply(messages)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = self._reply_message(reply, call_index)
+        response_id = f"fake-{call_index}"
+        if _is_tool_reply(reply):
+            yield ChatResponseUpdate(role="assistant", contents=message.contents, response_id=response_id)
+        else:
+            for position, token in enumerate(_TOKEN.findall(message.text)):
+                if position and self.token_delay:
+                    await asyncio.sleep(self.token_delay)
+                yield ChatResponseUpdate(role="assistant", text=token, response_id=response_id, model_id="fake")
+        yield ChatResponseUpdate(
+            role="assistant",
+            contents=[UsageContent(details=_usage(messages, message))],
+            response_id=response_id,
+            finish_reason="tool_calls" if _is_tool_reply(reply) else "stop",
+        )
+
+    def _next_reply(self, messages: Sequence[ChatMessage]) -> tuple[Reply, int]:
+        call_index = self.calls
+        self.calls += 1
+        if callable(self.responses):
+            return self.responses(messages), call_index
+        return self.responses[call_index % len(self.responses)], call_index
+
+    @staticmethod
+    def _reply_message(reply: Reply, call_index: int) -> ChatMessage:
+        if isinstance(reply, str):
+            return ChatMessage(role="assistant", text=reply)
+        calls = [reply] if isinstance(reply, ToolCall) else list(reply)
+        return ChatMessage(
+            role="assistant",
+            contents=[
+                FunctionCallContent(call_id=f"call_{call_index}_{position}", name=call.name, arguments=call.arguments)
+                for position, call in enumerate(calls)
+            ],
+        )
+
+
+def call_tool_then_reply(name: str, arguments: dict[str, Any], reply: str) -> Responder:
+    """Responder that calls one tool, then answers ``reply`` formatted with ``{result}``.
+
+    It decides from the conversation (is the last message a tool result?), not from a
+    counter, so one client can serve concurrent runs.
+    """
+
+    def respond(messages: Sequence[ChatMessage]) -> Reply:
+        last = messages[-1] if messages else None
+        results = [content for content in (last.contents if last else []) if isinstance(content, FunctionResultContent)]
+        if not results:
+            return ToolCall(name, arguments)
+        return reply.format(result=results[-1].result)
+
+    return respond
+
+
+def _is_tool_reply(reply: Reply) -> bool:
+    return not isinstance(reply, str)
+
+
+def _usage(messages: Sequence[ChatMessage], reply: ChatMessage) -> UsageDetails:
+    input_tokens = sum(len(message.text) for message in messages) // 4 + len(messages)
+    output_tokens = max(1, len(reply.text) // 4)
+    return UsageDetails(
+        input_token_count=input_tokens, output_token_count=output_tokens, total_token_count=input_tokens + output_tokens
+    )
@@ -0,0 +1,156 @@
+"""Measure how long each lab entry point takes to import, and enforce a budget.
+
+Every lab builds its agents lazily (``get_agent()`` and friends, memoized with
+``functools.cache``) and imports heavy optional modules such as OpenTelemetry or the
+MCP SDK only where they are used. This script keeps it that way: for every entry point
+it starts a fresh interpreter with ``-X importtime``, loads the module without running
+its ``__main__`` block and without any ``AOAI_*`` settings (so anything that builds a
+client at import time fails loudly), then reports
+
+- the best wall time over ``--repeat`` runs,
+- the cumulative import time reported by ``-X importtime``,
+- the ``--top`` most expensive top-level imports.
+
+Entry points that cannot load here for a known reason unrelated to startup (see
+``KNOWN_IMPORT_FAILURES``: a Windows-only module, a newer ``agent_framework`` API) are
+listed as skipped. Any other failure, including a new import error, counts as failed.
+The exit code is 1 when any entry point exceeds ``--budget-ms`` or fails.
+
+Usage (from the repository root):
+    python shared/startup_benchmark.py [--budget-ms 1500] [--repeat 3] [--report startup.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Scripts that are run directly; helper modules are covered through the scripts importing them.
+ENTRY_POINTS = [
+    "01-first-agent/app.py",
+    "01-first-agent/app-chat-message.py",
+    "02-multi-turn-conversations/app.py",
+    "03-function-tools/app.py",
+    "03-function-tools/app2.py",
+    "04-human-in-loop/app.py",
+    "05-structured-output/app.py",
+    "06-agent-as-tool/app.py",
+    "06-agent-as-tool/app_custom_tool.py",
+    "07-agent-as-MCP-tool/mcp-server.py",
+    "08-observability/app.py",
+    "09-agents-middleware/app.py",
+    "10-persisting-conversations/app.py",
+    "11-external-persistence/app.py",
+]
+DEFAULT_BUDGET_MS = 1500.0
+# Import errors that are expected in some environments, by entry point; anything else fails the run.
+KNOWN_IMPORT_FAILURES = {
+    # Lab 10 reads keys with msvcrt, which only exists on Windows.
+    "10-persisting-conversations/app.py": "ModuleNotFoundError: No module named 'msvcrt'",
+    # Lab 09 needs an agent_framework newer than the pinned build.
+    "09-agents-middleware/app.py": "ImportError: cannot import name 'AgentContext' from 'agent_framework'",
+}
+
+# Loads the script like ``python <script>`` would, minus the ``if __name__ == "__main__"`` block.
+PROBE = """
+import runpy, sys
+path = sys.argv[1]
+sys.path.insert(0, path.rsplit("/", 1)[0])
+runpy.run_path(path, run_name="__startup_probe__")
+"""
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]]]:
+    """Total and per-top-level-module cumulative import time (ms) from ``-X importtime`` output."""
+    top_level: dict[str, float] = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_us, indent, module = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1 and module == "runpy":
+            # Everything before (site, encodings, ...) and runpy itself belong to the probe, not the lab.
+            top_level.clear()
+        elif indent == 1:  # imported directly by the entry point, not by another module
+            top_level[module] = top_level.get(module, 0.0) + cumulative_us / 1000
+    return sum(top_level.values()), sorted(top_level.items(), key=lambda item: item[1], reverse=True)
+
+
+def probe(entry_point: str, repeat: int) -> dict:
+    """Import ``entry_point`` ``repeat`` times in fresh interpreters and keep the fastest run."""
+    env = {name: value for name, value in os.environ.items() if not name.startswith("AOAI_")}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    best: dict | None = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, str(REPO_ROOT / entry_point)],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        import_ms, modules = parse_importtime(completed.stderr)
+        result = {"entry_point": entry_point, "wall_ms": round(wall_ms, 1), "import_ms": round(import_ms, 1)}
+        if completed.returncode != 0:
+            error = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+            result["error"] = error[-1] if error else f"exit code {completed.returncode}"
+            # A known gap in this environment: the lab cannot load here at all, so there is nothing to time.
+            known = KNOWN_IMPORT_FAILURES.get(entry_point)
+            skipped = known is not None and result["error"].startswith(known)
+            result["status"] = "skipped" if skipped else "failed"
+            return result
+        result["top_imports"] = [(module, round(ms, 1)) for module, ms in modules]
+        if best is None or wall_ms < best["wall_ms"]:
+            best = result
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS, help="Scripts relative to the repo root")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Max wall time per entry point")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point; the fastest counts")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest top-level imports to list")
+    parser.add_argument("--report", type=Path, help="Write the full results as JSON")
+    args = parser.parse_args()
+
+    # Compile everything first so the numbers reflect a warm bytecode cache, like the Docker image.
+    subprocess.run([sys.executable, "-m", "compileall", "-q", str(REPO_ROOT)], check=False, capture_output=True)
+
+    print(f"budget {args.budget_ms:.0f} ms per entry point, best of {args.repeat}\n")
+    print(f"  {'entry point':<40} {'wall ms':>8} {'import ms':>10}  heaviest imports")
+    results, over_budget = [], []
+    for entry_point in args.entry_points:
+        result = probe(entry_point, max(1, args.repeat))
+        results.append(result)
+        if "status" in result:
+            print(f"  {entry_point:<40} {result['status']:>8}  {result['error']}")
+            if result["status"] == "failed":
+                over_budget.append(entry_point)
+            continue
+        result["status"] = "ok" if result["wall_ms"] <= args.budget_ms else "over budget"
+        if result["status"] != "ok":
+            over_budget.append(entry_point)
+        heaviest = ", ".join(f"{module} {ms:.0f}" for module, ms in result["top_imports"][: args.top])
+        marker = "  <-- over budget" if result["status"] != "ok" else ""
+        print(f"  {entry_point:<40} {result['wall_ms']:8.0f} {result['import_ms']:10.0f}  {heaviest}{marker}")
+
+    if args.report:
+        args.report.write_text(json.dumps({"budget_ms": args.budget_ms, "results": results}, indent=2))
+        print(f"\nReport written to {args.report}")
+    if over_budget:
+        print(f"\n{len(over_budget)} entry point(s) failed or exceeded the budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())